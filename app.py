@@ -2,12 +2,35 @@ import eventlet
 
 eventlet.monkey_patch()
 
+from eventlet import tpool
+from eventlet.event import Event as GreenEvent
+from eventlet.semaphore import Semaphore
+
 import os
+import io
+import re
+import time
+import hashlib
+import heapq
+import inspect
+import secrets
+import uuid
+import gzip
+import mimetypes
+import shutil
+import sqlite3
+import zipfile
 import cloudinary
 import cloudinary.uploader
 import bleach
+from PIL import Image, ImageOps, UnidentifiedImageError
 import calendar
-from datetime import datetime, timedelta, date
+import click
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, date, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from dotenv import load_dotenv
 from flask import (
     Flask,
@@ -19,11 +42,18 @@ from flask import (
     jsonify,
     session,
     render_template_string,
+    stream_with_context,
 )
-from flask import json
+from flask import json, send_file, abort, make_response, has_request_context
+from werkzeug.http import is_resource_modified
+from werkzeug.security import safe_join
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text
+from sqlalchemy import text, func, select, insert, update, delete, tuple_, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.dialects import postgresql, sqlite
 from flask_login import (
     LoginManager,
     UserMixin,
@@ -34,13 +64,15 @@ from flask_login import (
 )
 from flask_bcrypt import Bcrypt
 from functools import wraps
+from itertools import islice, takewhile
 from flask_babel import Babel, gettext as _
 
 from dateutil.rrule import rrule, DAILY, WEEKLY, MONTHLY, YEARLY
 from dateutil.relativedelta import relativedelta
 
 # --- START: NEW WEBSOCKET IMPORTS ---
-from flask_socketio import SocketIO, emit, join_room
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from socketio import KombuManager, Manager, RedisManager
 
 # --- END: NEW WEBSOCKET IMPORTS ---
 
@@ -66,18 +98,75 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 # --- END OF CORRECTION ---
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY")
 
+# bcrypt cost factor. Changing it is safe: existing hashes are upgraded on login.
+app.config["BCRYPT_LOG_ROUNDS"] = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+# Maximum number of bcrypt computations allowed to run in native threads at once.
+app.config["PASSWORD_HASH_CONCURRENCY"] = int(
+    os.environ.get("PASSWORD_HASH_CONCURRENCY", 2)
+)
+
 cloudinary.config(
     cloud_name=os.environ.get("CLOUDINARY_CLOUD_NAME"),
     api_key=os.environ.get("CLOUDINARY_API_KEY"),
     api_secret=os.environ.get("CLOUDINARY_API_SECRET"),
 )
 
+# Where finished avatar thumbnails are stored: "cloudinary" or "local".
+# Without Cloudinary credentials we fall back to the local filesystem.
+app.config["AVATAR_STORAGE"] = os.environ.get(
+    "AVATAR_STORAGE",
+    "cloudinary" if os.environ.get("CLOUDINARY_CLOUD_NAME") else "local",
+)
+app.config["AVATAR_LOCAL_DIR"] = os.environ.get(
+    "AVATAR_LOCAL_DIR", os.path.join(app.static_folder, "avatars")
+)
+app.config["AVATAR_SIZE"] = 150
+
+# Largest .ics file accepted by the calendar import
+app.config["ICS_IMPORT_MAX_BYTES"] = int(
+    os.environ.get("ICS_IMPORT_MAX_BYTES", 20 * 1024 * 1024)
+)
+# The calendar stores wall-clock times; imported UTC and TZID times are
+# converted to this zone (an IANA name, e.g. "Europe/Brussels")
+app.config["ICS_IMPORT_TIMEZONE"] = os.environ.get("ICS_IMPORT_TIMEZONE", "UTC")
+
+# Output of `flask build-assets`: minified, fingerprinted, precompressed copies
+# of everything under static/, served from /assets/ with immutable caching.
+app.config["ASSET_BUILD_DIR"] = os.environ.get(
+    "ASSET_BUILD_DIR", os.path.join(app.root_path, "build", "assets")
+)
+
 # --- INITIALIZE EXTENSIONS ---
 db = SQLAlchemy(app)
 bcrypt = Bcrypt(app)
 migrate = Migrate(app, db)
 login_manager = LoginManager(app)
 login_manager.login_view = "login"
+
+
+@event.listens_for(Engine, "connect")
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """
+    SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to.
+
+    pysqlite also defers BEGIN until the first write, so a savepoint rolled
+    back (as /api/batch does) would not undo the writes before it. SQLAlchemy's
+    documented workaround: turn pysqlite's own transaction handling off and
+    emit BEGIN ourselves, below.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+@event.listens_for(Engine, "begin")
+def begin_sqlite_transaction(connection):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("BEGIN")
+
+
 # --- START: NEW, EXPLICIT BABEL CONFIGURATION ---
 
 
@@ -122,8 +211,72 @@ babel.init_app(app, locale_selector=get_locale)
 
 
 # --- START: NEW WEBSOCKET INITIALIZATION ---
+# With several workers, set a message queue (e.g. redis://localhost:6379/0) so
+# broadcasts reach clients on every worker. With Redis it also holds presence.
+app.config["SOCKETIO_MESSAGE_QUEUE"] = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
+# Clients send a heartbeat every 25 seconds; a connection not heard from for
+# PRESENCE_TIMEOUT seconds (e.g. on a worker that died) stops counting as online.
+app.config["PRESENCE_TIMEOUT"] = int(os.environ.get("PRESENCE_TIMEOUT", 75))
+# Token buckets every socket event goes through: SOCKET_RATE events a second
+# per connection (up to SOCKET_BURST at once), SOCKET_USER_RATE per user over
+# all their tabs and devices. Events delayed past the limit are capped at
+# SOCKET_BACKLOG per connection; see rate_limited().
+app.config["SOCKET_RATE"] = float(os.environ.get("SOCKET_RATE", 5))
+app.config["SOCKET_BURST"] = int(os.environ.get("SOCKET_BURST", 20))
+app.config["SOCKET_USER_RATE"] = float(os.environ.get("SOCKET_USER_RATE", 10))
+app.config["SOCKET_USER_BURST"] = int(os.environ.get("SOCKET_USER_BURST", 40))
+app.config["SOCKET_BACKLOG"] = int(os.environ.get("SOCKET_BACKLOG", 20))
+# A client with more packets than this waiting to be sent can't keep up: it is
+# disconnected, and catches up through /api/sync when it reconnects.
+app.config["SOCKET_MAX_OUTBOUND"] = int(os.environ.get("SOCKET_MAX_OUTBOUND", 500))
+
+
+class ListRouting:
+    """
+    Client manager mixin for per-list events. They are emitted to
+    list_room(), which nobody joins: when a worker delivers such an event it
+    sends it to its connections in the family room that have subscribed to
+    the list. So a list costs no room, and the filter runs on every worker
+    behind a message queue.
+    """
+
+    def get_participants(self, namespace, room):
+        family_room, marker, list_id = (
+            room.partition("/list_") if isinstance(room, str) else (room, "", "")
+        )
+        participants = super().get_participants(namespace, family_room)
+        if not marker:
+            yield from participants
+            return
+        list_id = int(list_id)
+        for sid, eio_sid in participants:
+            context = socket_connections.get(sid)
+            if context and list_id in context["list_ids"]:
+                yield sid, eio_sid
+
+
+def make_client_manager(url):
+    """What Flask-SocketIO would make for the message queue, with ListRouting."""
+    if not url:
+        return type("ListRoutingManager", (ListRouting, Manager), {})()
+    if url.startswith(("redis://", "rediss://")):
+        base = RedisManager
+    else:
+        base = KombuManager
+    manager = type(f"ListRouting{base.__name__}", (ListRouting, base), {})
+    return manager(url, channel="flask-socketio")
+
+
+def list_room(family_id, list_id):
+    return f"family_room_{family_id}/list_{list_id}"
+
+
 # Add async_mode='eventlet' for production compatibility
-socketio = SocketIO(app, async_mode="eventlet")
+socketio = SocketIO(
+    app,
+    async_mode="eventlet",
+    client_manager=make_client_manager(app.config["SOCKETIO_MESSAGE_QUEUE"]),
+)
 # --- END: NEW WEBSOCKET INITIALIZATION ---
 
 # --- DATABASE MODELS (Our Data Blueprints) ---
@@ -134,7 +287,12 @@ socketio = SocketIO(app, async_mode="eventlet")
 family_members = db.Table(
     "family_members",
     db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True),
-    db.Column("family_id", db.Integer, db.ForeignKey("family.id"), primary_key=True),
+    db.Column(
+        "family_id",
+        db.Integer,
+        db.ForeignKey("family.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
 )
 
 
@@ -144,6 +302,8 @@ class Family(db.Model):
     name = db.Column(db.String(100), nullable=False)
     # The user who created the family is the owner
     owner_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # Secret part of the calendar subscription URL; created on first use
+    calendar_token = db.Column(db.String(43), unique=True, index=True)
 
     # Relationships
     members = db.relationship(
@@ -152,17 +312,36 @@ class Family(db.Model):
         lazy="subquery",
         backref=db.backref("families", lazy=True),
     )
+    # Children are removed by the database (ON DELETE CASCADE), so deleting
+    # a family doesn't load them; passive_deletes leaves them to it
     shopping_lists = db.relationship(
-        "ShoppingList", backref="family", lazy=True, cascade="all, delete-orphan"
+        "ShoppingList",
+        # Lists being purged in the background are gone for everyone
+        primaryjoin="and_(Family.id == ShoppingList.family_id,"
+        " ShoppingList.deleted_at.is_(None))",
+        lazy=True,
+        viewonly=True,
     )
     events = db.relationship(
-        "Event", backref="family", lazy=True, cascade="all, delete-orphan"
+        "Event",
+        backref="family",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     meals = db.relationship(
-        "Meal", backref="family", lazy=True, cascade="all, delete-orphan"
+        "Meal",
+        backref="family",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     notes = db.relationship(
-        "Note", backref="family", lazy=True, cascade="all, delete-orphan"
+        "Note",
+        backref="family",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
@@ -180,6 +359,16 @@ class User(UserMixin, db.Model):
     # This relationship tracks which families this user owns
     owned_families = db.relationship("Family", backref="owner", lazy=True)
 
+    # For the invite typeahead (see inviteable_users_query). text_pattern_ops
+    # lets Postgres use it for LIKE 'prefix%' whatever the database collation.
+    __table_args__ = (
+        db.Index(
+            "ix_user_username_lower",
+            func.lower(username).label("username_lower"),
+            postgresql_ops={"username_lower": "text_pattern_ops"},
+        ),
+    )
+
 
 # The old list_members table is no longer needed
 
@@ -188,22 +377,46 @@ class ShoppingList(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     # CHANGED: Now links to a family, not a user
-    family_id = db.Column(db.Integer, db.ForeignKey("family.id"), nullable=False)
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), nullable=False
+    )
+    # Denormalized counts for the list cards; see adjust_item_counters()
+    item_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    done_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Set when a large list is deleted: it is hidden at once and its items are
+    # purged in the background (see purge_deleted_lists())
+    deleted_at = db.Column(db.DateTime)
+    family = db.relationship("Family")
     items = db.relationship(
-        "Item", backref="list", lazy=True, cascade="all, delete-orphan"
+        "Item",
+        backref="list",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
 
 class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(200), nullable=False)
-    done = db.Column(db.Boolean, default=False)
+    done = db.Column(db.Boolean, nullable=False, default=False, server_default="0")
+    # Sparse rank within the list (see ITEM_POSITION_STEP); ties go by id
+    position = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    list_id = db.Column(db.Integer, db.ForeignKey("shopping_list.id"), nullable=False)
+    list_id = db.Column(
+        db.Integer,
+        db.ForeignKey("shopping_list.id", ondelete="CASCADE"),
+        nullable=False,
+    )
     # We still track who added an item
     author_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     author = db.relationship("User", backref="items")
 
+    # Display order of a list: open items first, then by rank
+    __table_args__ = (
+        db.Index("ix_item_list_id_done_position", "list_id", "done", "position", "id"),
+    )
+
 
 class Event(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -227,11 +440,29 @@ class Event(db.Model):
     # end_date: When does the repeating stop? (Null means forever)
     recurrence_end_date = db.Column(db.Date, nullable=True)
 
+    # The iCalendar UID of an imported event, so importing the same file
+    # again doesn't duplicate it. None for events created here.
+    uid = db.Column(db.String(255))
+
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    family_id = db.Column(db.Integer, db.ForeignKey("family.id"), nullable=False)
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), nullable=False
+    )
     author_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     author = db.relationship("User", backref="events")
 
+    __table_args__ = (
+        db.Index("ix_event_family_id_uid", "family_id", "uid", unique=True),
+        # Upcoming single events: family_id = ? AND recurrence_type = 'none'
+        # AND date >= ? ORDER BY date is a range scan
+        db.Index(
+            "ix_event_family_id_recurrence_type_date",
+            "family_id",
+            "recurrence_type",
+            "date",
+        ),
+    )
+
 
 class Meal(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -241,7 +472,9 @@ class Meal(db.Model):
     notes = db.Column(db.Text, nullable=True)
     week_of = db.Column(db.Date, nullable=False)
     # CHANGED: Now links to a family
-    family_id = db.Column(db.Integer, db.ForeignKey("family.id"), nullable=False)
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), nullable=False
+    )
     # We can still track who last updated this meal slot
     author_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     author = db.relationship("User", backref="meals")
@@ -252,7 +485,9 @@ class Note(db.Model):
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     # CHANGED: Now links to a family
-    family_id = db.Column(db.Integer, db.ForeignKey("family.id"), nullable=False)
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), nullable=False
+    )
     # The original author is still very important here
     author_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     author = db.relationship("User", backref="notes")
@@ -274,13 +509,17 @@ class VaultEntry(db.Model):
     )
 
     # Foreign keys
-    family_id = db.Column(db.Integer, db.ForeignKey("family.id"), nullable=False)
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), nullable=False
+    )
     author_id = db.Column(
         db.Integer, db.ForeignKey("user.id"), nullable=False
     )  # Track who created/edited it
 
     # Relationships
-    family = db.relationship("Family", backref="vault_entries")
+    family = db.relationship(
+        "Family", backref=db.backref("vault_entries", passive_deletes=True)
+    )
     author = db.relationship("User", backref="vault_entries")
 
     def __repr__(self):
@@ -303,10 +542,16 @@ class Chore(db.Model):
     last_generated_date = db.Column(db.Date, nullable=True)
     # -------------------
 
-    family_id = db.Column(db.Integer, db.ForeignKey("family.id"), nullable=False)
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), nullable=False
+    )
 
     assignments = db.relationship(
-        "ChoreAssignment", backref="chore", lazy=True, cascade="all, delete-orphan"
+        "ChoreAssignment",
+        backref="chore",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __repr__(self):
@@ -320,10 +565,12 @@ class ChoreAssignment(db.Model):
     is_complete = db.Column(db.Boolean, default=False, nullable=False)
 
     # Foreign keys
-    chore_id = db.Column(db.Integer, db.ForeignKey("chore.id"), nullable=False)
+    chore_id = db.Column(
+        db.Integer, db.ForeignKey("chore.id", ondelete="CASCADE"), nullable=False
+    )
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     family_id = db.Column(
-        db.Integer, db.ForeignKey("family.id"), nullable=False
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), nullable=False
     )  # For easier querying
 
     # Relationships
@@ -336,203 +583,1187 @@ class ChoreAssignment(db.Model):
 # --- END OF NEW CHORE MODELS ---
 
 
-# --- USER LOADER ---
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+class FamilyRevision(db.Model):
+    """
+    A counter per family and feature that every write bumps. Pages use it to
+    build ETags, so an unchanged page can be answered with 304 Not Modified.
+    """
+
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), primary_key=True
+    )
+    # 'family', 'lists', 'calendar', 'meals', 'bulletin', 'vault' or 'chores'
+    feature = db.Column(db.String(20), primary_key=True)
+    revision = db.Column(db.Integer, nullable=False, default=0)
+    # How many change log entries the feature has had; see unread_counts()
+    changes = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # When it was last bumped, for Last-Modified headers
+    updated_at = db.Column(db.DateTime)
 
 
-# --- START: ADD THIS NEW DECORATOR ---
-def family_required(f):
+class FeatureWatermark(db.Model):
     """
-    Ensures a user has selected a family and is a member of it.
-    This decorator must be placed AFTER @login_required.
+    How far a member has read a feature of a family: the feature's
+    FamilyRevision.changes when they last opened it (moved forward by their
+    own changes too). Unread = changes - seen. seen_change_id is the family's
+    latest ChangeLog id at that point, to find which changes are unread.
     """
 
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        family_id = session.get("current_family_id")
-        if not family_id:
-            flash(_("Please select a space to continue."), "info")
-            return redirect(url_for("families"))
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), primary_key=True
+    )
+    feature = db.Column(db.String(20), primary_key=True)
+    seen = db.Column(db.Integer, nullable=False, default=0)
+    seen_change_id = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
 
-        family = Family.query.get(family_id)
-        if not family or current_user not in family.members:
-            session.pop("current_family_id", None)  # Clear invalid session data
-            flash(
-                _(
-                    "You are not a member of the selected space, or it no longer exists."
-                ),
-                "warning",
-            )
-            return redirect(url_for("families"))
 
-        # If all checks pass, inject the 'current_family' object into the route
-        return f(current_family=family, *args, **kwargs)
+# --- PASSWORD HASHING ---
+# bcrypt is CPU-bound C code that never yields to the eventlet hub, so a single
+# login would freeze every websocket on the worker. We run it in eventlet's
+# native thread pool instead, capped by a semaphore so a burst of logins cannot
+# starve the CPU. Waiting greenlets are counted for the /internal/metrics route.
+password_hash_slots = Semaphore(app.config["PASSWORD_HASH_CONCURRENCY"])
+password_hash_stats = {
+    "running": 0,
+    "waiting": 0,
+    "max_waiting": 0,
+    "completed": 0,
+    "rehashed": 0,
+    "total_wait_ms": 0.0,
+    "total_run_ms": 0.0,
+}
 
-    return decorated_function
 
+def _run_in_hash_pool(func, *args):
+    """Runs a bcrypt call in a native thread, respecting the concurrency cap."""
+    queued_at = time.monotonic()
+    password_hash_stats["waiting"] += 1
+    password_hash_stats["max_waiting"] = max(
+        password_hash_stats["max_waiting"], password_hash_stats["waiting"]
+    )
+    with password_hash_slots:
+        started_at = time.monotonic()
+        password_hash_stats["waiting"] -= 1
+        password_hash_stats["running"] += 1
+        try:
+            return tpool.execute(func, *args)
+        finally:
+            finished_at = time.monotonic()
+            password_hash_stats["running"] -= 1
+            password_hash_stats["completed"] += 1
+            password_hash_stats["total_wait_ms"] += (started_at - queued_at) * 1000
+            password_hash_stats["total_run_ms"] += (finished_at - started_at) * 1000
+
+
+def hash_password(password):
+    """Returns a bcrypt hash (as str) using the configured cost factor."""
+    return _run_in_hash_pool(bcrypt.generate_password_hash, password).decode("utf-8")
+
+
+def check_password(password_hash, password):
+    """Verifies a password against a stored bcrypt hash without blocking the hub."""
+    if not password_hash or not password:
+        return False
+    return _run_in_hash_pool(bcrypt.check_password_hash, password_hash, password)
+
+
+def password_needs_rehash(password_hash):
+    """True if the hash was made with a cost factor other than the configured one."""
+    try:
+        # bcrypt hashes look like "$2b$12$<salt+hash>"
+        rounds = int(password_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return True
+    return rounds != app.config["BCRYPT_LOG_ROUNDS"]
 
-# --- END: ADD THIS NEW DECORATOR ---
 
+class ChangeLog(db.Model):
+    """
+    Append-only log of every change to a family's data. The id doubles as the
+    sequence number that reconnecting clients pass to /api/sync.
+    """
 
-# ADD THIS NEW FUNCTION TO APP.PY
+    id = db.Column(db.Integer, primary_key=True)
+    family_id = db.Column(
+        db.Integer, db.ForeignKey("family.id", ondelete="CASCADE"), nullable=False
+    )
+    # 'list', 'item', 'note', 'event', 'meal', 'chore' or 'assignment'
+    # ('family' for snapshot markers)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    # 'upsert', 'delete', or 'snapshot': everything up to this id was compacted
+    op = db.Column(db.String(10), nullable=False)
+    data = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
-# --- ADD THIS TO app.py ---
+    __table_args__ = (db.Index("ix_change_log_family_id_id", "family_id", "id"),)
 
 
-def set_target_blank(attrs, new=False):
-    """Helper to force links to open in a new tab"""
-    attrs[(None, "target")] = "_blank"
-    attrs[(None, "rel")] = "noopener noreferrer"
-    return attrs
+class IdempotencyKey(db.Model):
+    """
+    Remembers the result of each /api/batch operation by its client-generated
+    key, so a retried request doesn't apply the same operation twice.
+    Rows are pruned after IDEMPOTENCY_KEY_TTL.
+    """
 
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    key = db.Column(db.String(64), primary_key=True)
+    result = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, index=True
+    )
 
-@app.template_filter("linkify")
-def linkify_filter(text):
-    """Jinja filter to make links clickable in templates"""
-    if not text:
-        return ""
-    return bleach.linkify(text, callbacks=[set_target_blank])
 
+# --- PAGE REVISIONS & CONDITIONAL GET ---
+# Changes on every restart/deploy, so ETags of pages rendered by old templates
+# are never reused.
+APP_BOOT_ID = uuid.uuid4().hex[:8]
 
-@app.context_processor
-def inject_today_date():
-    """Injects the current day of the month into all templates."""
-    from datetime import date
 
-    today = date.today()
-    return dict(current_day=today.day)
+def _dialect_insert(model):
+    if db.engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
 
 
-@app.context_processor
-def inject_permissions():
+def bump_revision(family_id, *features, changes=0):
     """
-    Injects a global 'is_admin' variable into all templates.
-    It respects the 'view_as_member' toggle for testing purposes.
+    Increments the revision of each feature for a family, and its change
+    count by `changes` (record_change() passes the entries it logged). Call
+    it before the commit of the write it describes, so both land in the same
+    transaction.
     """
-    is_admin = False
+    for feature in features:
+        now = datetime.utcnow()
+        statement = _dialect_insert(FamilyRevision).values(
+            family_id=family_id,
+            feature=feature,
+            revision=1,
+            changes=changes,
+            updated_at=now,
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["family_id", "feature"],
+                set_={
+                    "revision": FamilyRevision.revision + 1,
+                    "changes": FamilyRevision.changes + changes,
+                    "updated_at": now,
+                },
+            )
+        )
 
-    # 1. Check if user is logged in and a family is selected
-    if current_user.is_authenticated:
-        current_family_id = session.get("current_family_id")
-        if current_family_id:
-            # We query the family here (or get it if you have it cached)
-            # Note: Family.query.get might be slightly heavy to do on every request,
-            # but for a family app it's totally fine.
-            family = Family.query.get(current_family_id)
 
-            if family and family.owner_id == current_user.id:
-                # User IS the owner...
-                # BUT check if they turned on "View as Member" mode
-                if not session.get("view_as_member"):
-                    is_admin = True
+def page_etag(current_family, *features):
+    """
+    A cheap ETag for a family page: one primary-key query for the revisions,
+    plus everything else the page depends on (viewer, language, admin view).
+    """
+    features = ("family",) + features
+    revisions = dict(
+        db.session.query(FamilyRevision.feature, FamilyRevision.revision).filter(
+            FamilyRevision.family_id == current_family.id,
+            FamilyRevision.feature.in_(features),
+        )
+    )
+    parts = [
+        APP_BOOT_ID,
+        current_family.id,
+        current_user.id,
+        get_locale(),
+        current_family.owner_id == current_user.id,
+        bool(session.get("view_as_member")),
+        date.today().isoformat(),  # "today" highlights and the current week
+    ] + [revisions.get(feature, 0) for feature in features]
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def conditional_page(*features):
+    """
+    Answers GETs with 304 when the browser already has the current version.
+    Must be placed AFTER @family_required.
+    """
 
-    return dict(is_admin=is_admin)
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(current_family, *args, **kwargs):
+            open_feature_page(current_family.id, features)
+            # Flashed messages are rendered into the page, so it has to be sent
+            if session.get("_flashes"):
+                return f(current_family=current_family, *args, **kwargs)
+
+            etag = page_etag(current_family, *features)
+            if etag in request.if_none_match:
+                response = make_response("", 304)
+            else:
+                response = make_response(
+                    f(current_family=current_family, *args, **kwargs)
+                )
+                if response.status_code != 200:
+                    return response
 
+            response.set_etag(etag)
+            # Cache it, but always ask us before reusing it
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
 
-@app.route("/toggle_view_mode")
-@login_required
-def toggle_view_mode():
-    """Toggles the session flag to pretend to be a regular member."""
-    if session.get("view_as_member"):
-        session.pop("view_as_member")
-        flash("Exited Member View. You are Admin again.", "info")
-    else:
-        session["view_as_member"] = True
-        flash("Viewing as a regular Member.", "success")
+        return decorated_function
 
-    # Redirect back to the page they were just on
-    return redirect(request.referrer or url_for("dashboard"))
+    return decorator
 
 
-# --- START: ADD THIS NEW FUNCTION ---
-@app.context_processor
-def inject_app_config():
-    """Injects the app config into all templates."""
-    return dict(app=app)
+# --- CHANGE LOG & DELTA SYNC ---
+# Which page revision (see FamilyRevision) each logged entity belongs to.
+CHANGE_FEATURES = {
+    "list": "lists",
+    "item": "lists",
+    "note": "bulletin",
+    "event": "calendar",
+    "meal": "meals",
+    "chore": "chores",
+    "assignment": "chores",
+}
+# Entries older than this are folded into a snapshot marker.
+CHANGELOG_RETENTION = timedelta(days=7)
+CHANGELOG_COMPACTION_INTERVAL = 60 * 60  # seconds
+# Unpinned notes older than this are deleted (by the same background task)
+NOTE_RETENTION = timedelta(days=30)
+# A client further behind than this gets a snapshot instead of a delta.
+CHANGELOG_MAX_DELTA = 500
 
 
-# --- END: ADD THIS NEW FUNCTION ---
+def _iso(value):
+    return value.isoformat() if value else None
 
 
-@app.route("/login", methods=["GET", "POST"])
-def login():
-    # This first redirect handles users who are already logged in
-    if current_user.is_authenticated:
-        return redirect(url_for("dashboard"))
+def serialize_item(item):
+    """
+    The one dict form of an item, used by the list page (template and JSON),
+    socket payloads and the change log. Authors are family members, which
+    @family_required has already loaded, so item.author doesn't query.
+    """
+    return {
+        "id": item.id,
+        "list_id": item.list_id,
+        "text": item.text,
+        "done": bool(item.done),
+        "position": item.position,
+        "author": {"username": item.author.username},
+        "raw_timestamp": _iso(item.created_at),
+    }
 
-    if request.method == "POST":
-        username = request.form.get("username")
-        password = request.form.get("password")
-        user = User.query.filter_by(username=username).first()
-        if user and bcrypt.check_password_hash(user.password_hash, password):
-            login_user(user)
-            # This second redirect handles users who just successfully logged in
-            return redirect(url_for("dashboard"))
+
+SYNC_SERIALIZERS = {
+    "list": lambda shopping_list: {"id": shopping_list.id, "name": shopping_list.name},
+    "item": serialize_item,
+    "note": lambda note: {
+        "id": note.id,
+        "content": note.content,
+        "author_id": note.author_id,
+        "is_pinned": note.is_pinned,
+        "raw_timestamp": _iso(note.timestamp),
+    },
+    "event": lambda event: {
+        "id": event.id,
+        "title": event.title,
+        "date": _iso(event.date),
+        "time": _iso(event.time),
+        "end_time": _iso(event.end_time),
+        "is_all_day": bool(event.is_all_day),
+        "color": event.color,
+        "recurrence_type": event.recurrence_type,
+        "recurrence_interval": event.recurrence_interval,
+        "recurrence_end_date": _iso(event.recurrence_end_date),
+        "author_id": event.author_id,
+    },
+    "meal": lambda meal: {
+        "id": meal.id,
+        "day": meal.day,
+        "meal_type": meal.meal_type,
+        "week_of": _iso(meal.week_of),
+        "description": meal.description,
+        "notes": meal.notes or "",
+    },
+    "chore": lambda chore: {
+        "id": chore.id,
+        "name": chore.name,
+        "points": chore.points,
+        "frequency_days": chore.frequency_days,
+    },
+    "assignment": lambda assignment: {
+        "id": assignment.id,
+        "chore_id": assignment.chore_id,
+        "user_id": assignment.user_id,
+        "week_of": _iso(assignment.week_of),
+        "is_complete": assignment.is_complete,
+    },
+}
+
+
+def record_change(family_id, entity, obj, op="upsert", collect=None):
+    """
+    Appends a change to the family's log and bumps the matching page revision.
+    Call it before the commit of the write it describes, so both land in the
+    same transaction. For deletes, pass the id instead of the object.
+    If `collect` is a list, the change is also appended to it in /api/sync form.
+    Returns the change's sequence number.
+    """
+    if op == "upsert":
+        db.session.flush()  # New rows need their id before we log them
+        change = ChangeLog(
+            family_id=family_id,
+            entity=entity,
+            entity_id=obj.id,
+            op=op,
+            data=SYNC_SERIALIZERS[entity](obj),
+        )
+    else:
+        change = ChangeLog(family_id=family_id, entity=entity, entity_id=obj, op=op)
+    db.session.add(change)
+    bump_revision(family_id, CHANGE_FEATURES[entity], changes=1)
+    count_unread_changes(family_id, CHANGE_FEATURES[entity], 1)
+    if entity in SEARCH_FIELDS:
+        if op == "upsert":
+            index_for_search(family_id, entity, [change.data])
         else:
-            flash(_("Invalid username or password"), "danger")
-            return render_template("login.html", username=username)
+            remove_from_search(entity, [change.entity_id])
+    db.session.flush()
+    if collect is not None:
+        collect.append(serialize_change(change))
+    return change.id
 
-    return render_template("login.html")
 
+def record_changes(family_id, entity, changes):
+    """
+    record_change() for bulk writes: logs `changes`, a list of
+    (entity_id, op, data) tuples, with one multi-row INSERT and bumps the page
+    revision once. Returns the highest sequence number, or None if empty.
+    """
+    if not changes:
+        return None
+    now = datetime.utcnow()
+    seqs = db.session.scalars(
+        insert(ChangeLog).returning(ChangeLog.id),
+        [
+            dict(
+                family_id=family_id,
+                entity=entity,
+                entity_id=entity_id,
+                op=op,
+                data=data,
+                created_at=now,
+            )
+            for entity_id, op, data in changes
+        ],
+    ).all()
+    bump_revision(family_id, CHANGE_FEATURES[entity], changes=len(seqs))
+    count_unread_changes(family_id, CHANGE_FEATURES[entity], len(seqs))
+    if entity in SEARCH_FIELDS:
+        index_for_search(
+            family_id, entity, [data for _, op, data in changes if op == "upsert"]
+        )
+        remove_from_search(
+            entity, [entity_id for entity_id, op, _ in changes if op != "upsert"]
+        )
+    return max(seqs)
 
-@app.route("/register", methods=["GET", "POST"])
-def register():
-    if current_user.is_authenticated:
-        return redirect(url_for("home"))
-    if request.method == "POST":
-        username = request.form.get("username")
-        password = request.form.get("password")
-        existing_user = User.query.filter_by(username=username).first()
-        if existing_user:
-            flash(_("Username already exists."), "warning")
-            return redirect(url_for("register"))
-        hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
-        new_user = User(username=username, password_hash=hashed_password)
-        db.session.add(new_user)
-        db.session.commit()
-        flash(_("Registration successful! Please log in."), "success")
-        return redirect(url_for("login"))
-    return render_template("register.html")
 
+def serialize_change(change):
+    """A ChangeLog row in the form /api/sync and batch broadcasts send it."""
+    return {
+        "seq": change.id,
+        "entity": change.entity,
+        "id": change.entity_id,
+        "op": change.op,
+        "data": change.data,
+    }
 
-@app.route("/logout")
-@login_required
-def logout():
-    logout_user()
-    return redirect(url_for("login"))
 
+def latest_change_seq(family_id):
+    return (
+        db.session.query(func.max(ChangeLog.id))
+        .filter(ChangeLog.family_id == family_id)
+        .scalar()
+        or 0
+    )
 
-@app.route("/set_language/<lang>")
-def set_language(lang=None):
-    # Check if the selected language is one of our supported languages
-    if lang in app.config["LANGUAGES"]:
-        # Store the user's choice in the session
-        session["language"] = lang
-        # If the user is logged in, also save their preference to their profile
-        if current_user.is_authenticated:
-            current_user.language = lang
-            db.session.commit()
-            flash(_("Language updated!"), "success")
 
-    # Always redirect back to the settings page after changing the language.
-    return redirect(url_for("settings"))
+# --- UNREAD COUNTS ---
+# Each feature's change count (FamilyRevision.changes) minus the member's
+# watermark (FeatureWatermark.seen), so reading every count is one
+# primary-key join. Opening a feature page moves the watermark up to the
+# count; a member's own changes move theirs along with the count.
+UNREAD_FEATURES = ("lists", "calendar", "bulletin", "meals", "chores")
 
 
-@app.route("/families")
-@login_required
-def families():
-    """Page to view all families and create a new one."""
-    return render_template("families.html")  # We will create this file next
+def feature_counters(user_id, family_id, features):
+    """(feature, revision, unread changes) rows of the family's features."""
+    return db.session.execute(
+        select(
+            FamilyRevision.feature,
+            FamilyRevision.revision,
+            FamilyRevision.changes - func.coalesce(FeatureWatermark.seen, 0),
+        )
+        .outerjoin(
+            FeatureWatermark,
+            db.and_(
+                FeatureWatermark.user_id == user_id,
+                FeatureWatermark.family_id == FamilyRevision.family_id,
+                FeatureWatermark.feature == FamilyRevision.feature,
+            ),
+        )
+        .where(
+            FamilyRevision.family_id == family_id,
+            FamilyRevision.feature.in_(features),
+        )
+    )
 
 
-@app.route("/families/create", methods=["POST"])
-@login_required
-def create_family():
-    """Process the form for creating a new family."""
-    family_name = request.form.get("family_name")
-    if family_name:
+def unread_counts(user_id, family_id):
+    """{feature: unread changes} for every feature in UNREAD_FEATURES."""
+    counts = dict.fromkeys(UNREAD_FEATURES, 0)
+    rows = feature_counters(user_id, family_id, UNREAD_FEATURES)
+    counts.update((feature, max(unread, 0)) for feature, _, unread in rows)
+    return counts
+
+
+def mark_features_seen(user_id, family_id, features):
+    """Moves the member's watermarks up to the features' current counts."""
+    latest_change = (
+        select(func.coalesce(func.max(ChangeLog.id), 0))
+        .where(ChangeLog.family_id == family_id)
+        .scalar_subquery()
+    )
+    statement = _dialect_insert(FeatureWatermark).from_select(
+        ["user_id", "family_id", "feature", "seen", "seen_change_id"],
+        select(
+            db.literal(user_id),
+            FamilyRevision.family_id,
+            FamilyRevision.feature,
+            FamilyRevision.changes,
+            latest_change,
+        ).where(
+            FamilyRevision.family_id == family_id,
+            FamilyRevision.feature.in_(features),
+        ),
+    )
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["user_id", "family_id", "feature"],
+            set_={
+                "seen": statement.excluded.seen,
+                "seen_change_id": statement.excluded.seen_change_id,
+            },
+        )
+    )
+
+
+def open_feature_page(family_id, features):
+    """
+    Called by feature pages: if any of them had unread changes, marks them
+    seen and tells the member's other open pages and devices.
+    """
+    features = [feature for feature in features if feature in UNREAD_FEATURES]
+    if not features:
+        return
+    counts = unread_counts(current_user.id, family_id)
+    if any(counts[feature] for feature in features):
+        mark_features_seen(current_user.id, family_id, features)
+        db.session.commit()
+        socketio.emit(
+            "unread_counts",
+            {"family_id": family_id, "counts": dict.fromkeys(features, 0)},
+            room=f"user_{current_user.id}",
+        )
+
+
+def count_unread_changes(family_id, feature, count):
+    """
+    Counts `count` new changes to a feature: the author's watermark moves
+    with them (their own changes aren't unread), and the delta is pushed to
+    the family once the transaction commits (see emit_unread_changes).
+    """
+    if has_request_context() and current_user.is_authenticated:
+        statement = _dialect_insert(FeatureWatermark).values(
+            user_id=current_user.id, family_id=family_id, feature=feature, seen=count
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "family_id", "feature"],
+                set_={"seen": FeatureWatermark.seen + count},
+            )
+        )
+        actor_id = current_user.id
+    else:
+        actor_id = None
+    # Tagged with the innermost transaction so that a rolled back savepoint
+    # (the batch API) only drops its own deltas
+    session = db.session()
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    session.info.setdefault("unread_changes", []).append(
+        (transaction, family_id, feature, actor_id, count)
+    )
+
+
+def _within(transaction, ancestor):
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(db.session, "after_commit")
+def emit_unread_changes(session):
+    if session.in_nested_transaction():
+        return  # A savepoint: wait for the outer commit
+    deltas = session.info.get("held_unread_changes", {})
+    for _transaction, family_id, feature, actor_id, count in session.info.pop(
+        "unread_changes", []
+    ):
+        key = (family_id, feature, actor_id)
+        deltas[key] = deltas.get(key, 0) + count
+    if "held_unread_changes" not in session.info:
+        broadcast_unread_changes(deltas)
+
+
+def broadcast_unread_changes(deltas):
+    for (family_id, feature, actor_id), count in deltas.items():
+        socketio.emit(
+            "unread_changed",
+            {"feature": feature, "delta": count, "actor_id": actor_id},
+            room=f"family_room_{family_id}",
+        )
+
+
+@contextmanager
+def held_unread_changes():
+    """
+    Collects the unread_changed broadcasts of every commit in the block and
+    sends them once at the end, for work that commits in batches (imports).
+    """
+    held = db.session.info["held_unread_changes"] = {}
+    try:
+        yield
+    finally:
+        db.session.info.pop("held_unread_changes", None)
+        broadcast_unread_changes(held)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def discard_unread_changes(session, previous_transaction):
+    pending = session.info.get("unread_changes")
+    if previous_transaction.parent is None:
+        session.info.pop("unread_changes", None)
+    elif pending:
+        session.info["unread_changes"] = [
+            change for change in pending if not _within(change[0], previous_transaction)
+        ]
+
+
+def compact_change_log(family_id):
+    """
+    Replaces log entries older than CHANGELOG_RETENTION with one 'snapshot'
+    marker. Clients that synced before the marker get a full snapshot.
+    """
+    cutoff = datetime.utcnow() - CHANGELOG_RETENTION
+    compacted_through = (
+        db.session.query(func.max(ChangeLog.id))
+        .filter(ChangeLog.family_id == family_id, ChangeLog.created_at < cutoff)
+        .scalar()
+    )
+    if not compacted_through:
+        return
+
+    ChangeLog.query.filter(
+        ChangeLog.family_id == family_id, ChangeLog.id <= compacted_through
+    ).delete(synchronize_session=False)
+    # The marker reuses the id of the newest compacted entry
+    db.session.add(
+        ChangeLog(
+            id=compacted_through,
+            family_id=family_id,
+            entity="family",
+            entity_id=family_id,
+            op="snapshot",
+        )
+    )
+    db.session.commit()
+
+
+def compact_change_logs():
+    """Compacts the log of every family with entries past the retention."""
+    cutoff = datetime.utcnow() - CHANGELOG_RETENTION
+    family_ids = db.session.scalars(
+        select(ChangeLog.family_id)
+        .where(ChangeLog.created_at < cutoff, ChangeLog.op != "snapshot")
+        .distinct()
+    ).all()
+    for family_id in family_ids:
+        compact_change_log(family_id)
+    return len(family_ids)
+
+
+def expire_notes():
+    """
+    Deletes the unpinned notes older than NOTE_RETENTION, logged like any
+    other delete (so synced clients and the search index drop them) and
+    broadcast to each family. Returns how many were deleted.
+    """
+    cutoff = datetime.utcnow() - NOTE_RETENTION
+    expired = {}
+    for family_id, note_id in db.session.execute(
+        select(Note.family_id, Note.id).where(
+            Note.timestamp < cutoff, Note.is_pinned.is_(False)
+        )
+    ):
+        expired.setdefault(family_id, []).append(note_id)
+    for family_id, note_ids in expired.items():
+        db.session.execute(
+            delete(Note).where(Note.id.in_(note_ids)),
+            execution_options={"synchronize_session": False},
+        )
+        seq = record_changes(
+            family_id, "note", [(note_id, "delete", None) for note_id in note_ids]
+        )
+        db.session.commit()
+        socketio.emit(
+            "changes_applied",
+            {
+                "seq": seq,
+                "changes": [
+                    {
+                        "seq": seq,
+                        "entity": "note",
+                        "id": note_id,
+                        "op": "delete",
+                        "data": None,
+                    }
+                    for note_id in note_ids
+                ],
+            },
+            room=f"family_room_{family_id}",
+        )
+    return sum(len(note_ids) for note_ids in expired.values())
+
+
+def run_maintenance():
+    """
+    Background task: every CHANGELOG_COMPACTION_INTERVAL, expire_notes() and
+    then compact_change_logs().
+    """
+    while True:
+        for task in (expire_notes, compact_change_logs):
+            with app.app_context():
+                try:
+                    task()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"{task.__name__} failed: {e}")
+        socketio.sleep(CHANGELOG_COMPACTION_INTERVAL)
+
+
+_maintenance_started = False
+
+
+@app.before_request
+def start_maintenance_tasks():
+    """Starts the background upkeep once per process, on its first request."""
+    global _maintenance_started
+    if _maintenance_started:
+        return
+    _maintenance_started = True
+    socketio.start_background_task(run_maintenance)
+    # Lists whose purge was cut short by a restart
+    schedule_list_purge()
+
+
+@app.cli.command("compact-change-log")
+def compact_change_log_command():
+    """Folds change log entries past the retention into snapshot markers."""
+    print(f"Compacted the change log of {compact_change_logs()} families.")
+
+
+def build_family_snapshot(family_id):
+    """The current state of every synced entity, as a list of upsert changes."""
+    sources = {
+        "list": ShoppingList.query.filter_by(family_id=family_id, deleted_at=None),
+        "item": Item.query.join(ShoppingList)
+        .filter(ShoppingList.family_id == family_id, ShoppingList.deleted_at.is_(None))
+        .options(joinedload(Item.author)),
+        "note": Note.query.filter_by(family_id=family_id),
+        "event": Event.query.filter_by(family_id=family_id),
+        "meal": Meal.query.filter_by(family_id=family_id),
+        "chore": Chore.query.filter_by(family_id=family_id),
+        "assignment": ChoreAssignment.query.filter_by(family_id=family_id),
+    }
+    return [
+        {
+            "entity": entity,
+            "id": obj.id,
+            "op": "upsert",
+            "data": SYNC_SERIALIZERS[entity](obj),
+        }
+        for entity, query in sources.items()
+        for obj in query
+    ]
+
+
+def current_sync_seq():
+    """The change sequence a page was rendered at, for /api/sync on reconnect."""
+    family_id = session.get("current_family_id")
+    if current_user.is_authenticated and family_id:
+        return latest_change_seq(family_id)
+    return None
+
+
+@app.context_processor
+def inject_sync_seq():
+    """Exposed as a function so only base.html pays for the query."""
+    return dict(current_sync_seq=current_sync_seq)
+
+
+# --- FULL-TEXT SEARCH ---
+# One search_document row per searchable record, kept in step with the data by
+# record_change()/record_changes() (and the vault routes). Postgres indexes it
+# with a generated tsvector column and a GIN index; SQLite uses an FTS5
+# virtual table. Neither fits a regular model, so the table is created by
+# create_search_table() and skipped by autogenerate (see migrations/env.py).
+#
+# Which serialized fields (see SYNC_SERIALIZERS) are indexed as title and body
+SEARCH_FIELDS = {
+    "item": ("text", None),
+    "note": (None, "content"),
+    "event": ("title", None),
+    "meal": ("description", "notes"),
+    "vault": ("title", "content"),
+}
+# Documents are keyed by entity_id * 8 + code, which is also the FTS5 rowid
+SEARCH_ENTITY_CODES = {"item": 1, "note": 2, "event": 3, "meal": 4, "vault": 5}
+SEARCH_MAX_RESULTS = 50
+# Only the newest matches are ranked, which bounds the cost of very common
+# words. Document ids grow with the record ids, so newest = highest doc_id.
+SEARCH_RANK_CANDIDATES = 1000
+# Items of a tombstoned list stay indexed until the purge reaches them
+SEARCH_LIVE_PARENT = (
+    "(parent_id IS NULL OR parent_id NOT IN"
+    " (SELECT id FROM shopping_list WHERE deleted_at IS NOT NULL))"
+)
+SEARCH_SQL = {
+    "postgresql": {
+        "create": [
+            "CREATE TABLE IF NOT EXISTS search_document ("
+            " doc_id BIGINT PRIMARY KEY,"
+            " family_id INTEGER NOT NULL,"
+            " entity VARCHAR(20) NOT NULL,"
+            " entity_id INTEGER NOT NULL,"
+            " parent_id INTEGER,"
+            " title TEXT NOT NULL DEFAULT '',"
+            " body TEXT NOT NULL DEFAULT '',"
+            " search_vector TSVECTOR GENERATED ALWAYS AS ("
+            "  setweight(to_tsvector('simple', title), 'A') ||"
+            "  setweight(to_tsvector('simple', body), 'B')) STORED)",
+            "CREATE INDEX IF NOT EXISTS ix_search_document_search_vector"
+            " ON search_document USING GIN (search_vector)",
+            "CREATE INDEX IF NOT EXISTS ix_search_document_family_id"
+            " ON search_document (family_id)",
+        ],
+        # Unchanged documents (e.g. an item that was only ticked off) are not
+        # rewritten, so their tsvector and GIN entries are left alone
+        "upsert": [
+            "INSERT INTO search_document"
+            " (doc_id, family_id, entity, entity_id, parent_id, title, body)"
+            " VALUES (:doc_id, :family_id, :entity, :entity_id, :parent_id,"
+            " :title, :body)"
+            " ON CONFLICT (doc_id) DO UPDATE SET parent_id = excluded.parent_id,"
+            " title = excluded.title, body = excluded.body"
+            " WHERE (search_document.parent_id, search_document.title,"
+            " search_document.body) IS DISTINCT FROM"
+            " (excluded.parent_id, excluded.title, excluded.body)"
+        ],
+        "delete": "DELETE FROM search_document WHERE doc_id = :doc_id",
+        "search": "WITH candidates AS ("
+        " SELECT *, to_tsquery('simple', :query) AS query FROM search_document"
+        " WHERE family_id = :family_id"
+        " AND search_vector @@ to_tsquery('simple', :query)"
+        f" AND {SEARCH_LIVE_PARENT}"
+        " ORDER BY doc_id DESC LIMIT :candidates)"
+        " SELECT entity, entity_id, parent_id, title,"
+        " substr(body, 1, 160) AS snippet FROM candidates"
+        " ORDER BY ts_rank(search_vector, query) DESC, doc_id DESC"
+        " LIMIT :limit",
+    },
+    # The family is an indexed token ("f12") in the 'family' column, so the
+    # family filter is part of the MATCH instead of a per-row check. Queries
+    # are single words, so positions aren't stored (detail=column), and
+    # prefixes up to 6 letters have their own index for typeahead.
+    "sqlite": {
+        "create": [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_document USING fts5("
+            " title, body, family, entity UNINDEXED, entity_id UNINDEXED,"
+            " parent_id UNINDEXED, prefix='2 3 4 5 6', detail=column)"
+        ],
+        "upsert": [
+            "DELETE FROM search_document WHERE rowid = :doc_id",
+            "INSERT INTO search_document"
+            " (rowid, family, entity, entity_id, parent_id, title, body)"
+            " VALUES (:doc_id, 'f' || :family_id, :entity, :entity_id,"
+            " :parent_id, :title, :body)",
+        ],
+        "delete": "DELETE FROM search_document WHERE rowid = :doc_id",
+        # bm25() only works in the MATCH query itself, so the candidates are
+        # scored there and sorted outside
+        "search": "SELECT entity, entity_id, parent_id, title, snippet FROM ("
+        " SELECT entity, entity_id, parent_id, title,"
+        " substr(body, 1, 160) AS snippet,"
+        " bm25(search_document, 2.0, 1.0, 0.0) AS score"
+        " FROM search_document WHERE search_document MATCH :query"
+        f" AND {SEARCH_LIVE_PARENT}"
+        " ORDER BY rowid DESC LIMIT :candidates)"
+        " ORDER BY score LIMIT :limit",
+    },
+}
+# Where each kind of result is shown
+SEARCH_RESULT_PAGES = {
+    "note": "bulletin_board",
+    "event": "calendar_view",
+    "meal": "meal_planner",
+    "vault": "vault",
+}
+
+
+def _search_sql(name):
+    return SEARCH_SQL[db.engine.dialect.name][name]
+
+
+@event.listens_for(db.metadata, "after_create")
+def create_search_table(target, connection, **kw):
+    """Creates search_document along with the models' tables (db.create_all)."""
+    for statement in SEARCH_SQL[connection.dialect.name]["create"]:
+        connection.exec_driver_sql(statement)
+
+
+def _search_doc_id(entity, entity_id):
+    return entity_id * 8 + SEARCH_ENTITY_CODES[entity]
+
+
+def index_for_search(family_id, entity, records):
+    """
+    Adds or refreshes the documents for serialized records (dicts with the
+    fields in SEARCH_FIELDS). Runs in the caller's transaction.
+    """
+    title_field, body_field = SEARCH_FIELDS[entity]
+    rows = [
+        {
+            "doc_id": _search_doc_id(entity, record["id"]),
+            "family_id": family_id,
+            "entity": entity,
+            "entity_id": record["id"],
+            "parent_id": record.get("list_id"),
+            "title": (record.get(title_field) if title_field else None) or "",
+            "body": (record.get(body_field) if body_field else None) or "",
+        }
+        for record in records
+    ]
+    if rows:
+        for statement in _search_sql("upsert"):
+            db.session.execute(text(statement), rows)
+
+
+def remove_from_search(entity, entity_ids):
+    rows = [{"doc_id": _search_doc_id(entity, entity_id)} for entity_id in entity_ids]
+    if rows:
+        db.session.execute(text(_search_sql("delete")), rows)
+
+
+def search_family(family_id, terms, limit):
+    """
+    Ranked documents of one family matching every term, the last one as a
+    prefix so results follow typing ("milk eg" finds "Milk and eggs"), best
+    first among the newest SEARCH_RANK_CANDIDATES matches. Terms must be
+    plain words (\\w+).
+    """
+    *words, prefix = terms
+    if db.engine.dialect.name == "postgresql":
+        query = " & ".join(words + [f"{prefix}:*"])
+    else:
+        words = " ".join([f'"{word}"' for word in words] + [f'"{prefix}"*'])
+        query = f'family : "f{family_id}" AND {{title body}} : ({words})'
+    return db.session.execute(
+        text(_search_sql("search")),
+        {
+            "query": query,
+            "family_id": family_id,
+            "limit": limit,
+            "candidates": SEARCH_RANK_CANDIDATES,
+        },
+    ).all()
+
+
+def rebuild_search_index(family_id=None):
+    """Re-indexes every searchable record (of one family, or all of them)."""
+    # Columns are named like the serialized fields in SEARCH_FIELDS
+    sources = {
+        "item": (
+            select(ShoppingList.family_id, Item.id, Item.list_id, Item.text)
+            .join(ShoppingList)
+            .where(ShoppingList.deleted_at.is_(None)),
+            ShoppingList.family_id,
+        ),
+        "note": (select(Note.family_id, Note.id, Note.content), Note.family_id),
+        "event": (select(Event.family_id, Event.id, Event.title), Event.family_id),
+        "meal": (
+            select(Meal.family_id, Meal.id, Meal.description, Meal.notes),
+            Meal.family_id,
+        ),
+        "vault": (
+            select(
+                VaultEntry.family_id,
+                VaultEntry.id,
+                VaultEntry.title,
+                VaultEntry.content,
+            ),
+            VaultEntry.family_id,
+        ),
+    }
+
+    def index_batch(entity, batch):
+        by_family = {}
+        for record in batch:
+            by_family.setdefault(record["family_id"], []).append(record)
+        for batch_family_id, records in by_family.items():
+            index_for_search(batch_family_id, entity, records)
+
+    total = 0
+    for entity, (statement, family_column) in sources.items():
+        if family_id is not None:
+            statement = statement.where(family_column == family_id)
+        batch = []
+        for row in db.session.execute(statement.execution_options(yield_per=1000)):
+            batch.append(dict(row._mapping))
+            if len(batch) == 1000:
+                index_batch(entity, batch)
+                total += len(batch)
+                batch = []
+        index_batch(entity, batch)
+        total += len(batch)
+    db.session.commit()
+    return total
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Re-indexes all notes, items, events, meals and vault entries for search."""
+    print(f"Indexed {rebuild_search_index()} records.")
+
+
+# --- USER LOADER ---
+@login_manager.user_loader
+def load_user(user_id):
+    return User.query.get(int(user_id))
+
+
+# --- START: ADD THIS NEW DECORATOR ---
+def family_required(f):
+    """
+    Ensures a user has selected a family and is a member of it.
+    This decorator must be placed AFTER @login_required.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        family_id = session.get("current_family_id")
+        if not family_id:
+            flash(_("Please select a space to continue."), "info")
+            return redirect(url_for("families"))
+
+        family = Family.query.get(family_id)
+        if not family or current_user not in family.members:
+            session.pop("current_family_id", None)  # Clear invalid session data
+            flash(
+                _(
+                    "You are not a member of the selected space, or it no longer exists."
+                ),
+                "warning",
+            )
+            return redirect(url_for("families"))
+
+        # If all checks pass, inject the 'current_family' object into the route
+        return f(current_family=family, *args, **kwargs)
+
+    return decorated_function
+
+
+# --- END: ADD THIS NEW DECORATOR ---
+
+
+# ADD THIS NEW FUNCTION TO APP.PY
+
+# --- ADD THIS TO app.py ---
+
+
+def set_target_blank(attrs, new=False):
+    """Helper to force links to open in a new tab"""
+    attrs[(None, "target")] = "_blank"
+    attrs[(None, "rel")] = "noopener noreferrer"
+    return attrs
+
+
+@app.template_filter("linkify")
+def linkify_filter(text):
+    """Jinja filter to make links clickable in templates"""
+    if not text:
+        return ""
+    return bleach.linkify(text, callbacks=[set_target_blank])
+
+
+@app.context_processor
+def inject_today_date():
+    """Injects the current day of the month into all templates."""
+    from datetime import date
+
+    today = date.today()
+    return dict(current_day=today.day)
+
+
+@app.context_processor
+def inject_permissions():
+    """
+    Injects a global 'is_admin' variable into all templates.
+    It respects the 'view_as_member' toggle for testing purposes.
+    """
+    is_admin = False
+
+    # 1. Check if user is logged in and a family is selected
+    if current_user.is_authenticated:
+        current_family_id = session.get("current_family_id")
+        if current_family_id:
+            # We query the family here (or get it if you have it cached)
+            # Note: Family.query.get might be slightly heavy to do on every request,
+            # but for a family app it's totally fine.
+            family = Family.query.get(current_family_id)
+
+            if family and family.owner_id == current_user.id:
+                # User IS the owner...
+                # BUT check if they turned on "View as Member" mode
+                if not session.get("view_as_member"):
+                    is_admin = True
+
+    return dict(is_admin=is_admin)
+
+
+@app.route("/toggle_view_mode")
+@login_required
+def toggle_view_mode():
+    """Toggles the session flag to pretend to be a regular member."""
+    if session.get("view_as_member"):
+        session.pop("view_as_member")
+        flash("Exited Member View. You are Admin again.", "info")
+    else:
+        session["view_as_member"] = True
+        flash("Viewing as a regular Member.", "success")
+
+    # Redirect back to the page they were just on
+    return redirect(request.referrer or url_for("dashboard"))
+
+
+# --- START: ADD THIS NEW FUNCTION ---
+@app.context_processor
+def inject_app_config():
+    """Injects the app config into all templates."""
+    return dict(app=app)
+
+
+# --- END: ADD THIS NEW FUNCTION ---
+
+
+@app.route("/login", methods=["GET", "POST"])
+def login():
+    # This first redirect handles users who are already logged in
+    if current_user.is_authenticated:
+        return redirect(url_for("dashboard"))
+
+    if request.method == "POST":
+        username = request.form.get("username")
+        password = request.form.get("password")
+        user = User.query.filter_by(username=username).first()
+        if user and check_password(user.password_hash, password):
+            # Transparently upgrade hashes made with an outdated cost factor.
+            if password_needs_rehash(user.password_hash):
+                user.password_hash = hash_password(password)
+                db.session.commit()
+                password_hash_stats["rehashed"] += 1
+            login_user(user)
+            # This second redirect handles users who just successfully logged in
+            return redirect(url_for("dashboard"))
+        else:
+            flash(_("Invalid username or password"), "danger")
+            return render_template("login.html", username=username)
+
+    return render_template("login.html")
+
+
+@app.route("/register", methods=["GET", "POST"])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for("home"))
+    if request.method == "POST":
+        username = request.form.get("username")
+        password = request.form.get("password")
+        existing_user = User.query.filter_by(username=username).first()
+        if existing_user:
+            flash(_("Username already exists."), "warning")
+            return redirect(url_for("register"))
+        hashed_password = hash_password(password)
+        new_user = User(username=username, password_hash=hashed_password)
+        db.session.add(new_user)
+        db.session.commit()
+        flash(_("Registration successful! Please log in."), "success")
+        return redirect(url_for("login"))
+    return render_template("register.html")
+
+
+@app.route("/logout")
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for("login"))
+
+
+@app.route("/set_language/<lang>")
+def set_language(lang=None):
+    # Check if the selected language is one of our supported languages
+    if lang in app.config["LANGUAGES"]:
+        # Store the user's choice in the session
+        session["language"] = lang
+        # If the user is logged in, also save their preference to their profile
+        if current_user.is_authenticated:
+            current_user.language = lang
+            db.session.commit()
+            flash(_("Language updated!"), "success")
+
+    # Always redirect back to the settings page after changing the language.
+    return redirect(url_for("settings"))
+
+
+@app.route("/families")
+@login_required
+def families():
+    """Page to view all families and create a new one."""
+    return render_template(
+        "families.html", families=family_switcher_summary(current_user.id)
+    )
+
+
+@app.route("/families/create", methods=["POST"])
+@login_required
+def create_family():
+    """Process the form for creating a new family."""
+    family_name = request.form.get("family_name")
+    if family_name:
         # Create the new family
         new_family = Family(name=family_name, owner=current_user)
         # The creator automatically becomes a member
@@ -551,18 +1782,328 @@ def create_family():
         return redirect(url_for("families"))
 
 
-@app.route("/families/select/<int:family_id>")
+@app.route("/families/select/<int:family_id>")
+@login_required
+def select_family(family_id):
+    """
+    Selects a family to be the active one in the session, then goes to
+    ?next= (the same page in the new space) or the dashboard.
+    """
+    is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    # Security check: make sure the user is actually a member of this family
+    if is_family_member(current_user.id, family_id):
+        session["current_family_id"] = family_id
+        next_url = request.args.get("next", "")
+        if not next_url.startswith("/") or next_url.startswith("//"):
+            next_url = url_for("dashboard")
+        if is_ajax:
+            return jsonify({"success": True, "redirect": next_url})
+        return redirect(next_url)
+    else:
+        message = _("You are not a member of that family.")
+        if is_ajax:
+            return jsonify({"success": False, "message": message}), 403
+        flash(message, "danger")
+        return redirect(url_for("families"))
+
+
+# --- FAMILY SWITCHER ---
+
+
+def is_family_member(user_id, family_id):
+    """One primary-key lookup in family_members; loads neither side."""
+    membership = db.session.execute(
+        select(family_members.c.family_id).where(
+            family_members.c.user_id == user_id,
+            family_members.c.family_id == family_id,
+        )
+    ).first()
+    return membership is not None
+
+
+def _days_between(start, day):
+    """SQL for the number of days from the date column start to day."""
+    if db.engine.dialect.name == "postgresql":
+        return day - start  # date - date is an integer there
+    return db.cast(func.julianday(day) - func.julianday(start), db.Integer)
+
+
+def event_occurs_on(day):
+    """
+    SQL condition: the event, or one occurrence of its series, falls on day.
+    Matches the rrule expansion in calendar_view (a monthly series skips
+    months without its day, a yearly one on Feb 29 only hits leap years).
+    """
+    interval = func.coalesce(func.nullif(Event.recurrence_interval, 0), 1)
+    days = _days_between(Event.date, day)
+    start_year = db.extract("year", Event.date)
+    start_month = db.extract("month", Event.date)
+    same_day = db.extract("day", Event.date) == day.day
+    recurrence_type = func.coalesce(Event.recurrence_type, "none")
+    return db.or_(
+        db.and_(recurrence_type == "none", Event.date == day),
+        db.and_(
+            Event.date <= day,
+            db.or_(
+                Event.recurrence_end_date.is_(None),
+                Event.recurrence_end_date >= day,
+            ),
+            db.or_(
+                db.and_(recurrence_type == "daily", days % interval == 0),
+                db.and_(recurrence_type == "weekly", days % (7 * interval) == 0),
+                db.and_(
+                    recurrence_type == "monthly",
+                    same_day,
+                    ((day.year - start_year) * 12 + day.month - start_month) % interval
+                    == 0,
+                ),
+                db.and_(
+                    recurrence_type == "yearly",
+                    start_month == day.month,
+                    same_day,
+                    (day.year - start_year) % interval == 0,
+                ),
+            ),
+        ),
+    )
+
+
+def family_switcher_summary(user_id):
+    """
+    Every family the user belongs to, with its member count, open items,
+    today's events and unread changes, in a single query (the counts are
+    correlated subqueries on indexed columns or denormalized counters).
+    """
+    members = family_members.alias("members")
+    member_count = (
+        select(func.count())
+        .select_from(members)
+        .where(members.c.family_id == Family.id)
+        .correlate(Family)
+        .scalar_subquery()
+    )
+    open_items = (
+        select(
+            func.coalesce(
+                func.sum(ShoppingList.item_count - ShoppingList.done_count), 0
+            )
+        )
+        .where(ShoppingList.family_id == Family.id, ShoppingList.deleted_at.is_(None))
+        .correlate(Family)
+        .scalar_subquery()
+    )
+    events_today = (
+        select(func.count())
+        .select_from(Event)
+        .where(Event.family_id == Family.id, event_occurs_on(date.today()))
+        .correlate(Family)
+        .scalar_subquery()
+    )
+    # As unread_counts(), summed over the features
+    unread = (
+        select(
+            func.coalesce(
+                func.sum(
+                    FamilyRevision.changes - func.coalesce(FeatureWatermark.seen, 0)
+                ),
+                0,
+            )
+        )
+        .select_from(FamilyRevision)
+        .outerjoin(
+            FeatureWatermark,
+            db.and_(
+                FeatureWatermark.user_id == user_id,
+                FeatureWatermark.family_id == FamilyRevision.family_id,
+                FeatureWatermark.feature == FamilyRevision.feature,
+            ),
+        )
+        .where(
+            FamilyRevision.family_id == Family.id,
+            FamilyRevision.feature.in_(UNREAD_FEATURES),
+        )
+        .correlate(Family)
+        .scalar_subquery()
+    )
+    rows = db.session.execute(
+        select(
+            Family.id,
+            Family.name,
+            Family.owner_id,
+            member_count.label("member_count"),
+            open_items.label("open_items"),
+            events_today.label("events_today"),
+            unread.label("unread"),
+        )
+        .join(family_members, family_members.c.family_id == Family.id)
+        .where(family_members.c.user_id == user_id)
+        .order_by(Family.name, Family.id)
+    )
+    current_family_id = session.get("current_family_id")
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "is_owner": row.owner_id == user_id,
+            "is_current": row.id == current_family_id,
+            "member_count": row.member_count,
+            "open_items": row.open_items,
+            "events_today": row.events_today,
+            "unread": row.unread,
+        }
+        for row in rows
+    ]
+
+
+@app.route("/api/families")
+@login_required
+def api_families():
+    """The family switcher: the user's families with a summary of each."""
+    return jsonify(
+        {"success": True, "families": family_switcher_summary(current_user.id)}
+    )
+
+
+# --- TODAY DIGEST ---
+# What the home screen shows for today, in one request. Each section is one
+# query, cached per family under the revision of its feature, so once built a
+# digest costs the single query that reads the revisions (and the member's
+# unread counts with them), plus one for the unread pinned notes when the
+# bulletin has unread changes; a write only rebuilds the section it touched.
+# Home screens refetch when unread_changed announces a change to one of them.
+TODAY_CACHE_SIZE = 256  # Families
+MEAL_DAYS = (  # Meal.day, by date.weekday()
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+_today_sections = OrderedDict()  # family_id -> {feature: (key, data)}, LRU first
+
+
+def _today_events(family_id, today):
+    events = Event.query.filter(
+        Event.family_id == family_id, event_occurs_on(today)
+    ).order_by(Event.time.isnot(None), Event.time, Event.id)
+    return [SYNC_SERIALIZERS["event"](event) for event in events]
+
+
+def _today_meals(family_id, today):
+    meals = Meal.query.filter_by(
+        family_id=family_id,
+        week_of=today - timedelta(days=today.weekday()),
+        day=MEAL_DAYS[today.weekday()],
+    )
+    return [
+        {"id": meal.id, "meal_type": meal.meal_type, "description": meal.description}
+        for meal in meals
+    ]
+
+
+def _today_chores(family_id, today):
+    """Every member's open assignments of the week; filtered per member later."""
+    rows = db.session.execute(
+        select(
+            ChoreAssignment.id,
+            ChoreAssignment.user_id,
+            Chore.name,
+            Chore.points,
+        )
+        .join(Chore, Chore.id == ChoreAssignment.chore_id)
+        .where(
+            ChoreAssignment.family_id == family_id,
+            ChoreAssignment.week_of == today - timedelta(days=today.weekday()),
+            ChoreAssignment.is_complete.is_(False),
+        )
+        .order_by(Chore.name)
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def _today_notes(family_id, today):
+    """Pinned notes, newest first."""
+    pinned = Note.query.filter_by(family_id=family_id, is_pinned=True).order_by(
+        Note.timestamp.desc()
+    )
+    return [SYNC_SERIALIZERS["note"](note) for note in pinned]
+
+
+TODAY_SECTIONS = {
+    "calendar": _today_events,
+    "meals": _today_meals,
+    "chores": _today_chores,
+    "bulletin": _today_notes,
+}
+
+
+def today_digest(user_id, family_id):
+    """
+    Today's events and meals, the member's open chores for the week and the
+    pinned notes among their unread note changes (by other members).
+    """
+    today = date.today()
+    revisions, unread = {}, {}
+    for feature, revision, count in feature_counters(
+        user_id, family_id, list(TODAY_SECTIONS)
+    ):
+        revisions[feature], unread[feature] = revision, count
+
+    cached = _today_sections.setdefault(family_id, {})
+    _today_sections.move_to_end(family_id)
+    while len(_today_sections) > TODAY_CACHE_SIZE:
+        _today_sections.popitem(last=False)
+    sections = {}
+    for feature, build in TODAY_SECTIONS.items():
+        key = (revisions.get(feature), today)
+        if feature not in cached or cached[feature][0] != key:
+            cached[feature] = (key, build(family_id, today))
+        sections[feature] = cached[feature][1]
+
+    # Other members' pinned notes changed since the member's bulletin watermark
+    notes = [note for note in sections["bulletin"] if note["author_id"] != user_id]
+    if notes and unread.get("bulletin", 0) > 0:
+        seen_change_id = (
+            select(FeatureWatermark.seen_change_id)
+            .where(
+                FeatureWatermark.user_id == user_id,
+                FeatureWatermark.family_id == family_id,
+                FeatureWatermark.feature == "bulletin",
+            )
+            .scalar_subquery()
+        )
+        unread_notes = set(
+            db.session.scalars(
+                select(ChangeLog.entity_id).where(
+                    ChangeLog.family_id == family_id,
+                    ChangeLog.id > func.coalesce(seen_change_id, 0),
+                    ChangeLog.entity == "note",
+                    ChangeLog.op == "upsert",
+                    ChangeLog.entity_id.in_([note["id"] for note in notes]),
+                )
+            )
+        )
+    else:
+        unread_notes = set()
+    return {
+        "date": today.isoformat(),
+        "events": sections["calendar"],
+        "meals": sections["meals"],
+        "chores": [
+            chore for chore in sections["chores"] if chore["user_id"] == user_id
+        ],
+        "notes": [note for note in notes if note["id"] in unread_notes],
+    }
+
+
+@app.route("/api/today")
 @login_required
-def select_family(family_id):
-    """Selects a family to be the active one in the session."""
-    family = Family.query.get(family_id)
-    # Security check: make sure the user is actually a member of this family
-    if family and current_user in family.members:
-        session["current_family_id"] = family.id
-        return redirect(url_for("dashboard"))
-    else:
-        flash(_("You are not a member of that family."), "danger")
-        return redirect(url_for("families"))
+@family_required
+def api_today(current_family):
+    """The home screen digest; see today_digest()."""
+    return jsonify(today_digest(current_user.id, current_family.id))
 
 
 # --- CORE APP ROUTES (Home, Lists, etc.) ---
@@ -621,6 +2162,13 @@ def dashboard():
         flash(_("The family you had selected is no longer available."), "warning")
         return redirect(url_for("families"))
 
+    return dashboard_page(current_family=current_family)
+
+
+# The dashboard checks the family itself (see above), so it has no
+# @family_required, only the conditional answer
+@conditional_page("lists")
+def dashboard_page(current_family):
     # The dashboard will now focus only on lists.
     # The family object itself contains the lists via its relationship.
     return render_template("dashboard.html", current_family=current_family)
@@ -629,29 +2177,132 @@ def dashboard():
 # ADD THIS NEW FUNCTION TO APP.PY
 
 
+INVITE_SUGGESTIONS_LIMIT = 10
+INVITE_SUGGESTIONS_MAX = 25
+
+
+def inviteable_users_query(family_id, prefix, limit):
+    """
+    Usernames starting with prefix (case-insensitive) of users who are not
+    members of the family yet, alphabetically. Walks the lower(username)
+    index from the prefix, so the cost depends on the limit rather than on
+    the number of users.
+    """
+    prefix = prefix.lower()
+    lowered = func.lower(User.username)
+    if db.engine.dialect.name == "postgresql":
+        escaped = re.sub(r"([\\%_])", r"\\\1", prefix)
+        matches_prefix = lowered.like(f"{escaped}%", escape="\\")
+    else:
+        # SQLite only uses an expression index for comparisons, not for LIKE
+        upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        matches_prefix = db.and_(lowered >= prefix, lowered < upper_bound)
+    is_member = (
+        select(family_members.c.user_id)
+        .where(
+            family_members.c.family_id == family_id,
+            family_members.c.user_id == User.id,
+        )
+        .exists()
+    )
+    return (
+        select(User.username)
+        .where(matches_prefix, ~is_member)
+        .order_by(lowered)
+        .limit(limit)
+    )
+
+
 @app.route("/api/inviteable_users")
 @login_required
-def get_inviteable_users():
-    """API endpoint to get a fresh list of users who can be invited."""
-    current_family_id = session.get("current_family_id")
-    if not current_family_id:
-        return jsonify({"error": "No family selected"}), 400
+@family_required
+def get_inviteable_users(current_family):
+    """
+    Typeahead for the invite form: users who can be invited and whose name
+    starts with ?prefix=, at most ?limit= of them.
+    """
+    prefix = request.args.get("prefix", "").strip()
+    limit = min(
+        max(request.args.get("limit", INVITE_SUGGESTIONS_LIMIT, type=int), 1),
+        INVITE_SUGGESTIONS_MAX,
+    )
+    if not prefix:
+        return jsonify([])
 
-    current_family = Family.query.get(current_family_id)
+    usernames = db.session.scalars(
+        inviteable_users_query(current_family.id, prefix, limit)
+    )
+    return jsonify([{"username": username} for username in usernames])
+
+
+# --- LIST PURGE ---
+# Deleting a list with more items than this would hold the request (and the
+# rows' locks) for too long: it is tombstoned (ShoppingList.deleted_at) and
+# its items are deleted this many at a time in the background.
+LIST_PURGE_BATCH_SIZE = 1000
+_list_purger = None
 
-    existing_member_ids = [member.id for member in current_family.members]
 
-    users = (
-        User.query.filter(
-            User.id != current_user.id, User.id.notin_(existing_member_ids)
+def purge_list_batch(list_id):
+    """
+    Deletes one batch of a tombstoned list's items, or the list itself once
+    they are gone. Returns False when the list has been deleted.
+    """
+    item_ids = db.session.scalars(
+        select(Item.id).where(Item.list_id == list_id).limit(LIST_PURGE_BATCH_SIZE)
+    ).all()
+    if item_ids:
+        remove_from_search("item", item_ids)
+        db.session.execute(
+            delete(Item).where(Item.id.in_(item_ids)),
+            execution_options={"synchronize_session": False},
         )
-        .order_by(User.username)
-        .all()
-    )
+    else:
+        db.session.execute(
+            delete(ShoppingList).where(ShoppingList.id == list_id),
+            execution_options={"synchronize_session": False},
+        )
+    db.session.commit()
+    return bool(item_ids)
 
-    user_list = [{"username": user.username} for user in users]
 
-    return jsonify(user_list)
+def purge_deleted_lists():
+    """Deletes every tombstoned list, yielding to other greenlets between batches."""
+    purged = 0
+    while True:
+        list_id = db.session.scalar(
+            select(ShoppingList.id).where(ShoppingList.deleted_at.isnot(None)).limit(1)
+        )
+        if list_id is None:
+            return purged
+        while purge_list_batch(list_id):
+            socketio.sleep(0)
+        purged += 1
+
+
+def run_list_purge():
+    """Background task: see purge_deleted_lists()."""
+    global _list_purger
+    with app.app_context():
+        try:
+            purge_deleted_lists()
+        except Exception as e:
+            print(f"List purge failed: {e}")
+        finally:
+            _list_purger = None
+
+
+def schedule_list_purge():
+    """Starts the purge task unless it is already running. Call after the commit."""
+    global _list_purger
+    if _list_purger is None:
+        _list_purger = socketio.start_background_task(run_list_purge)
+
+
+@app.cli.command("purge-deleted-lists")
+def purge_deleted_lists_command():
+    """Finishes purging deleted lists (e.g. after a restart interrupted it)."""
+    print(f"Purged {purge_deleted_lists()} lists.")
 
 
 # --- REPLACE ALL OLD LIST ROUTES (/create_list, /delete_list, /add, /delete, /toggle, /share) WITH THESE ---
@@ -697,6 +2348,9 @@ def invite_user():
         flash(message, "info")
     else:
         family.members.append(user_to_invite)
+        bump_revision(family.id, "family")
+        # Start the new member with everything read
+        mark_features_seen(user_to_invite.id, family.id, UNREAD_FEATURES)
         db.session.commit()
         # <--- TRANSLATED
         message = _(
@@ -723,6 +2377,7 @@ def create_list():
     if new_list_name:
         new_list = ShoppingList(name=new_list_name, family_id=family.id)
         db.session.add(new_list)
+        seq = record_change(family.id, "list", new_list)
         db.session.commit()
 
         # --- START: THE FIX ---
@@ -746,7 +2401,7 @@ def create_list():
         # Emit the new card HTML to ALL users in the family's room
         socketio.emit(
             "list_added",
-            {"card_html": new_card_html, "list_id": new_list.id},
+            {"card_html": new_card_html, "list_id": new_list.id, "seq": seq},
             room=f"family_room_{family.id}",
         )
 
@@ -770,14 +2425,35 @@ def delete_list():
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
 
     # Security check: User must be the owner of the family the list belongs to
-    if list_to_delete and list_to_delete.family.owner == current_user:
+    if (
+        list_to_delete
+        and list_to_delete.deleted_at is None
+        and list_to_delete.family.owner == current_user
+    ):
         family_id = list_to_delete.family.id  # Get the family_id before deleting
-        db.session.delete(list_to_delete)
+        # Clients drop a deleted list's items along with it
+        seq = record_change(family_id, "list", list_to_delete.id, op="delete")
+        tombstoned = list_to_delete.item_count > LIST_PURGE_BATCH_SIZE
+        if tombstoned:
+            list_to_delete.deleted_at = datetime.utcnow()
+        else:
+            # The items go with the list (ON DELETE CASCADE) without loading them
+            remove_from_search(
+                "item",
+                db.session.scalars(
+                    select(Item.id).where(Item.list_id == list_to_delete.id)
+                ).all(),
+            )
+            db.session.delete(list_to_delete)
         db.session.commit()
+        if tombstoned:
+            schedule_list_purge()
 
         # Broadcast the deletion to everyone in the family's room
         socketio.emit(
-            "list_deleted", {"list_id": int(list_id)}, room=f"family_room_{family_id}"
+            "list_deleted",
+            {"list_id": int(list_id), "seq": seq},
+            room=f"family_room_{family_id}",
         )
 
         if is_ajax:
@@ -793,44 +2469,175 @@ def delete_list():
         return redirect(url_for("dashboard"))
 
 
+def adjust_item_counters(list_id, total=0, done=0):
+    """
+    Applies deltas to a list's item_count/done_count in SQL ("count + n"), so
+    concurrent writers can't overwrite each other. Call it before the commit
+    of the item write it describes.
+    """
+    db.session.execute(
+        update(ShoppingList)
+        .where(ShoppingList.id == list_id)
+        .values(
+            item_count=ShoppingList.item_count + total,
+            done_count=ShoppingList.done_count + done,
+        )
+    )
+
+
+# --- ITEM ORDER ---
+# Items are ranked with gaps of ITEM_POSITION_STEP, so moving one item only
+# rewrites its own position (the midpoint of its new neighbours). The list is
+# renumbered only when two neighbours have no gap left.
+ITEM_POSITION_STEP = 1024
+ITEMS_PAGE_SIZE = 200
+
+
+def next_item_position(list_id):
+    """The rank after the last item of the list, where new items go."""
+    last = (
+        db.session.query(func.max(Item.position))
+        .filter(Item.list_id == list_id)
+        .scalar()
+    )
+    return (last or 0) + ITEM_POSITION_STEP
+
+
+def position_between(before, after):
+    """
+    A rank strictly between two neighbours' ranks (None = that end of the
+    list), or None if they have no gap left.
+    """
+    if before is None and after is None:
+        return ITEM_POSITION_STEP
+    if before is None:
+        return after - ITEM_POSITION_STEP
+    if after is None:
+        return before + ITEM_POSITION_STEP
+    if after - before < 2:
+        return None
+    return (before + after) // 2
+
+
+def renumber_item_positions(list_id):
+    """Spreads a list's ranks out again, keeping the order. Returns {id: position}."""
+    item_ids = db.session.scalars(
+        select(Item.id)
+        .where(Item.list_id == list_id)
+        .order_by(Item.done, Item.position, Item.id)
+    ).all()
+    positions = {
+        item_id: (n + 1) * ITEM_POSITION_STEP for n, item_id in enumerate(item_ids)
+    }
+    db.session.execute(
+        update(Item),
+        [{"id": item_id, "position": pos} for item_id, pos in positions.items()],
+    )
+    return positions
+
+
+def parse_item_cursor(value):
+    """'<done>:<position>:<id>' (see item_page) -> a tuple, or None."""
+    try:
+        done, position, item_id = value.split(":")
+        return (done == "1", int(position), int(item_id))
+    except (AttributeError, ValueError):
+        return None
+
+
+def item_page(list_id, after=None, limit=ITEMS_PAGE_SIZE):
+    """
+    One page of a list's items in display order, serialized, plus the cursor
+    of the next page (None on the last one). Keyset pagination on
+    (done, position, id), which ix_item_list_id_done_position serves directly.
+    """
+    query = Item.query.filter(Item.list_id == list_id)
+    if after:
+        query = query.filter(tuple_(Item.done, Item.position, Item.id) > after)
+    items = query.order_by(Item.done, Item.position, Item.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = f"{int(last.done)}:{last.position}:{last.id}"
+    return [serialize_item(item) for item in items], next_cursor
+
+
+# Shared by the HTTP routes below and the socket handlers further down, so
+# both paths make the same writes and broadcasts.
+def live_item(item_id):
+    """The item, unless its list has been deleted (and is being purged)."""
+    return (
+        Item.query.join(ShoppingList)
+        .filter(Item.id == item_id, ShoppingList.deleted_at.is_(None))
+        .first()
+    )
+
+
+def create_item(target_list, text, author_id):
+    """Adds an item, broadcasts it, and returns it in serialize_item form."""
+    new_item = Item(
+        text=text,
+        list_id=target_list.id,
+        author_id=author_id,
+        position=next_item_position(target_list.id),
+        created_at=datetime.utcnow(),
+    )
+    db.session.add(new_item)
+    adjust_item_counters(target_list.id, total=1)
+    seq = record_change(target_list.family_id, "item", new_item)
+    # Read before the commit expires the object
+    item_data = serialize_item(new_item)
+    db.session.commit()
+
+    socketio.emit(
+        "item_added",
+        {"list_id": target_list.id, "item": item_data, "seq": seq},
+        room=list_room(target_list.family_id, target_list.id),
+    )
+    return item_data
+
+
+def rename_item(item, family_id, new_text):
+    item.text = new_text
+    seq = record_change(family_id, "item", item)
+    list_id, item_id = item.list_id, item.id
+    db.session.commit()
+
+    # Broadcast the change to everyone viewing the list
+    socketio.emit(
+        "item_edited",
+        {"list_id": list_id, "item_id": item_id, "new_text": new_text, "seq": seq},
+        room=list_room(family_id, list_id),
+    )
+
+
+def remove_item(item, family_id):
+    list_id, item_id = item.list_id, item.id
+    adjust_item_counters(list_id, total=-1, done=-1 if item.done else 0)
+    seq = record_change(family_id, "item", item_id, op="delete")
+    db.session.delete(item)
+    db.session.commit()
+
+    socketio.emit(
+        "item_deleted",
+        {"list_id": list_id, "item_id": item_id, "seq": seq},
+        room=list_room(family_id, list_id),
+    )
+
+
 @app.route("/add_item", methods=["POST"])
 @login_required
 def add_item():
     list_id = request.form.get("list_id")
     item_text = request.form.get("item")
-    target_list = ShoppingList.query.get(list_id)
+    target_list = ShoppingList.query.filter_by(id=list_id, deleted_at=None).first()
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
 
     # Security check: User must be a member of the family that owns the list
     if target_list and item_text and current_user in target_list.family.members:
-        new_item = Item(
-            text=item_text, list_id=target_list.id, author_id=current_user.id
-        )
-        db.session.add(new_item)
-        db.session.commit()
-
-        item_data = {
-            "id": new_item.id,
-            "text": new_item.text,
-            "done": new_item.done,
-            "author": {"username": new_item.author.username},
-            "raw_timestamp": new_item.created_at.isoformat(),
-        }
-        socketio.emit(
-            "item_added",
-            {"list_id": target_list.id, "item": item_data},
-            room=f"list_{target_list.id}",
-        )
-
-        # --- START: ADD THIS NEW BLOCK ---
-        # This sends a separate, simple notification to the whole family.
-        socketio.emit(
-            "new_activity",
-            {"feature": "dashboard", "timestamp": new_item.created_at.isoformat()},
-            room=f"family_room_{target_list.family.id}",
-        )
-        # --- END: ADD THIS NEW BLOCK ---
-
+        item_data = create_item(target_list, item_text, current_user.id)
         if is_ajax:
             return jsonify({"success": True, "item": item_data})
 
@@ -841,20 +2648,12 @@ def add_item():
 @login_required
 def delete_item():
     item_id = request.form.get("item_to_delete")
-    item_to_delete = Item.query.get(item_id)
+    item_to_delete = live_item(item_id)
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
 
     # Security check: User must be a member of the family
     if item_to_delete and current_user in item_to_delete.list.family.members:
-        list_id = item_to_delete.list.id
-        db.session.delete(item_to_delete)
-        db.session.commit()
-
-        socketio.emit(
-            "item_deleted",
-            {"list_id": list_id, "item_id": item_id},
-            room=f"list_{list_id}",
-        )
+        remove_item(item_to_delete, item_to_delete.list.family_id)
 
         if is_ajax:
             return jsonify({"success": True})
@@ -872,27 +2671,15 @@ def edit_item():
     new_text = request.form.get(
         "new_text", ""
     ).strip()  # Use .strip() to remove whitespace
-    item_to_edit = Item.query.get(item_id)
+    item_to_edit = live_item(item_id)
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
 
     # Security check: User must be a member of the family that owns the list
     if item_to_edit and new_text and current_user in item_to_edit.list.family.members:
-        item_to_edit.text = new_text
-        db.session.commit()
-
-        # Broadcast the change to everyone in the list's room
-        socketio.emit(
-            "item_edited",
-            {
-                "list_id": item_to_edit.list.id,
-                "item_id": item_to_edit.id,
-                "new_text": item_to_edit.text,
-            },
-            room=f"list_{item_to_edit.list.id}",
-        )
+        rename_item(item_to_edit, item_to_edit.list.family_id, new_text)
 
         if is_ajax:
-            return jsonify({"success": True, "new_text": item_to_edit.text})
+            return jsonify({"success": True, "new_text": new_text})
 
     # Handle error case for AJAX
     if is_ajax:
@@ -903,16 +2690,547 @@ def edit_item():
             400,
         )
 
-    return redirect(url_for("home"))
+    return redirect(url_for("home"))
+
+
+# --- BULK LIST OPERATIONS ---
+# Each one is a single set-based statement on the items, one counter update,
+# one change-log insert and one 'items_bulk_changed' broadcast.
+BULK_ADD_MAX_ITEMS = 100
+
+
+def emit_items_bulk_changed(shopping_list, seq, added=(), updated=(), deleted=()):
+    socketio.emit(
+        "items_bulk_changed",
+        {
+            "list_id": shopping_list.id,
+            "added": list(added),
+            "updated": list(updated),
+            "deleted": list(deleted),
+            "seq": seq,
+        },
+        room=list_room(shopping_list.family_id, shopping_list.id),
+    )
+
+
+def bulk_list_response(shopping_list, message=None, status=200, **data):
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        if message:
+            data["message"] = message
+        return jsonify({"success": status == 200, **data}), status
+    if message:
+        flash(message, "success" if status == 200 else "warning")
+    return redirect(url_for("view_list", list_id=shopping_list.id))
+
+
+@app.route("/list/<int:list_id>/add_items", methods=["POST"])
+@login_required
+@family_required
+def add_items(current_family, list_id):
+    """Adds one item per non-empty line of the 'items' field."""
+    target_list = ShoppingList.query.filter_by(
+        id=list_id, family_id=current_family.id, deleted_at=None
+    ).first_or_404()
+    texts = [line.strip()[:200] for line in request.form.get("items", "").splitlines()]
+    texts = [text for text in texts if text][:BULK_ADD_MAX_ITEMS]
+    if not texts:
+        return bulk_list_response(target_list, _("Enter at least one item."), 400)
+
+    now = datetime.utcnow()
+    first_position = next_item_position(target_list.id)
+    new_items = db.session.scalars(
+        insert(Item).returning(Item, sort_by_parameter_order=True),
+        [
+            dict(
+                text=text,
+                list_id=target_list.id,
+                author_id=current_user.id,
+                done=False,
+                position=first_position + n * ITEM_POSITION_STEP,
+                created_at=now,
+            )
+            for n, text in enumerate(texts)
+        ],
+    ).all()
+    added = [serialize_item(item) for item in new_items]
+    adjust_item_counters(target_list.id, total=len(added))
+    seq = record_changes(
+        current_family.id, "item", [(data["id"], "upsert", data) for data in added]
+    )
+    db.session.commit()
+
+    emit_items_bulk_changed(target_list, seq, added=added)
+    return bulk_list_response(target_list, items=added)
+
+
+@app.route("/list/<int:list_id>/toggle_all", methods=["POST"])
+@login_required
+@family_required
+def toggle_all_items(current_family, list_id):
+    """
+    Marks every item done (or, with done=0, not done). Without a 'done'
+    field it checks everything off, or unchecks everything if all are done.
+    """
+    target_list = ShoppingList.query.filter_by(
+        id=list_id, family_id=current_family.id, deleted_at=None
+    ).first_or_404()
+    if request.form.get("done") in (None, ""):
+        done = target_list.done_count < target_list.item_count
+    else:
+        done = request.form.get("done") in ("1", "true", "on")
+
+    changed_items = db.session.scalars(
+        update(Item)
+        .where(Item.list_id == target_list.id, Item.done != done)
+        .values(done=done)
+        .returning(Item)
+        .execution_options(synchronize_session=False)
+    ).all()
+    updated = [serialize_item(item) for item in changed_items]
+    adjust_item_counters(target_list.id, done=len(updated) if done else -len(updated))
+    seq = record_changes(
+        current_family.id, "item", [(data["id"], "upsert", data) for data in updated]
+    )
+    db.session.commit()
+
+    if updated:
+        emit_items_bulk_changed(target_list, seq, updated=updated)
+    return bulk_list_response(target_list, done=done, count=len(updated))
+
+
+@app.route("/list/<int:list_id>/clear_completed", methods=["POST"])
+@login_required
+@family_required
+def clear_completed_items(current_family, list_id):
+    target_list = ShoppingList.query.filter_by(
+        id=list_id, family_id=current_family.id, deleted_at=None
+    ).first_or_404()
+    deleted_ids = db.session.scalars(
+        delete(Item)
+        .where(Item.list_id == target_list.id, Item.done.is_(True))
+        .returning(Item.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    adjust_item_counters(
+        target_list.id, total=-len(deleted_ids), done=-len(deleted_ids)
+    )
+    seq = record_changes(
+        current_family.id,
+        "item",
+        [(item_id, "delete", None) for item_id in deleted_ids],
+    )
+    db.session.commit()
+
+    if deleted_ids:
+        emit_items_bulk_changed(target_list, seq, deleted=deleted_ids)
+    return bulk_list_response(target_list, count=len(deleted_ids))
+
+
+# --- DELTA SYNC API ---
+
+
+@app.route("/api/sync")
+@login_required
+@family_required
+def api_sync(current_family):
+    """
+    Returns what changed in the family since sequence number `since`.
+    Several changes to the same entity are collapsed into the latest one.
+    A client whose `since` predates the last compaction (or that is too far
+    behind) gets a snapshot of the current state instead, with snapshot=true.
+    Deleting a list or chore also removes its items or assignments.
+    """
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid 'since' value"}), 400
+
+    latest = latest_change_seq(current_family.id)
+    compacted_through = (
+        db.session.query(func.max(ChangeLog.id))
+        .filter(ChangeLog.family_id == current_family.id, ChangeLog.op == "snapshot")
+        .scalar()
+        or 0
+    )
+
+    entries = []
+    needs_snapshot = since < compacted_through or (since == 0 and latest > 0)
+    if not needs_snapshot:
+        entries = (
+            ChangeLog.query.filter(
+                ChangeLog.family_id == current_family.id, ChangeLog.id > since
+            )
+            .order_by(ChangeLog.id)
+            .limit(CHANGELOG_MAX_DELTA + 1)
+            .all()
+        )
+        needs_snapshot = len(entries) > CHANGELOG_MAX_DELTA
+
+    if needs_snapshot:
+        return jsonify(
+            {
+                "seq": latest,
+                "snapshot": True,
+                "changes": build_family_snapshot(current_family.id),
+            }
+        )
+
+    # Keep only the newest entry per entity, in sequence order
+    newest = {}
+    for entry in entries:
+        newest.pop((entry.entity, entry.entity_id), None)
+        newest[(entry.entity, entry.entity_id)] = entry
+    changes = [serialize_change(entry) for entry in newest.values()]
+    return jsonify({"seq": latest, "snapshot": False, "changes": changes})
+
+
+# --- SEARCH API ---
+
+
+@app.route("/api/search")
+@login_required
+@family_required
+def api_search(current_family):
+    """
+    Ranked full-text search over the family's notes, list items, events,
+    meals and vault entries: /api/search?q=milk&limit=20
+    """
+    query = request.args.get("q", "").strip()
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), SEARCH_MAX_RESULTS)
+    except ValueError:
+        limit = 20
+    # Plain words only, so nothing in q is read as query syntax. One-letter
+    # prefixes would match most of the index.
+    terms = [term for term in re.findall(r"\w+", query.lower()) if len(term) > 1]
+    if not terms:
+        return jsonify({"query": query, "results": []})
+
+    results = []
+    for row in search_family(current_family.id, terms[:8], limit):
+        if row.entity == "item":
+            url = url_for("view_list", list_id=row.parent_id)
+        else:
+            url = url_for(SEARCH_RESULT_PAGES[row.entity])
+        results.append(
+            {
+                "entity": row.entity,
+                "id": row.entity_id,
+                "title": row.title,
+                "snippet": row.snippet,
+                "url": url,
+            }
+        )
+    return jsonify({"query": query, "results": results})
+
+
+# --- BATCH MUTATION API ---
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+BATCH_MAX_OPERATIONS = 100
+_last_idempotency_prune = {"at": None}
+
+
+class BatchOperationError(Exception):
+    """Raised by a batch operation to reject it; only that operation is undone."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class BatchContext:
+    """
+    Everything the operations of one batch share: the family (authorized once
+    by @family_required), rows prefetched in bulk, and the changes to broadcast.
+    """
+
+    def __init__(self, current_family, operations):
+        self.family = current_family
+        self.is_admin = current_family.owner_id == current_user.id
+        self.changes = []
+
+        def ids_for(*names, field):
+            return {
+                int(operation["args"][field])
+                for operation in operations
+                if operation["op"] in names
+                and str(operation["args"].get(field, "")).isdigit()
+            }
+
+        # One query per table instead of one lookup per operation. Anything
+        # outside this family simply isn't found.
+        list_ids = ids_for("add_item", field="list_id")
+        item_ids = ids_for("edit_item", "delete_item", "set_item_done", field="item_id")
+        note_ids = ids_for("delete_note", "pin_note", field="note_id")
+        self.lists = {
+            shopping_list.id: shopping_list
+            for shopping_list in ShoppingList.query.filter(
+                ShoppingList.id.in_(list_ids),
+                ShoppingList.family_id == self.family.id,
+                ShoppingList.deleted_at.is_(None),
+            )
+        }
+        self.items = {
+            item.id: item
+            for item in Item.query.join(ShoppingList)
+            .filter(
+                Item.id.in_(item_ids),
+                ShoppingList.family_id == self.family.id,
+                ShoppingList.deleted_at.is_(None),
+            )
+            .options(joinedload(Item.author))
+        }
+        self.notes = {
+            note.id: note
+            for note in Note.query.filter(
+                Note.id.in_(note_ids), Note.family_id == self.family.id
+            )
+        }
+
+    def lookup(self, rows, args, field):
+        try:
+            row = rows.get(int(args.get(field)))
+        except (TypeError, ValueError):
+            row = None
+        if row is None:
+            raise BatchOperationError(f"Unknown {field}.", 404)
+        return row
+
+    def record(self, entity, obj, op="upsert"):
+        return record_change(self.family.id, entity, obj, op=op, collect=self.changes)
+
+
+def _batch_text(args, field, max_length):
+    value = (args.get(field) or "").strip()
+    if not value:
+        raise BatchOperationError(f"'{field}' cannot be empty.")
+    return value[:max_length]
+
+
+def batch_add_item(ctx, args):
+    target_list = ctx.lookup(ctx.lists, args, "list_id")
+    new_item = Item(
+        text=_batch_text(args, "text", 200),
+        list_id=target_list.id,
+        author_id=current_user.id,
+        position=next_item_position(target_list.id),
+    )
+    db.session.add(new_item)
+    adjust_item_counters(target_list.id, total=1)
+    ctx.record("item", new_item)
+    ctx.items[new_item.id] = new_item  # Later operations may refer to it
+    return {"id": new_item.id}
+
+
+def batch_edit_item(ctx, args):
+    item = ctx.lookup(ctx.items, args, "item_id")
+    item.text = _batch_text(args, "text", 200)
+    ctx.record("item", item)
+    return {"id": item.id}
+
+
+def batch_delete_item(ctx, args):
+    item = ctx.lookup(ctx.items, args, "item_id")
+    adjust_item_counters(item.list_id, total=-1, done=-1 if item.done else 0)
+    ctx.record("item", item.id, op="delete")
+    db.session.delete(ctx.items.pop(item.id))
+    return {"id": item.id}
+
+
+def batch_set_item_done(ctx, args):
+    item = ctx.lookup(ctx.items, args, "item_id")
+    done = bool(args.get("done"))
+    if done != bool(item.done):
+        adjust_item_counters(item.list_id, done=1 if done else -1)
+    item.done = done
+    ctx.record("item", item)
+    return {"id": item.id, "done": item.done}
+
+
+def batch_add_note(ctx, args):
+    new_note = Note(
+        content=_batch_text(args, "content", 10000),
+        author_id=current_user.id,
+        family_id=ctx.family.id,
+    )
+    db.session.add(new_note)
+    ctx.record("note", new_note)
+    ctx.notes[new_note.id] = new_note
+    return {"id": new_note.id}
+
+
+def batch_delete_note(ctx, args):
+    note = ctx.lookup(ctx.notes, args, "note_id")
+    if note.author_id != current_user.id:
+        raise BatchOperationError("Permission denied.", 403)
+    ctx.record("note", note.id, op="delete")
+    db.session.delete(ctx.notes.pop(note.id))
+    return {"id": note.id}
+
+
+def batch_pin_note(ctx, args):
+    """Same rules as /pin_note: pin your own notes, unpin yours or as admin."""
+    note = ctx.lookup(ctx.notes, args, "note_id")
+    is_author = note.author_id == current_user.id
+    allowed = (is_author or ctx.is_admin) if note.is_pinned else is_author
+    if not allowed:
+        raise BatchOperationError("Permission denied.", 403)
+    note.is_pinned = not note.is_pinned
+    ctx.record("note", note)
+    return {"id": note.id, "is_pinned": note.is_pinned}
+
+
+def batch_add_chore(ctx, args):
+    if not ctx.is_admin:
+        raise BatchOperationError("Permission denied.", 403)
+    try:
+        points = int(args.get("points", 5))
+        frequency_days = int(args.get("frequency_days", 7))
+    except (TypeError, ValueError):
+        raise BatchOperationError("Invalid number.")
+    new_chore = Chore(
+        name=_batch_text(args, "name", 150),
+        points=points,
+        frequency_days=frequency_days,
+        family_id=ctx.family.id,
+    )
+    db.session.add(new_chore)
+    ctx.record("chore", new_chore)
+    return {"id": new_chore.id}
+
+
+BATCH_OPERATIONS = {
+    "add_item": batch_add_item,
+    "edit_item": batch_edit_item,
+    "delete_item": batch_delete_item,
+    "set_item_done": batch_set_item_done,
+    "add_note": batch_add_note,
+    "delete_note": batch_delete_note,
+    "pin_note": batch_pin_note,
+    "add_chore": batch_add_chore,
+}
+
+
+def prune_idempotency_keys():
+    """Deletes expired keys, at most once a minute."""
+    now = time.monotonic()
+    if _last_idempotency_prune["at"] and now - _last_idempotency_prune["at"] < 60:
+        return
+    _last_idempotency_prune["at"] = now
+    IdempotencyKey.query.filter(
+        IdempotencyKey.created_at < datetime.utcnow() - IDEMPOTENCY_KEY_TTL
+    ).delete(synchronize_session=False)
+
+
+@app.route("/api/batch", methods=["POST"])
+@login_required
+@family_required
+def api_batch(current_family):
+    """
+    Applies an ordered list of operations in one transaction:
+
+        {"atomic": false,
+         "operations": [{"key": "<uuid>", "op": "add_item",
+                         "args": {"list_id": 3, "text": "Milk"}}, ...]}
+
+    Each operation runs in a savepoint, so a rejected one is undone on its own
+    (or, with "atomic": true, the whole batch is). Operations whose key was
+    already applied are not run again; their stored result is returned.
+    All resulting changes go out as a single 'changes_applied' broadcast.
+    """
+    payload = request.get_json(silent=True) or {}
+    operations = payload.get("operations")
+    atomic = bool(payload.get("atomic"))
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"success": False, "error": "No operations given."}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({"success": False, "error": "Too many operations."}), 400
+    for operation in operations:
+        if (
+            not isinstance(operation, dict)
+            or operation.get("op") not in BATCH_OPERATIONS
+            or not isinstance(operation.get("key"), str)
+            or not 0 < len(operation["key"]) <= 64
+            or not isinstance(operation.setdefault("args", {}), dict)
+        ):
+            return jsonify({"success": False, "error": "Malformed operation."}), 400
+
+    prune_idempotency_keys()
+    keys = [operation["key"] for operation in operations]
+    already_applied = {
+        row.key: row.result
+        for row in IdempotencyKey.query.filter(
+            IdempotencyKey.user_id == current_user.id, IdempotencyKey.key.in_(keys)
+        )
+    }
+
+    ctx = BatchContext(current_family, operations)
+    results = []
+    failed = False
+    for operation in operations:
+        key = operation["key"]
+        if key in already_applied:
+            results.append(
+                {
+                    "key": key,
+                    "ok": True,
+                    "duplicate": True,
+                    "result": already_applied[key],
+                }
+            )
+            continue
+
+        # Changes recorded by an operation that is rolled back must not be
+        # broadcast, so remember where this operation's changes start
+        changes_before = len(ctx.changes)
+        savepoint = db.session.begin_nested()
+        try:
+            result = BATCH_OPERATIONS[operation["op"]](ctx, operation["args"])
+            db.session.flush()
+        except (BatchOperationError, IntegrityError) as e:
+            savepoint.rollback()
+            del ctx.changes[changes_before:]
+            failed = True
+            if isinstance(e, IntegrityError):
+                error = {"error": "Conflicting change.", "status": 409}
+            else:
+                error = {"error": e.message, "status": e.status}
+            results.append({"key": key, "ok": False, **error})
+            if atomic:
+                break
+            continue
+
+        try:
+            db.session.add(
+                IdempotencyKey(user_id=current_user.id, key=key, result=result)
+            )
+            savepoint.commit()
+        except IntegrityError:
+            # A concurrent retry of the same key won the race
+            savepoint.rollback()
+            del ctx.changes[changes_before:]
+            results.append({"key": key, "ok": True, "duplicate": True, "result": None})
+            continue
+
+        already_applied[key] = result
+        results.append({"key": key, "ok": True, "result": result})
 
+    if atomic and failed:
+        db.session.rollback()
+        return jsonify({"success": False, "results": results}), 409
 
-def get_notifications_context(current_family):
-    """
-    Checks for new activity in different features and returns a context dictionary.
-    This is a placeholder for a more robust notification system later.
-    For now, it indicates that we should check notifications on the frontend.
-    """
-    return {"check_notifications": True}
+    db.session.commit()
+
+    if ctx.changes:
+        socketio.emit(
+            "changes_applied",
+            {"seq": ctx.changes[-1]["seq"], "changes": ctx.changes},
+            room=f"family_room_{current_family.id}",
+        )
+
+    return jsonify({"success": not failed, "results": results})
 
 
 # --- REFACTOR: CALENDAR ROUTES ---
@@ -922,6 +3240,7 @@ def get_notifications_context(current_family):
 @app.route("/calendar")
 @login_required
 @family_required
+@conditional_page("calendar")
 def calendar_view(current_family):
     # 1. Get View Range (Month)
     try:
@@ -1080,6 +3399,7 @@ def add_event(current_family):
         if recurrence_end_str:
             recurrence_end = datetime.strptime(recurrence_end_str, "%Y-%m-%d").date()
 
+        index = conflict_index(current_family.id)
         new_event = Event(
             title=title,
             date=base_date,
@@ -1094,19 +3414,23 @@ def add_event(current_family):
         )
 
         db.session.add(new_event)
+        seq = record_change(current_family.id, "event", new_event)
         db.session.commit()
 
         # --- CORRECT INDENTATION: Line up exactly with db.session.commit ---
 
-        socketio.emit("refresh_calendar", {}, room=f"family_room_{current_family.id}")
-
+        # The sender reloads itself, after showing any conflicts
         socketio.emit(
-            "new_activity",
-            {"feature": "calendar", "timestamp": datetime.utcnow().isoformat()},
+            "refresh_calendar",
+            {"seq": seq},
             room=f"family_room_{current_family.id}",
+            skip_sid=request.headers.get("X-Socket-ID"),
         )
 
-        return jsonify({"success": True})
+        # Saved anyway: a warning, the family decides
+        return jsonify(
+            {"success": True, "conflicts": event_conflicts(index, new_event)}
+        )
 
     # This return is outside the 'if' block (for when validation fails)
     return jsonify({"success": False}), 400
@@ -1123,11 +3447,12 @@ def delete_event():
     if event_to_delete and current_user in event_to_delete.family.members:
         family_id = event_to_delete.family.id
         db.session.delete(event_to_delete)
+        seq = record_change(family_id, "event", event_to_delete.id, op="delete")
         db.session.commit()
 
         socketio.emit(
             "event_deleted",
-            {"event_id": int(event_id)},
+            {"event_id": int(event_id), "seq": seq},
             room=f"family_room_{family_id}",
         )
 
@@ -1156,9 +3481,11 @@ def edit_event(current_family, event_id):
     time_str = request.form.get("time")
 
     if title and time_str:
+        index = conflict_index(current_family.id)
         # Update event in the database
         event_to_edit.title = title
         event_to_edit.time = datetime.strptime(time_str, "%H:%M").time()
+        seq = record_change(current_family.id, "event", event_to_edit)
         db.session.commit()
 
         # Prepare data to broadcast
@@ -1178,13 +3505,958 @@ def edit_event(current_family, event_id):
         # Emit a new event to notify all clients of the update
         socketio.emit(
             "event_updated",
-            {"event": event_data},
+            {"event": event_data, "seq": seq},
             room=f"family_room_{current_family.id}",
         )
 
+        conflicts = event_conflicts(index, event_to_edit)
+        if is_ajax:
+            return jsonify(
+                {"success": True, "event": event_data, "conflicts": conflicts}
+            )
+
+    return redirect(url_for("calendar_view"))
+
+
+# --- AGENDA API ---
+# The next N occurrences across the family calendar. Each repeating series is
+# a lazy generator that jumps straight to today instead of stepping through
+# its history, single events come from one indexed `date >= today` query, and
+# heapq.merge pulls only as many occurrences as the response needs. The cost
+# grows with N and the number of live series, not with how far back the
+# calendar goes or how far ahead the N-th occurrence is.
+AGENDA_DEFAULT_LIMIT = 20
+AGENDA_MAX_LIMIT = 200
+AGENDA_STEP_DAYS = {"daily": 1, "weekly": 7}
+AGENDA_STEP_MONTHS = {"monthly": 1, "yearly": 12}
+REPEATING_TYPES = (*AGENDA_STEP_DAYS, *AGENDA_STEP_MONTHS)
+
+
+def series_occurrences(event, start):
+    """
+    Dates of a repeating event on or after start, in order, lazily. Matches
+    the rrule expansion in calendar_view (a monthly series skips months
+    without its day, a yearly one on Feb 29 only hits leap years).
+    """
+    interval = max(event.recurrence_interval or 1, 1)
+    end = event.recurrence_end_date
+    if event.recurrence_type in AGENDA_STEP_DAYS:
+        step = AGENDA_STEP_DAYS[event.recurrence_type] * interval
+        # Ceiling division: the first whole step at or after start
+        steps = max(-((event.date - start).days // step), 0)
+        day = event.date + timedelta(days=steps * step)
+        while end is None or day <= end:
+            yield day
+            if day.toordinal() + step > date.max.toordinal():
+                return
+            day += timedelta(days=step)
+        return
+
+    step = AGENDA_STEP_MONTHS[event.recurrence_type] * interval
+    months = (start.year - event.date.year) * 12 + start.month - event.date.month
+    # Floor division: the occurrence in start's month may fall before start
+    n = max(months // step, 0)
+    while True:
+        years, month = divmod(event.date.month - 1 + n * step, 12)
+        if event.date.year + years > date.max.year:
+            return
+        n += 1
+        try:
+            day = date(event.date.year + years, month + 1, event.date.day)
+        except ValueError:
+            continue  # The month has no such day
+        if end is not None and day > end:
+            return
+        if day >= start:
+            yield day
+
+
+def _agenda_key(event, day):
+    # Same order as the single events query: date, untimed first, time, id
+    return (day, event.time is not None, event.time or datetime.min.time(), event.id)
+
+
+def family_agenda(family_id, limit, now=None):
+    """
+    The next `limit` (key, date, event) occurrences of the family's events,
+    from now on. Timed events that already ended today are left out.
+    """
+    now = now or datetime.now()
+    today = now.date()
+    singles = (
+        Event.query.filter(
+            Event.family_id == family_id,
+            Event.recurrence_type == "none",
+            Event.date >= today,
+            db.or_(
+                Event.date > today,
+                Event.time.is_(None),
+                Event.is_all_day.is_(True),
+                func.coalesce(Event.end_time, Event.time) >= now.time(),
+            ),
+        )
+        .order_by(Event.date, Event.time.isnot(None), Event.time, Event.id)
+        .limit(limit)
+    )
+    series = Event.query.filter(
+        Event.family_id == family_id,
+        Event.recurrence_type.in_(REPEATING_TYPES),
+        db.or_(
+            Event.recurrence_end_date.is_(None),
+            Event.recurrence_end_date >= today,
+        ),
+    )
+
+    def over(event, day):
+        end = event.end_time or event.time
+        return day == today and not event.is_all_day and end and end < now.time()
+
+    def occurrences(event):
+        for day in series_occurrences(event, today):
+            if not over(event, day):
+                yield (_agenda_key(event, day), day, event)
+
+    streams = [occurrences(event) for event in series]
+    streams.append(
+        (_agenda_key(event, event.date), event.date, event) for event in singles
+    )
+    # Every stream is sorted, so only the head of each sits in the heap
+    return list(islice(heapq.merge(*streams), limit))
+
+
+@app.route("/api/agenda")
+@login_required
+@family_required
+def api_agenda(current_family):
+    """The family's next occurrences, in order: /api/agenda?limit=20"""
+    try:
+        limit = min(
+            max(int(request.args.get("limit", AGENDA_DEFAULT_LIMIT)), 1),
+            AGENDA_MAX_LIMIT,
+        )
+    except ValueError:
+        limit = AGENDA_DEFAULT_LIMIT
+    serialize = SYNC_SERIALIZERS["event"]
+    return jsonify(
+        {
+            "occurrences": [
+                {"date": day.isoformat(), "event": serialize(event)}
+                for _key, day, event in family_agenda(current_family.id, limit)
+            ]
+        }
+    )
+
+
+# --- SCHEDULING CONFLICTS ---
+# Timed occurrences that overlap another event of the family. Each family gets
+# an index of every timed occurrence up to the horizon, sorted by start and
+# cached until its calendar revision changes; adding or editing an event
+# updates the cached index in place. No occurrence is longer than
+# the index's longest one, so whatever overlaps a slot starts in a bounded
+# window before it: a check is two bisects, not a scan of the calendar.
+CONFLICT_HORIZON = timedelta(days=180)
+CONFLICT_DEFAULT_DURATION = timedelta(hours=1)  # Events without an end time
+CONFLICT_MAX_RESULTS = 50
+CONFLICT_INDEX_CACHE_SIZE = 256  # Families
+_conflict_indexes = OrderedDict()  # family_id -> ConflictIndex, LRU first
+
+
+def occurrence_intervals(event, start, stop):
+    """
+    (begin, end) datetimes of the event's timed occurrences on days from start
+    until stop. All-day events never conflict.
+    """
+    if event.is_all_day or event.time is None:
+        return
+    if event.recurrence_type in REPEATING_TYPES:
+        days = takewhile(lambda day: day < stop, series_occurrences(event, start))
+    elif event.recurrence_type == "none" and start <= event.date < stop:
+        days = [event.date]
+    else:
+        return
+    for day in days:
+        begin = datetime.combine(day, event.time)
+        if event.end_time is None or event.end_time == event.time:
+            end = begin + CONFLICT_DEFAULT_DURATION
+        else:
+            end = datetime.combine(day, event.end_time)
+            if end < begin:
+                end += timedelta(days=1)  # Ends after midnight
+        yield begin, end
+
+
+def _conflict_occurrence(event_id, title, begin, end):
+    return {
+        "id": event_id,
+        "title": title,
+        "start": begin.isoformat(timespec="minutes"),
+        "end": end.isoformat(timespec="minutes"),
+    }
+
+
+class ConflictIndex:
+    """The timed occurrences of a family's events, from `start` to the horizon."""
+
+    def __init__(self, revision, start, events):
+        self.revision = revision
+        self.start = start
+        self.stop = start + CONFLICT_HORIZON
+        self.intervals = sorted(
+            (begin, end, event.id, event.title)
+            for event in events
+            for begin, end in occurrence_intervals(event, start, self.stop)
+        )
+        self.starts = [interval[0] for interval in self.intervals]
+        self.longest = max(
+            (end - begin for begin, end, _, _ in self.intervals),
+            default=timedelta(0),
+        )
+
+    def overlapping(self, begin, end):
+        """The (begin, end, event_id, title) occurrences overlapping [begin, end)."""
+        low = bisect_left(self.starts, begin - self.longest)
+        high = bisect_left(self.starts, end)
+        for interval in self.intervals[low:high]:
+            if interval[1] > begin:
+                yield interval
+
+    def apply(self, event):
+        """
+        Follows a write of `event` (one revision bump): its occurrences are
+        swapped for its current ones instead of rebuilding the index.
+        """
+        self.intervals = [
+            interval for interval in self.intervals if interval[2] != event.id
+        ]
+        for begin, end in occurrence_intervals(event, self.start, self.stop):
+            insort(self.intervals, (begin, end, event.id, event.title))
+            self.longest = max(self.longest, end - begin)
+        self.starts = [interval[0] for interval in self.intervals]
+        self.revision = (self.revision or 0) + 1
+
+    def conflicts(self, limit):
+        """Every pair of overlapping occurrences, in order, a sorted sweep."""
+        for i, (begin, end, event_id, title) in enumerate(self.intervals):
+            for other in self.intervals[i + 1 : bisect_left(self.starts, end)]:
+                if other[2] == event_id:
+                    continue
+                yield {
+                    "date": begin.date().isoformat(),
+                    "events": [
+                        _conflict_occurrence(event_id, title, begin, end),
+                        _conflict_occurrence(other[2], other[3], other[0], other[1]),
+                    ],
+                }
+                limit -= 1
+                if not limit:
+                    return
+
+
+def conflict_index(family_id):
+    """The family's ConflictIndex, rebuilt only after its calendar changed."""
+    revision = (
+        db.session.query(FamilyRevision.revision)
+        .filter_by(family_id=family_id, feature=CHANGE_FEATURES["event"])
+        .scalar()
+    )
+    today = date.today()
+    index = _conflict_indexes.get(family_id)
+    if index is None or (index.revision, index.start) != (revision, today):
+        stop = today + CONFLICT_HORIZON
+        events = db.session.execute(
+            select(
+                Event.id,
+                Event.title,
+                Event.date,
+                Event.time,
+                Event.end_time,
+                Event.is_all_day,
+                Event.recurrence_type,
+                Event.recurrence_interval,
+                Event.recurrence_end_date,
+            ).where(
+                Event.family_id == family_id,
+                Event.time.isnot(None),
+                Event.is_all_day.isnot(True),
+                Event.date < stop,
+                db.or_(
+                    db.and_(Event.recurrence_type == "none", Event.date >= today),
+                    db.and_(
+                        Event.recurrence_type.in_(REPEATING_TYPES),
+                        db.or_(
+                            Event.recurrence_end_date.is_(None),
+                            Event.recurrence_end_date >= today,
+                        ),
+                    ),
+                ),
+            )
+        )
+        index = ConflictIndex(revision, today, events)
+        _conflict_indexes[family_id] = index
+    _conflict_indexes.move_to_end(family_id)
+    while len(_conflict_indexes) > CONFLICT_INDEX_CACHE_SIZE:
+        _conflict_indexes.popitem(last=False)
+    return index
+
+
+def _event_overlaps(index, event):
+    for begin, end in occurrence_intervals(event, index.start, index.stop):
+        for other in index.overlapping(begin, end):
+            if other[2] == event.id:
+                continue
+            yield {
+                "date": begin.date().isoformat(),
+                "events": [
+                    _conflict_occurrence(event.id, event.title, begin, end),
+                    _conflict_occurrence(other[2], other[3], other[0], other[1]),
+                ],
+            }
+
+
+def event_conflicts(index, event):
+    """
+    The family's other occurrences that overlap the event's, up to the horizon.
+    `index` is the family's ConflictIndex from before the event was written;
+    the event is then applied to it.
+    """
+    conflicts = list(islice(_event_overlaps(index, event), CONFLICT_MAX_RESULTS))
+    index.apply(event)
+    return conflicts
+
+
+@app.route("/api/conflicts")
+@login_required
+@family_required
+def api_conflicts(current_family):
+    """Every double booking in the family calendar up to the horizon."""
+    index = conflict_index(current_family.id)
+    return jsonify(
+        {
+            "until": index.stop.isoformat(),
+            "conflicts": list(index.conflicts(CONFLICT_MAX_RESULTS)),
+        }
+    )
+
+
+# --- CALENDAR SUBSCRIPTION FEED (iCalendar) ---
+# Phone and desktop calendar apps subscribe to /calendar/<token>.ics and poll
+# it. Repeating events are sent once with an RRULE, never expanded, and the
+# ETag/Last-Modified come from the calendar's revision, so a poll with nothing
+# new is one small query and a 304.
+ICS_FREQUENCIES = {
+    "daily": "DAILY",
+    "weekly": "WEEKLY",
+    "monthly": "MONTHLY",
+    "yearly": "YEARLY",
+}
+ICS_FEED_VERSION = 1  # Bump when the generated text changes
+ICS_BATCH_SIZE = 500
+
+
+def ics_escape(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def ics_line(line):
+    """A content line, folded at 75 octets as RFC 5545 requires."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, limit = [], 75
+    while data:
+        cut = min(limit, len(data))
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1  # Don't split a UTF-8 sequence
+        parts.append(data[:cut].decode("utf-8"))
+        data, limit = data[cut:], 74  # Continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def event_to_ics(event, host):
+    """One VEVENT. Times are floating (local), like the rest of the calendar."""
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event.uid or f'event-{event.id}@{host}'}",
+        f"DTSTAMP:{event.created_at:%Y%m%dT%H%M%SZ}",
+        f"SUMMARY:{ics_escape(event.title)}",
+    ]
+    all_day = event.is_all_day or event.time is None
+    if all_day:
+        lines.append(f"DTSTART;VALUE=DATE:{event.date:%Y%m%d}")
+        lines.append(f"DTEND;VALUE=DATE:{event.date + timedelta(days=1):%Y%m%d}")
+    else:
+        lines.append(
+            f"DTSTART:{datetime.combine(event.date, event.time):%Y%m%dT%H%M%S}"
+        )
+        if event.end_time:
+            end = datetime.combine(event.date, event.end_time)
+            if event.end_time <= event.time:
+                end += timedelta(days=1)  # Ends after midnight
+            lines.append(f"DTEND:{end:%Y%m%dT%H%M%S}")
+
+    frequency = ICS_FREQUENCIES.get(event.recurrence_type)
+    if frequency:
+        rule = f"RRULE:FREQ={frequency}"
+        if (event.recurrence_interval or 1) > 1:
+            rule += f";INTERVAL={event.recurrence_interval}"
+        if event.recurrence_end_date:
+            # UNTIL is inclusive and must have the same type as DTSTART
+            until = event.recurrence_end_date
+            rule += (
+                f";UNTIL={until:%Y%m%d}" if all_day else f";UNTIL={until:%Y%m%d}T235959"
+            )
+        lines.append(rule)
+    if event.category:
+        lines.append(f"CATEGORIES:{ics_escape(event.category)}")
+    lines.append("END:VEVENT")
+    return "".join(ics_line(line) for line in lines)
+
+
+def calendar_feed_chunks(family_id, family_name, host):
+    """Generates the feed, one chunk per batch of events read from the database."""
+    yield "".join(
+        ics_line(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:-//{host}//Family Calendar//EN",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{ics_escape(family_name)}",
+            "REFRESH-INTERVAL;VALUE=DURATION:PT1H",
+            "X-PUBLISHED-TTL:PT1H",
+        )
+    )
+    statement = (
+        select(
+            Event.id,
+            Event.title,
+            Event.date,
+            Event.time,
+            Event.end_time,
+            Event.is_all_day,
+            Event.category,
+            Event.recurrence_type,
+            Event.recurrence_interval,
+            Event.recurrence_end_date,
+            Event.uid,
+            Event.created_at,
+        )
+        .where(Event.family_id == family_id)
+        .order_by(Event.id)
+        .execution_options(yield_per=ICS_BATCH_SIZE)
+    )
+    for batch in db.session.execute(statement).partitions():
+        yield "".join(event_to_ics(event, host) for event in batch)
+    yield ics_line("END:VCALENDAR")
+
+
+def calendar_feed_url(family):
+    """The family's subscription URL, creating its token on first use."""
+    if not family.calendar_token:
+        family.calendar_token = secrets.token_urlsafe(32)
+        db.session.commit()
+    return url_for("calendar_feed", token=family.calendar_token, _external=True)
+
+
+@app.route("/calendar/<token>.ics")
+def calendar_feed(token):
+    """
+    The subscription feed. The token is the only credential, as calendar apps
+    can't log in; an admin can replace it to cut off old subscribers.
+    """
+    # One query: the family and the revisions the feed depends on
+    rows = (
+        db.session.query(
+            Family.id,
+            Family.name,
+            FamilyRevision.feature,
+            FamilyRevision.revision,
+            FamilyRevision.updated_at,
+        )
+        .outerjoin(
+            FamilyRevision,
+            db.and_(
+                FamilyRevision.family_id == Family.id,
+                FamilyRevision.feature.in_(["calendar", "family"]),
+            ),
+        )
+        .filter(Family.calendar_token == token)
+        .all()
+    )
+    if not rows:
+        abort(404)
+    family_id, family_name = rows[0].id, rows[0].name
+    revisions = sorted((row.feature, row.revision) for row in rows if row.feature)
+    updated = [row.updated_at for row in rows if row.updated_at]
+
+    etag = hashlib.sha1(
+        repr([ICS_FEED_VERSION, family_id, family_name, revisions]).encode("utf-8")
+    ).hexdigest()
+    last_modified = max(updated) if updated else None
+    if not is_resource_modified(
+        request.environ, etag=etag, last_modified=last_modified
+    ):
+        # Nothing changed: no event is read
+        response = make_response("", 304)
+    else:
+        # Not make_conditional(): it would buffer the whole stream
+        response = app.response_class(
+            stream_with_context(
+                calendar_feed_chunks(family_id, family_name, request.host)
+            ),
+            mimetype="text/calendar",
+        )
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@app.route("/calendar/subscribe", methods=["POST"])
+@login_required
+@family_required
+def calendar_subscribe(current_family):
+    """The subscription URL for the calendar apps of the family's members."""
+    if request.form.get("reset"):
+        if current_family.owner_id != current_user.id:
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "message": _("Only the family admin can reset the link."),
+                    }
+                ),
+                403,
+            )
+        current_family.calendar_token = None
+    return jsonify({"success": True, "url": calendar_feed_url(current_family)})
+
+
+# --- CALENDAR IMPORT (iCalendar) ---
+# An .ics upload (already spooled to a temporary file by Werkzeug) is read
+# one line and one VEVENT at a time, so memory doesn't grow with the file.
+# Events are inserted ICS_BATCH_SIZE at a time, one transaction per batch,
+# and the family gets a single refresh when the import is done.
+ICS_MAX_LINE = 16 * 1024  # Longer (unfolded) lines are dropped
+ICS_IMPORT_PROPERTIES = {
+    "UID",
+    "SUMMARY",
+    "DTSTART",
+    "DTEND",
+    "DURATION",
+    "RRULE",
+    "STATUS",
+    "RECURRENCE-ID",
+}
+ICS_IMPORT_FREQUENCIES = {
+    "DAILY": ("daily", DAILY),
+    "WEEKLY": ("weekly", WEEKLY),
+    "MONTHLY": ("monthly", MONTHLY),
+    "YEARLY": ("yearly", YEARLY),
+}
+ICS_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+# Rules with more occurrences, or ending further after their start, are
+# skipped rather than imported
+ICS_MAX_RECURRENCE_COUNT = 10000
+ICS_MAX_RECURRENCE_YEARS = 100
+ICS_DURATION = re.compile(
+    r"^\+?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$"
+)
+
+
+def _ics_physical_lines(stream):
+    """(line, too_long) for each line of a binary stream, without line breaks."""
+    while True:
+        line = stream.readline(ICS_MAX_LINE)
+        if not line:
+            return
+        too_long = not line.endswith(b"\n") and len(line) == ICS_MAX_LINE
+        rest = line
+        while rest and not rest.endswith(b"\n"):
+            rest = stream.readline(ICS_MAX_LINE)  # Skip what's left of it
+        yield line.rstrip(b"\r\n"), too_long
+
+
+def ics_content_lines(stream):
+    """Unfolds the lines of an iCalendar stream and decodes them."""
+    current, drop = None, True
+    for line, too_long in _ics_physical_lines(stream):
+        if line[:1] in (b" ", b"\t"):
+            # Unfolded as bytes: a fold may split a UTF-8 sequence
+            if not drop:
+                current += line[1:]
+                drop = too_long or len(current) > ICS_MAX_LINE
+            continue
+        if not drop:
+            yield current.decode("utf-8", "replace")
+        current, drop = line, too_long
+    if not drop:
+        yield current.decode("utf-8", "replace")
+
+
+def parse_ics_line(line):
+    """'NAME;PARAM=x:value' -> ('NAME', {'PARAM': 'x'}, 'value'), or None."""
+    if '"' in line:
+        quoted = False
+        for index, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == ":" and not quoted:
+                break
+        else:
+            return None
+    else:
+        index = line.find(":")
+        if index < 0:
+            return None
+    name, *params = line[:index].split(";")
+    return (
+        name.upper(),
+        {
+            key.upper(): value.strip('"')
+            for key, _sep, value in (param.partition("=") for param in params)
+        },
+        line[index + 1 :],
+    )
+
+
+def ics_events(lines):
+    """
+    Yields each VEVENT as {NAME: (params, value)}, with only the properties
+    the import uses. Components inside it (alarms) are skipped.
+    """
+    event, depth = None, 0
+    for line in lines:
+        parsed = parse_ics_line(line)
+        if parsed is None:
+            continue
+        name, params, value = parsed
+        if name == "BEGIN":
+            if event is not None:
+                depth += 1
+            elif value.upper() == "VEVENT":
+                event = {}
+        elif name == "END":
+            if depth:
+                depth -= 1
+            elif event is not None and value.upper() == "VEVENT":
+                yield event
+                event = None
+        elif event is not None and not depth and name in ICS_IMPORT_PROPERTIES:
+            event.setdefault(name, (params, value))
+
+
+def ics_unescape(value):
+    return re.sub(
+        r"\\([\;,nN])",
+        lambda match: "\n" if match.group(1) in "nN" else match.group(1),
+        value,
+    )
+
+
+def parse_ics_datetime(params, value):
+    """
+    (date, time), with time None for a whole-day value, or None if unreadable.
+    Times are kept as wall-clock times, like the rest of the calendar; UTC
+    ones and ones with a known TZID are converted to ICS_IMPORT_TIMEZONE.
+    Floating times (and unknown TZIDs) are taken as they are.
+    """
+    value = value.strip()
+    try:
+        if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+            return datetime.strptime(value[:8], "%Y%m%d").date(), None
+        moment = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    except ValueError:
+        return None
+    if value.endswith("Z"):
+        zone = timezone.utc
+    else:
+        try:
+            zone = ZoneInfo(params["TZID"]) if params.get("TZID") else None
+        except (ZoneInfoNotFoundError, ValueError):
+            zone = None
+    if zone is not None:
+        moment = (
+            moment.replace(tzinfo=zone)
+            .astimezone(ZoneInfo(app.config["ICS_IMPORT_TIMEZONE"]))
+            .replace(tzinfo=None)
+        )
+    return moment.date(), moment.time()
+
+
+def parse_ics_duration(value):
+    match = ICS_DURATION.match(value.strip().upper())
+    if not match:
+        return None
+    weeks, days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return timedelta(
+        weeks=weeks, days=days, hours=hours, minutes=minutes, seconds=seconds
+    )
+
+
+def ics_event_rows(properties):
+    """
+    The Event rows for one VEVENT: usually one, one per weekday for weekly
+    rules on several days. Empty if the event is cancelled, is a changed
+    instance of a series (the series itself is imported), or can't be
+    represented.
+    """
+    if "DTSTART" not in properties or "RECURRENCE-ID" in properties:
+        return []
+    if properties.get("STATUS", ({}, ""))[1].strip().upper() == "CANCELLED":
+        return []
+    start = parse_ics_datetime(*properties["DTSTART"])
+    if start is None:
+        return []
+    day, start_time = start
+
+    end_time = None
+    if start_time is not None:
+        starts_at = datetime.combine(day, start_time)
+        ends_at = None
+        if "DTEND" in properties:
+            end = parse_ics_datetime(*properties["DTEND"])
+            if end and end[1] is not None:
+                ends_at = datetime.combine(*end)
+        elif "DURATION" in properties:
+            duration = parse_ics_duration(properties["DURATION"][1])
+            ends_at = starts_at + duration if duration else None
+        # Only an end within the next 24 hours fits the model (a time of day)
+        if ends_at and timedelta(0) < ends_at - starts_at < timedelta(days=1):
+            end_time = ends_at.time()
+
+    summary = properties.get("SUMMARY", ({}, ""))[1]
+    uid = properties.get("UID", ({}, ""))[1].strip()
+    if not uid:
+        # Still stable, so importing the same file twice doesn't duplicate it
+        source = repr(
+            [summary, properties["DTSTART"][1], properties.get("RRULE", ({}, ""))[1]]
+        )
+        uid = hashlib.sha1(source.encode("utf-8")).hexdigest() + "@import"
+    row = dict(
+        uid=uid[:255],
+        title=ics_unescape(summary).strip()[:100] or _("(No title)"),
+        date=day,
+        time=start_time,
+        end_time=end_time,
+        is_all_day=start_time is None,
+        recurrence_type="none",
+        recurrence_interval=1,
+        recurrence_end_date=None,
+    )
+    if "RRULE" not in properties:
+        return [row]
+    return ics_recurrence_rows(row, properties["RRULE"][1])
+
+
+def ics_recurrence_rows(row, value):
+    """Maps an RRULE onto the recurrence columns of `row` (see ics_event_rows)."""
+    rule = {
+        key: part_value
+        for key, _sep, part_value in (
+            part.partition("=") for part in value.strip().upper().split(";") if part
+        )
+    }
+    frequency = ICS_IMPORT_FREQUENCIES.get(rule.pop("FREQ", None))
+    try:
+        interval = int(rule.pop("INTERVAL", None) or 1)
+        count = int(rule.pop("COUNT")) if "COUNT" in rule else None
+    except ValueError:
+        return []
+    if count is not None and not 0 < count <= ICS_MAX_RECURRENCE_COUNT:
+        return []
+    until = rule.pop("UNTIL", None)
+    wkst = ICS_WEEKDAYS.get(rule.pop("WKST", "MO"), 0)
+    weekdays = rule.pop("BYDAY", None)
+    # Parts that only restate the start date are implied by the columns
+    if rule.get("BYMONTHDAY") == str(row["date"].day) and frequency in (
+        ICS_IMPORT_FREQUENCIES["MONTHLY"],
+        ICS_IMPORT_FREQUENCIES["YEARLY"],
+    ):
+        del rule["BYMONTHDAY"]
+    if rule.get("BYMONTH") == str(row["date"].month) and frequency == (
+        ICS_IMPORT_FREQUENCIES["YEARLY"]
+    ):
+        del rule["BYMONTH"]
+    if weekdays is not None:
+        weekdays = list({ICS_WEEKDAYS.get(weekday) for weekday in weekdays.split(",")})
+        # Weekdays only work as separate weekly series ("every weekday" is
+        # five of them); "2nd Tuesday" and the like can't be represented
+        if frequency == ICS_IMPORT_FREQUENCIES["DAILY"] and interval == 1:
+            frequency = ICS_IMPORT_FREQUENCIES["WEEKLY"]
+        if None in weekdays or frequency != ICS_IMPORT_FREQUENCIES["WEEKLY"]:
+            return []
+    if frequency is None or rule:
+        return []
+
+    until_date = None
+    if until:
+        until_value = parse_ics_datetime({}, until)
+        if until_value is None:
+            return []
+        until_date = until_value[0]
+    start = row["date"]
+    if count is not None and weekdays is None and _every_step_occurs(frequency, start):
+        # The series is evenly spaced, so its last date is simple arithmetic
+        try:
+            if frequency[0] in AGENDA_STEP_DAYS:
+                step = AGENDA_STEP_DAYS[frequency[0]] * interval
+                last = start + timedelta(days=(count - 1) * step)
+            else:
+                step = AGENDA_STEP_MONTHS[frequency[0]] * interval
+                last = start + relativedelta(months=(count - 1) * step)
+        except (OverflowError, ValueError):
+            return []
+        return _ics_series_rows(row, frequency, interval, {None: start}, last)
+
+    dtstart = datetime.combine(start, row["time"] or datetime.min.time())
+    occurrences = rrule(
+        frequency[1],
+        dtstart=dtstart,
+        interval=interval,
+        wkst=wkst,
+        byweekday=weekdays,
+        count=count,
+        until=datetime.combine(until_date, datetime.max.time()) if until_date else None,
+    )
+
+    # The first date of each weekday's series. With COUNT, the rule ends on
+    # its last occurrence; UNTIL is inclusive, like recurrence_end_date.
+    firsts = {}
+    last = None
+    for occurrence in occurrences:
+        firsts.setdefault(occurrence.weekday() if weekdays else None, occurrence.date())
+        last = occurrence.date()
+        if count is None and len(firsts) == len(weekdays or [None]):
+            break
+    if not firsts:
+        return []
+    end_date = last if count is not None else until_date
+    return _ics_series_rows(row, frequency, interval, firsts, end_date)
+
+
+def _every_step_occurs(frequency, start):
+    """Whether every step of a series from `start` lands on a real date."""
+    if frequency[0] == "monthly":
+        return start.day <= 28
+    if frequency[0] == "yearly":
+        return (start.month, start.day) != (2, 29)
+    return True
+
+
+def _ics_series_rows(row, frequency, interval, firsts, end_date):
+    """One row per weekday series of ics_recurrence_rows, ending on end_date."""
+    if (
+        end_date is not None
+        and end_date.year - row["date"].year > ICS_MAX_RECURRENCE_YEARS
+    ):
+        return []
+    rows = []
+    for weekday, first in sorted(firsts.items(), key=lambda pair: pair[1]):
+        series = dict(
+            row,
+            date=first,
+            recurrence_type=frequency[0],
+            recurrence_interval=interval,
+            recurrence_end_date=end_date,
+        )
+        if len(firsts) > 1:
+            day_name = next(
+                name for name, number in ICS_WEEKDAYS.items() if number == weekday
+            )
+            series["uid"] = f"{row['uid'][:250]}#{day_name}"
+        rows.append(series)
+    return rows
+
+
+def import_ics(family_id, author_id, stream):
+    """
+    Imports the events of an iCalendar stream into a family's calendar, one
+    transaction per batch. Events whose UID the family already has are left
+    alone. Returns the counts ("imported", "duplicates", "skipped") and the
+    last change's sequence number.
+    """
+    counts = {"imported": 0, "duplicates": 0, "skipped": 0}
+    seq = None
+
+    def insert_batch(rows):
+        nonlocal seq
+        # A Core insert: the ORM's bulk path would split the batch into one
+        # statement per run of rows with the same NULL columns
+        inserted = db.session.execute(
+            _dialect_insert(Event.__table__)
+            .on_conflict_do_nothing(index_elements=["family_id", "uid"])
+            .returning(*Event.__table__.c),
+            [dict(row, family_id=family_id, author_id=author_id) for row in rows],
+        ).all()
+        counts["imported"] += len(inserted)
+        counts["duplicates"] += len(rows) - len(inserted)
+        serialize = SYNC_SERIALIZERS["event"]
+        seq = (
+            record_changes(
+                family_id,
+                "event",
+                [(event.id, "upsert", serialize(event)) for event in inserted],
+            )
+            or seq
+        )
+        db.session.commit()
+
+    batch = []
+    with held_unread_changes():
+        for properties in ics_events(ics_content_lines(stream)):
+            rows = ics_event_rows(properties)
+            if not rows:
+                counts["skipped"] += 1
+            batch.extend(rows)
+            if len(batch) >= ICS_BATCH_SIZE:
+                insert_batch(batch)
+                batch = []
+        if batch:
+            insert_batch(batch)
+    return counts, seq
+
+
+@app.route("/calendar/import", methods=["POST"])
+@login_required
+@family_required
+def import_calendar(current_family):
+    """Adds the events of an uploaded .ics file to the family calendar."""
+    is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    request.max_content_length = app.config["ICS_IMPORT_MAX_BYTES"]
+    upload = request.files.get("ics_file")
+    if not upload or not upload.filename:
+        message = _("No file selected.")
         if is_ajax:
-            return jsonify({"success": True, "event": event_data})
+            return jsonify({"success": False, "message": message}), 400
+        flash(message, "warning")
+        return redirect(url_for("calendar_view"))
+
+    counts, seq = import_ics(current_family.id, current_user.id, upload.stream)
+    if counts["imported"]:
+        # One refresh for the whole file, not one per event
+        socketio.emit(
+            "refresh_calendar",
+            {"seq": seq},
+            room=f"family_room_{current_family.id}",
+        )
 
+    message = _(
+        "Imported %(imported)d events (%(duplicates)d were already in the "
+        "calendar, %(skipped)d could not be imported).",
+        **counts,
+    )
+    if is_ajax:
+        return jsonify({"success": True, "message": message, **counts})
+    flash(message, "success" if counts["imported"] else "info")
     return redirect(url_for("calendar_view"))
 
 
@@ -1194,6 +4466,7 @@ def edit_event(current_family, event_id):
 @app.route("/meal_planner")
 @login_required
 @family_required
+@conditional_page("meals")
 def meal_planner(current_family):
     # Get the desired week offset from the URL, default to 0 (this week)
     try:
@@ -1278,6 +4551,9 @@ def delete_meal():
         meal_data = {"day": meal_to_delete.day, "meal_type": meal_to_delete.meal_type}
 
         db.session.delete(meal_to_delete)
+        meal_data["seq"] = record_change(
+            family_id, "meal", meal_to_delete.id, op="delete"
+        )
         db.session.commit()
 
         socketio.emit("meal_deleted", meal_data, room=f"family_room_{family_id}")
@@ -1304,16 +4580,10 @@ def delete_meal():
 @app.route("/bulletin_board")
 @login_required
 @family_required
+@conditional_page("bulletin")
 def bulletin_board(current_family):
     # --- START: REVISED LOGIC FOR PINNING ---
-    # Auto-deletion logic remains the same
-    cutoff_date = datetime.utcnow() - timedelta(days=30)
-    Note.query.filter(
-        Note.family_id == current_family.id,
-        Note.timestamp < cutoff_date,
-        Note.is_pinned == False,
-    ).delete(synchronize_session=False)
-    db.session.commit()
+    # Old notes are deleted in the background (expire_notes)
 
     # Fetch Pinned and Unpinned notes separately
     pinned_notes = (
@@ -1402,6 +4672,7 @@ def add_note(current_family):
             content=content, author_id=current_user.id, family_id=current_family.id
         )
         db.session.add(new_note)
+        seq = record_change(current_family.id, "note", new_note)
         db.session.commit()
 
         note_data = {
@@ -1414,13 +4685,8 @@ def add_note(current_family):
         }
         # Broadcast only to members of this family's room
         socketio.emit(
-            "note_added", {"note": note_data}, room=f"family_room_{current_family.id}"
-        )
-
-        # In the add_note route, after the existing socketio.emit("note_added",...)
-        socketio.emit(
-            "new_activity",
-            {"feature": "bulletin_board", "timestamp": new_note.timestamp.isoformat()},
+            "note_added",
+            {"note": note_data, "seq": seq},
             room=f"family_room_{current_family.id}",
         )
 
@@ -1441,11 +4707,14 @@ def delete_note():
     if note_to_delete and note_to_delete.author_id == current_user.id:
         family_id = note_to_delete.family_id
         db.session.delete(note_to_delete)
+        seq = record_change(family_id, "note", note_to_delete.id, op="delete")
         db.session.commit()
 
         # Broadcast deletion to the family room
         socketio.emit(
-            "note_deleted", {"note_id": note_id}, room=f"family_room_{family_id}"
+            "note_deleted",
+            {"note_id": note_id, "seq": seq},
+            room=f"family_room_{family_id}",
         )
 
         if is_ajax:
@@ -1505,6 +4774,7 @@ def pin_note(current_family):
 
     # If all checks pass, proceed with the action
     note_to_pin.is_pinned = not note_to_pin.is_pinned
+    seq = record_change(current_family.id, "note", note_to_pin)
     db.session.commit()
 
     socketio.emit(
@@ -1512,6 +4782,7 @@ def pin_note(current_family):
         {
             "note_id": note_to_pin.id,
             "is_pinned": note_to_pin.is_pinned,
+            "seq": seq,
         },
         room=f"family_room_{note_to_pin.family_id}",
     )
@@ -1529,24 +4800,365 @@ def profile(current_family):
     # Data for the "Household Members" card (for everyone)
     current_members = current_family.members
 
-    # Data for the "Invite Member" modal (for the admin)
-    inviteable_users = []
-    if current_user.id == current_family.owner_id:
-        existing_member_ids = [member.id for member in current_family.members]
-        inviteable_users = (
-            User.query.filter(
-                User.id != current_user.id, User.id.notin_(existing_member_ids)
+    # The "Invite Member" modal looks users up as the admin types
+    # (/api/inviteable_users)
+    return render_template(
+        "profile.html",
+        current_family=current_family,
+        current_members=current_members,
+    )
+
+
+# --- FAMILY EXPORT & IMPORT ---
+# A family as a zip of NDJSON files, one per table plus users.ndjson and a
+# manifest, for backups and for moving a family to another server. Both ways
+# stream: rows are read with yield_per and written to the zip as they come,
+# and an import reads each file line by line and inserts in batches, so
+# memory stays flat however large the family is. Derived tables (change log,
+# revisions, watermarks, the search index) are left out; the search index is
+# rebuilt after an import.
+EXPORT_FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+# Parents before children, so an import can remap the ids children refer to
+EXPORT_MODELS = (
+    ShoppingList,
+    Item,
+    Event,
+    Meal,
+    Note,
+    VaultEntry,
+    Chore,
+    ChoreAssignment,
+)
+# Columns holding ids, and the table the ids are remapped through on import
+EXPORT_REFERENCES = {
+    "family_id": "family",
+    "author_id": "user",
+    "user_id": "user",
+    "list_id": "shopping_list",
+    "chore_id": "chore",
+}
+
+
+def _export_scope(model, family_id):
+    if model is Item:
+        return Item.list_id.in_(
+            select(ShoppingList.id).where(
+                ShoppingList.family_id == family_id, ShoppingList.deleted_at.is_(None)
             )
-            .order_by(User.username)
-            .all()
         )
+    if model is ShoppingList:
+        return (ShoppingList.family_id == family_id) & ShoppingList.deleted_at.is_(None)
+    return model.family_id == family_id
+
+
+def _export_users(family_id):
+    """Members and everyone whose id appears in the family's rows."""
+    members = select(family_members.c.user_id).where(
+        family_members.c.family_id == family_id
+    )
+    user_ids = [members] + [
+        select(model.__table__.c[column]).where(_export_scope(model, family_id))
+        for model in EXPORT_MODELS
+        for column in ("author_id", "user_id")
+        if column in model.__table__.c
+    ]
+    return (
+        select(User.id, User.username, User.id.in_(members).label("member"))
+        .where(User.id.in_(db.union(*user_ids)))
+        .order_by(User.id)
+    )
+
+
+def _export_default(value):
+    return value.isoformat()  # Date, time and datetime columns
+
+
+class _ZipStream(io.RawIOBase):
+    """An unseekable sink for ZipFile that hands over what was written so far."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def family_export_chunks(family_id):
+    """Generates the export zip of a family, a chunk per batch of rows."""
+    family = db.session.execute(
+        select(Family.id, Family.name, Family.owner_id).where(Family.id == family_id)
+    ).one()
+    tables = [("user", _export_users(family_id))] + [
+        (
+            model.__tablename__,
+            select(model.__table__)
+            .where(_export_scope(model, family_id))
+            .order_by(model.id),
+        )
+        for model in EXPORT_MODELS
+    ]
+    sink = _ZipStream()
+    counts = {}
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, statement in tables:
+            counts[name] = 0
+            with archive.open(f"{name}.ndjson", "w", force_zip64=True) as entry:
+                rows = db.session.execute(
+                    statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+                )
+                for batch in rows.partitions():
+                    entry.write(
+                        "".join(
+                            json.dumps(dict(row._mapping), default=_export_default)
+                            + "\n"
+                            for row in batch
+                        ).encode("utf-8")
+                    )
+                    counts[name] += len(batch)
+                    yield sink.take()
+        manifest = {
+            "version": EXPORT_FORMAT_VERSION,
+            "exported_at": datetime.utcnow().isoformat(),
+            "family": dict(family._mapping),
+            "counts": counts,
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    yield sink.take()
+
+
+def _ndjson_batches(archive, name):
+    """The rows of name.ndjson in the zip, IMPORT_BATCH_SIZE at a time."""
+    try:
+        entry = archive.open(f"{name}.ndjson")
+    except KeyError:
+        return  # Not in this export
+    with io.TextIOWrapper(entry, encoding="utf-8") as lines:
+        batch = []
+        for line in lines:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) == IMPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def import_family(source, owner_id, name=None, add_members=False):
+    """
+    Creates a new family from an export zip (a path or a binary file).
+    Users are matched by username; rows by users who don't exist here are
+    attributed to the owner. Usernames aren't identities across servers, so
+    only the owner becomes a member, unless `add_members` also makes the
+    matched users who were members of the exported family members again.
+    One transaction: all or nothing.
+    Returns the new family's id and the rows imported per table.
+    """
+    with zipfile.ZipFile(source) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        if manifest.get("version") != EXPORT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported export version {manifest.get('version')}")
+
+        ids = {"user": {}}
+        members = {owner_id}
+        for batch in _ndjson_batches(archive, "user"):
+            local = dict(
+                db.session.execute(
+                    select(User.username, User.id).where(
+                        User.username.in_([row["username"] for row in batch])
+                    )
+                ).all()
+            )
+            for row in batch:
+                user_id = local.get(row["username"])
+                ids["user"][row["id"]] = user_id or owner_id
+                if add_members and user_id and row["member"]:
+                    members.add(user_id)
+
+        family = Family(name=name or manifest["family"]["name"], owner_id=owner_id)
+        db.session.add(family)
+        db.session.flush()
+        db.session.execute(
+            insert(family_members),
+            [{"user_id": user_id, "family_id": family.id} for user_id in members],
+        )
+        ids["family"] = {manifest["family"]["id"]: family.id}
+
+        counts = {}
+        for model in EXPORT_MODELS:
+            table = model.__table__
+            parsers = {
+                column.name: column.type.python_type.fromisoformat
+                for column in table.c
+                if isinstance(column.type, (db.Date, db.Time, db.DateTime))
+            }
+            referenced = table.name in EXPORT_REFERENCES.values()
+            statement = insert(table)
+            if referenced:
+                ids[table.name] = {}
+                statement = statement.returning(
+                    table.c.id, sort_by_parameter_order=True
+                )
+            counts[table.name] = 0
+            for batch in _ndjson_batches(archive, table.name):
+                old_ids, rows = [], []
+                for row in batch:
+                    old_ids.append(row.pop("id"))
+                    row = {key: value for key, value in row.items() if key in table.c}
+                    for column, parse in parsers.items():
+                        if row.get(column) is not None:
+                            row[column] = parse(row[column])
+                    for column, target in EXPORT_REFERENCES.items():
+                        if row.get(column) is None:
+                            continue
+                        if target == "user":
+                            row[column] = ids["user"].get(row[column], owner_id)
+                        else:
+                            row[column] = ids[target][row[column]]
+                    rows.append(row)
+                result = db.session.execute(statement, rows)
+                if referenced:
+                    ids[table.name].update(zip(old_ids, result.scalars()))
+                counts[table.name] += len(rows)
+        db.session.commit()
+    rebuild_search_index(family.id)
+    return family.id, counts
+
+
+@app.cli.command("family-export")
+@click.argument("family_id", type=int)
+@click.option("-o", "--output", help="Zip file to write (family-<id>.zip).")
+def family_export_command(family_id, output):
+    """Exports a family's data as a zip of NDJSON files."""
+    if db.session.get(Family, family_id) is None:
+        raise click.ClickException(f"No family with id {family_id}.")
+    output = output or f"family-{family_id}.zip"
+    with open(output, "wb") as archive:
+        for chunk in family_export_chunks(family_id):
+            archive.write(chunk)
+    print(f"Exported family {family_id} to {output}.")
+
+
+@app.cli.command("family-import")
+@click.argument("archive", type=click.Path(exists=True, dir_okay=False))
+@click.option("--owner", required=True, help="Username of the new family's owner.")
+@click.option("--name", help="Name of the new family (the exported one's).")
+@click.option(
+    "--add-members",
+    is_flag=True,
+    help="Also add the users here named like the exported family's members.",
+)
+def family_import_command(archive, owner, name, add_members):
+    """Creates a new family from a family-export zip (its owner as only member)."""
+    user = User.query.filter_by(username=owner).first()
+    if user is None:
+        raise click.ClickException(f"No user named {owner}.")
+    family_id, counts = import_family(archive, user.id, name, add_members)
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    print(f"Imported family {family_id}: {summary}.")
+
+
+@app.route("/family/export")
+@login_required
+@family_required
+def download_family_export(current_family):
+    """The family's data as a zip, for the admin (it includes the vault)."""
+    if current_family.owner_id != current_user.id:
+        flash(_("Only the family admin can download its data."), "danger")
+        return redirect(url_for("profile"))
+    response = app.response_class(
+        stream_with_context(family_export_chunks(current_family.id)),
+        mimetype="application/zip",
+    )
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="family-{current_family.id}-{date.today()}.zip"'
+    )
+    response.headers["Cache-Control"] = "private, no-store"
+    return response
+
+
+# --- AVATAR PIPELINE ---
+# The uploaded photo is decoded and shrunk to the final thumbnail inside the
+# request (in a native thread, so the hub keeps serving websockets), and only
+# those few kilobytes are handed to the storage backend in a background task.
+
+
+def make_avatar_thumbnail(raw_bytes, size=None):
+    """Decodes an uploaded image and returns a square JPEG thumbnail as bytes."""
+    size = size or app.config["AVATAR_SIZE"]
+    image = Image.open(io.BytesIO(raw_bytes))
+    # For JPEGs this lets libjpeg decode at a reduced scale, which is much
+    # faster than decoding a 12MP phone photo at full resolution.
+    image.draft("RGB", (size * 2, size * 2))
+    image = ImageOps.exif_transpose(image).convert("RGB")
+    image = ImageOps.fit(image, (size, size), Image.LANCZOS)
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85, optimize=True)
+    return output.getvalue()
+
 
-    return render_template(
-        "profile.html",
-        current_family=current_family,
-        current_members=current_members,
-        inviteable_users=inviteable_users,
+def store_avatar_cloudinary(data, user_id):
+    """Uploads an already-resized thumbnail to Cloudinary."""
+    upload_result = cloudinary.uploader.upload(
+        data, folder="avatars", public_id=f"user_{user_id}", overwrite=True
     )
+    return upload_result["secure_url"]
+
+
+def store_avatar_local(data, user_id):
+    """Writes the thumbnail below static/ and returns its public URL."""
+    os.makedirs(app.config["AVATAR_LOCAL_DIR"], exist_ok=True)
+    # The content hash in the name busts browser caches when the avatar changes
+    filename = f"user_{user_id}_{hashlib.sha1(data).hexdigest()[:12]}.jpg"
+    with open(os.path.join(app.config["AVATAR_LOCAL_DIR"], filename), "wb") as f:
+        f.write(data)
+    return f"{app.static_url_path}/avatars/{filename}"
+
+
+AVATAR_STORAGE_BACKENDS = {
+    "cloudinary": store_avatar_cloudinary,
+    "local": store_avatar_local,
+}
+
+
+def finish_avatar_upload(user_id, data):
+    """Background task: stores the thumbnail and points the user at it."""
+    with app.app_context():
+        try:
+            store = AVATAR_STORAGE_BACKENDS[app.config["AVATAR_STORAGE"]]
+            avatar_url = store(data, user_id)
+        except Exception as e:
+            print(f"Avatar upload failed for user {user_id}: {e}")
+            # They were told it would appear in a moment
+            socketio.emit("avatar_failed", {"user_id": user_id}, room=f"user_{user_id}")
+            return
+
+        user = db.session.get(User, user_id)
+        if not user:
+            return
+        user.avatar_url = avatar_url
+        family_ids = [family.id for family in user.families]
+        for family_id in family_ids:
+            bump_revision(family_id, "family")
+        db.session.commit()
+
+        for family_id in family_ids:
+            socketio.emit(
+                "avatar_updated",
+                {"user_id": user_id, "avatar_url": avatar_url},
+                room=f"family_room_{family_id}",
+            )
 
 
 @app.route("/profile/upload_avatar", methods=["POST"])
@@ -1556,20 +5168,15 @@ def upload_avatar():
         file_to_upload = request.files["avatar"]
         if file_to_upload.filename != "":
             try:
-                upload_result = cloudinary.uploader.upload(
-                    file_to_upload,
-                    transformation={
-                        "width": 150,
-                        "height": 150,
-                        "crop": "thumb",
-                        "gravity": "face",
-                    },
-                )
-                current_user.avatar_url = upload_result["secure_url"]
-                db.session.commit()
-                flash(_("Avatar updated successfully!"), "success")
-            except Exception as e:
-                flash(_("Error uploading image: %(error)s", error=e), "danger")
+                thumbnail = tpool.execute(make_avatar_thumbnail, file_to_upload.read())
+            except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+                flash(_("That file is not a supported image."), "danger")
+                return redirect(url_for("profile"))
+
+            socketio.start_background_task(
+                finish_avatar_upload, current_user.id, thumbnail
+            )
+            flash(_("Avatar received! It will appear in a moment."), "success")
         else:
             flash(_("No file selected."), "warning")
     return redirect(url_for("profile"))
@@ -1585,13 +5192,12 @@ def change_password():
     new_password = request.form.get("new_password")
 
     # Check if the old password is correct
-    if not bcrypt.check_password_hash(current_user.password_hash, old_password):
+    if not check_password(current_user.password_hash, old_password):
         flash(_("Incorrect old password. Please try again."), "danger")
         return redirect(url_for("profile"))
 
     # Hash the new password and update the user
-    hashed_password = bcrypt.generate_password_hash(new_password).decode("utf-8")
-    current_user.password_hash = hashed_password
+    current_user.password_hash = hash_password(new_password)
     db.session.commit()
 
     flash(_("Your password has been updated successfully!"), "success")
@@ -1614,29 +5220,79 @@ def settings():
 @app.route("/vault")
 @login_required
 @family_required
+@conditional_page("vault")
 def vault(current_family):
     # Only family members can see the vault.
-    # We will group entries by category for easier viewing.
-    entries = (
-        VaultEntry.query.filter_by(family_id=current_family.id)
-        .order_by(VaultEntry.category, VaultEntry.title)
-        .all()
-    )
+    # We will group entries by category for easier viewing. The page only
+    # lists titles; each entry's content is fetched when it is expanded.
+    category_counts = db.session.execute(
+        select(VaultEntry.category, func.count())
+        .where(VaultEntry.family_id == current_family.id)
+        .group_by(VaultEntry.category)
+        .order_by(VaultEntry.category)
+    ).all()
 
-    entries_by_category = {}
-    for entry in entries:
-        if entry.category not in entries_by_category:
-            entries_by_category[entry.category] = []
+    entries_by_category = {category: [] for category, _count in category_counts}
+    for entry in db.session.execute(
+        vault_summary_query(current_family.id).order_by(
+            VaultEntry.category, VaultEntry.title
+        )
+    ):
         entries_by_category[entry.category].append(entry)
 
-    # Get a list of unique categories to potentially use in the UI
-    categories = sorted(entries_by_category.keys())
-
     return render_template(
         "vault.html",
         current_family=current_family,
         entries_by_category=entries_by_category,
-        categories=categories,
+        category_counts=dict(category_counts),
+        categories=list(entries_by_category),
+    )
+
+
+def vault_summary_query(family_id):
+    """What the vault index shows per entry: no content, author by name."""
+    return (
+        select(
+            VaultEntry.id,
+            VaultEntry.category,
+            VaultEntry.title,
+            VaultEntry.updated_at,
+            User.username.label("author_name"),
+        )
+        .join(User, User.id == VaultEntry.author_id)
+        .where(VaultEntry.family_id == family_id)
+    )
+
+
+def render_vault_entry(entry):
+    summary = db.session.execute(
+        vault_summary_query(entry.family_id).where(VaultEntry.id == entry.id)
+    ).one()
+    return render_template("_vault_entry.html", entry=summary)
+
+
+def serialize_vault_entry(entry):
+    return {"id": entry.id, "title": entry.title, "content": entry.content}
+
+
+@app.route("/vault/entry/<int:entry_id>")
+@login_required
+@family_required
+def get_vault_entry(current_family, entry_id):
+    """One entry with its content, fetched when the user expands it."""
+    entry = VaultEntry.query.filter_by(
+        id=entry_id, family_id=current_family.id
+    ).first_or_404()
+    return jsonify(
+        {
+            "success": True,
+            "entry": {
+                "id": entry.id,
+                "category": entry.category,
+                "title": entry.title,
+                "content": entry.content,
+            },
+        }
     )
 
 
@@ -1665,28 +5321,17 @@ def add_vault_entry(current_family):
         author_id=current_user.id,
     )
     db.session.add(new_entry)
+    bump_revision(current_family.id, "vault")
+    db.session.flush()
+    index_for_search(current_family.id, "vault", [serialize_vault_entry(new_entry)])
     db.session.commit()
 
-    # --- START OF FIX ---
-    # Pass all necessary context to the render_template calls
-    entry_html = render_template(
-        "_vault_entry.html",
-        entry=new_entry,
-        current_user=current_user,
-        current_family=current_family,
-    )
-    edit_modal_html = render_template(
-        "_edit_vault_modal.html", entry=new_entry, categories=[]
-    )
-    # --- END OF FIX ---
-
     return jsonify(
         {
             "success": True,
             "message": "New vault entry added successfully!",
             "entry": {"id": new_entry.id, "category": new_entry.category},
-            "entry_html": entry_html,
-            "edit_modal_html": edit_modal_html,
+            "entry_html": render_vault_entry(new_entry),
         }
     )
 
@@ -1696,25 +5341,21 @@ def add_vault_entry(current_family):
 @family_required
 def edit_vault_entry(current_family, entry_id):
     # (Validation remains the same)
-    entry = VaultEntry.query.get_or_404(entry_id)
-    # ... security checks ...
+    if current_user.id != current_family.owner_id:
+        return jsonify({"success": False, "message": "Permission denied."}), 403
+    entry = VaultEntry.query.filter_by(
+        id=entry_id, family_id=current_family.id
+    ).first_or_404()
 
     original_category = entry.category
     entry.category = request.form.get("category", entry.category).strip()
     entry.title = request.form.get("title", entry.title).strip()
     entry.content = request.form.get("content", entry.content).strip()
     entry.author_id = current_user.id
+    bump_revision(current_family.id, "vault")
+    index_for_search(entry.family_id, "vault", [serialize_vault_entry(entry)])
     db.session.commit()
 
-    # --- START OF FIX ---
-    entry_html = render_template(
-        "_vault_entry.html",
-        entry=entry,
-        current_user=current_user,
-        current_family=current_family,
-    )
-    # --- END OF FIX ---
-
     return jsonify(
         {
             "success": True,
@@ -1724,7 +5365,7 @@ def edit_vault_entry(current_family, entry_id):
                 "category": entry.category,
                 "original_category": original_category,
             },
-            "entry_html": entry_html,
+            "entry_html": render_vault_entry(entry),
         }
     )
 
@@ -1747,6 +5388,8 @@ def delete_vault_entry(current_family):
     # Ensure the entry belongs to the correct family
     if entry.family_id == current_family.id:
         db.session.delete(entry)
+        bump_revision(current_family.id, "vault")
+        remove_from_search("vault", [entry.id])
         db.session.commit()
         # --- START OF CHANGE ---
         # REMOVE the flash() call for AJAX requests
@@ -1845,6 +5488,7 @@ def api_chore_history(current_family, start_date_str):
 @app.route("/chore_history/<string:start_date_str>")
 @login_required
 @family_required
+@conditional_page("chores")
 def chores(current_family, start_date_str=None):
     today = date.today()
     start_of_week = today - timedelta(days=today.weekday())
@@ -1988,6 +5632,7 @@ def add_chore(current_family):
         frequency_days=frequency_days,  # Save it
     )
     db.session.add(new_chore)
+    record_change(current_family.id, "chore", new_chore)
     db.session.commit()
 
     return jsonify(
@@ -2015,6 +5660,8 @@ def delete_chore(current_family):
     chore_to_delete = Chore.query.get(chore_id)
 
     if chore_to_delete and chore_to_delete.family_id == current_family.id:
+        # Clients drop a deleted chore's assignments along with it
+        record_change(current_family.id, "chore", chore_to_delete.id, op="delete")
         db.session.delete(chore_to_delete)
         db.session.commit()
         return jsonify({"success": True, "message": "Chore deleted."})
@@ -2106,6 +5753,8 @@ def generate_chores(current_family):
         )
 
     db.session.add_all(new_assignments)
+    for assignment in new_assignments:
+        record_change(current_family.id, "assignment", assignment)
     db.session.commit()
 
     return jsonify(
@@ -2119,29 +5768,39 @@ def generate_chores(current_family):
 @app.route("/list/<int:list_id>")
 @login_required
 @family_required
+@conditional_page("lists")
 def view_list(current_family, list_id):
     list_to_view = ShoppingList.query.filter_by(
-        id=list_id, family_id=current_family.id
+        id=list_id, family_id=current_family.id, deleted_at=None
     ).first_or_404()
 
-    # --- START: THE FIX ---
-    # Manually convert the list of Item objects into a list of dictionaries
-    items_for_js = [
-        {"id": item.id, "text": item.text, "done": item.done}
-        for item in list_to_view.items
-    ]
-
-    # The template for displaying items on initial load still needs the sorted objects
-    sorted_items_for_template = sorted(list_to_view.items, key=lambda x: x.done)
+    # The first page, already in display order; the rest loads on demand
+    items, next_cursor = item_page(list_to_view.id)
 
     return render_template(
         "view_list.html",
         current_family=current_family,
         list=list_to_view,
-        items=sorted_items_for_template,  # For the initial HTML render
-        initial_items_json=items_for_js,  # For the JavaScript window object
+        items=items,  # For the initial HTML render
+        initial_items_json=items,  # The same dicts, for the JavaScript window object
+        next_items_cursor=next_cursor,
     )
-    # --- END: THE FIX ---
+
+
+@app.route("/list/<int:list_id>/items")
+@login_required
+@family_required
+def list_items_page(current_family, list_id):
+    """The page of items after ?after=<cursor>, for long lists."""
+    target_list = ShoppingList.query.filter_by(
+        id=list_id, family_id=current_family.id, deleted_at=None
+    ).first_or_404()
+    after = parse_item_cursor(request.args.get("after"))
+    if after is None:
+        return jsonify({"success": False, "message": "Invalid cursor."}), 400
+
+    items, next_cursor = item_page(target_list.id, after=after)
+    return jsonify({"success": True, "items": items, "next": next_cursor})
 
 
 @app.route("/healthz")
@@ -2150,6 +5809,221 @@ def health_check():
     return "OK", 200
 
 
+# --- STATIC ASSET PIPELINE ---
+# Files under static/ that are not build artifacts: the service worker (it
+# must keep a stable URL) and user-generated content.
+STATIC_SKIP_FILES = {"service-worker.js"}
+STATIC_SKIP_DIRS = {"avatars"}
+ASSET_MANIFEST_NAME = "assets-manifest.json"
+# Only text formats benefit from compression; images are already compressed.
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".svg", ".json", ".html", ".txt"}
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+_asset_manifest = None
+
+
+def iter_static_files():
+    """Yields (relative_path, absolute_path) for every deployable static file."""
+    for root, dirs, files in os.walk(app.static_folder):
+        dirs[:] = sorted(d for d in dirs if d not in STATIC_SKIP_DIRS)
+        for name in sorted(files):
+            if name in STATIC_SKIP_FILES:
+                continue
+            path = os.path.join(root, name)
+            relative_path = os.path.relpath(path, app.static_folder)
+            yield relative_path.replace(os.sep, "/"), path
+
+
+def build_assets():
+    """
+    Minifies, fingerprints and precompresses static/ into ASSET_BUILD_DIR,
+    then writes a manifest mapping original names to hashed names.
+    """
+    import brotli
+    import rcssmin
+    import rjsmin
+
+    minifiers = {".js": rjsmin.jsmin, ".css": rcssmin.cssmin}
+    build_dir = app.config["ASSET_BUILD_DIR"]
+    shutil.rmtree(build_dir, ignore_errors=True)
+
+    manifest = {}
+    for relative_path, path in iter_static_files():
+        base, ext = os.path.splitext(relative_path)
+        with open(path, "rb") as f:
+            content = f.read()
+        if ext in minifiers:
+            content = minifiers[ext](content.decode("utf-8")).encode("utf-8")
+
+        digest = hashlib.sha256(content).hexdigest()[:10]
+        hashed_path = f"{base}.{digest}{ext}"
+        output_path = os.path.join(build_dir, hashed_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "wb") as f:
+            f.write(content)
+
+        if ext in COMPRESSIBLE_EXTENSIONS:
+            for suffix, compressed in (
+                (".gz", gzip.compress(content, compresslevel=9, mtime=0)),
+                (".br", brotli.compress(content, quality=11)),
+            ):
+                if len(compressed) < len(content):
+                    with open(output_path + suffix, "wb") as f:
+                        f.write(compressed)
+
+        manifest[relative_path] = hashed_path
+
+    with open(os.path.join(build_dir, ASSET_MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def get_asset_manifest():
+    """The manifest of the last build, or an empty dict if assets aren't built."""
+    global _asset_manifest
+    if _asset_manifest is None:
+        path = os.path.join(app.config["ASSET_BUILD_DIR"], ASSET_MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                _asset_manifest = json.load(f)
+        except FileNotFoundError:
+            _asset_manifest = {}
+    return _asset_manifest
+
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    """Builds the fingerprinted static assets (run on every deploy)."""
+    manifest = build_assets()
+    print(f"Built {len(manifest)} assets into {app.config['ASSET_BUILD_DIR']}")
+
+
+def asset_url(endpoint, **values):
+    """
+    Drop-in replacement for url_for() in templates. For the 'static' endpoint it
+    returns the fingerprinted /assets/ URL when the file has been built, and
+    falls back to the plain static URL otherwise (and always in debug mode, so
+    edits show up without rebuilding).
+    """
+    if endpoint == "static" and not app.debug:
+        hashed_path = get_asset_manifest().get(values.get("filename"))
+        if hashed_path:
+            values["filename"] = hashed_path
+            return url_for("hashed_asset", **values)
+    return url_for(endpoint, **values)
+
+
+@app.context_processor
+def inject_asset_url():
+    """Makes asset_url() available in all templates."""
+    return dict(asset_url=asset_url)
+
+
+@app.route("/assets/<path:filename>")
+def hashed_asset(filename):
+    """
+    Serves fingerprinted assets. Their URL changes whenever their content does,
+    so browsers may cache them forever without revalidating.
+    """
+    path = safe_join(app.config["ASSET_BUILD_DIR"], filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    encoding = None
+    for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, candidate
+            break
+
+    response = send_file(path, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.content_encoding = encoding
+    return response
+
+
+# --- PWA: SERVICE WORKER & OFFLINE SHELL ---
+_precache_manifest = None
+
+
+def build_precache_manifest():
+    """
+    Walks static/ and returns (version, entries) for the service worker.
+    Each entry carries a content hash, and the version changes whenever any
+    static file (or the offline page) changes, which invalidates client caches.
+    """
+    entries = []
+    for relative_path, path in iter_static_files():
+        with open(path, "rb") as f:
+            revision = hashlib.sha1(f.read()).hexdigest()[:12]
+        # Precache the same URL the templates will ask for
+        entries.append(
+            {"url": asset_url("static", filename=relative_path), "revision": revision}
+        )
+
+    version_hash = hashlib.sha1(json.dumps(entries).encode("utf-8"))
+    offline_template = os.path.join(app.root_path, app.template_folder, "offline.html")
+    with open(offline_template, "rb") as f:
+        version_hash.update(f.read())
+    return version_hash.hexdigest()[:12], entries
+
+
+def get_precache_manifest():
+    """Static files only change on deploy, so the manifest is built once."""
+    global _precache_manifest
+    if _precache_manifest is None or app.debug:
+        _precache_manifest = build_precache_manifest()
+    return _precache_manifest
+
+
+@app.route("/service-worker.js")
+def service_worker():
+    """Serves the worker from the site root so it can control every page."""
+    version, manifest = get_precache_manifest()
+    with open(os.path.join(app.static_folder, "service-worker.js")) as f:
+        source = f.read()
+
+    body = (
+        f"const PRECACHE_VERSION = {json.dumps(version)};\n"
+        f"const PRECACHE_MANIFEST = {json.dumps(manifest)};\n\n{source}"
+    )
+    response = app.response_class(body, mimetype="application/javascript")
+    # Browsers must always check for a new worker, otherwise deploys go unnoticed
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route("/offline")
+def offline():
+    """The page the service worker shows when a page isn't cached and we're offline."""
+    return render_template("offline.html")
+
+
+@app.route("/internal/metrics")
+@login_required
+def internal_metrics():
+    """Runtime counters for the site admin (the ADMIN_USERNAME account)."""
+    if current_user.username != os.environ.get("ADMIN_USERNAME"):
+        return jsonify({"success": False, "error": "Permission denied"}), 403
+
+    return jsonify(
+        {
+            "password_hashing": dict(
+                password_hash_stats,
+                concurrency=app.config["PASSWORD_HASH_CONCURRENCY"],
+                log_rounds=app.config["BCRYPT_LOG_ROUNDS"],
+            ),
+            "socket_limits": dict(
+                socket_limit_stats,
+                connections=len(socket_limits),
+                backlog=sum(limit.backlog for limit in socket_limits.values()),
+            ),
+        }
+    )
+
+
 # --- END: NEW CHORE MANAGEMENT ROUTES ---
 
 
@@ -2157,65 +6031,765 @@ def health_check():
 
 
 # --- START: NEW SOCKETIO EVENT HANDLERS ---
+# Who each connection belongs to, checked once at connect, so list events
+# don't reload the user and the family's members on every message.
+# sid -> {"user_id", "username", "family_id"}
+socket_connections = {}
+# Most lists a page can subscribe to at once
+SUBSCRIBE_MAX_LISTS = 50
+
+
+def connection_context():
+    """The identity cached for this connection, or None without a family."""
+    context = socket_connections.get(request.sid)
+    return context if context and context["family_id"] else None
+
+
+def _socket_int(data, field):
+    try:
+        return int(data.get(field))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _connection_item(context, item_id):
+    """An item of the connection's family, or None."""
+    return (
+        Item.query.join(ShoppingList)
+        .filter(
+            Item.id == item_id,
+            ShoppingList.family_id == context["family_id"],
+            ShoppingList.deleted_at.is_(None),
+        )
+        .options(joinedload(Item.author))
+        .first()
+    )
+
+
+# --- SOCKET RATE LIMITING ---
+# Every handler is wrapped by rate_limited(), which spends a token from the
+# connection's bucket and from its user's. What happens to an event that
+# finds them empty depends on the handler:
+# - "drop": discarded (heartbeats and mark_seen, which the client repeats)
+# - "queue": run once a token is free (connects, room joins and list edits)
+# - "coalesce": of the events with the same coalesce key waiting for a
+#   token, only the latest runs, and all of them get its result (toggles
+#   and meals, where the last write wins)
+
+
+class TokenBucket:
+    """`rate` tokens a second, up to `burst` saved. Two numbers of state."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait(self, now):
+        """Seconds until the next token (0 if there is one)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class SocketLimit:
+    """A connection's bucket and the events it has waiting for a token."""
+
+    __slots__ = ("bucket", "user_id", "backlog", "pending")
+
+    def __init__(self, user_id):
+        self.bucket = TokenBucket(app.config["SOCKET_RATE"], app.config["SOCKET_BURST"])
+        self.user_id = user_id
+        self.backlog = 0  # queued and coalesced events
+        self.pending = {}  # (event, coalesce key) -> Coalesced
+
+
+class Coalesced:
+    """The latest arguments of a coalesced event, and its result once run."""
+
+    __slots__ = ("args", "done")
+
+    def __init__(self, args):
+        self.args = args
+        self.done = GreenEvent()
+
+
+socket_limits = {}  # sid -> SocketLimit
+user_buckets = {}  # user_id -> [TokenBucket, number of connections]
+socket_limit_stats = {
+    "allowed": 0,
+    "queued": 0,
+    "coalesced": 0,
+    "dropped": 0,
+    "max_backlog": 0,
+    "slow_consumers": 0,
+    "max_outbound": 0,
+}
+_outbound_watcher = None
+
+
+def socket_limit():
+    """The limiter state of this connection, created on its first event."""
+    limit = socket_limits.get(request.sid)
+    if limit is None:
+        user_id = current_user.id if current_user.is_authenticated else None
+        limit = socket_limits[request.sid] = SocketLimit(user_id)
+        if user_id is not None:
+            user_bucket = user_buckets.setdefault(
+                user_id,
+                [
+                    TokenBucket(
+                        app.config["SOCKET_USER_RATE"],
+                        app.config["SOCKET_USER_BURST"],
+                    ),
+                    0,
+                ],
+            )
+            user_bucket[1] += 1
+    return limit
+
+
+def release_socket_limit(sid):
+    limit = socket_limits.pop(sid, None)
+    if limit is None or limit.user_id is None:
+        return
+    user_bucket = user_buckets[limit.user_id]
+    user_bucket[1] -= 1
+    if not user_bucket[1]:
+        del user_buckets[limit.user_id]
+
+
+def take_socket_token(limit):
+    """
+    Spends a token from the connection's and the user's bucket if both have
+    one; otherwise returns how long to wait for that.
+    """
+    now = time.monotonic()
+    buckets = [limit.bucket]
+    if limit.user_id in user_buckets:
+        buckets.append(user_buckets[limit.user_id][0])
+    wait = max(bucket.wait(now) for bucket in buckets)
+    if not wait:
+        for bucket in buckets:
+            bucket.tokens -= 1
+    return wait
+
+
+def wait_for_socket_token(limit):
+    limit.backlog += 1
+    socket_limit_stats["max_backlog"] = max(
+        socket_limit_stats["max_backlog"], limit.backlog
+    )
+    try:
+        while True:
+            wait = take_socket_token(limit)
+            if not wait:
+                return
+            socketio.sleep(wait)
+    finally:
+        limit.backlog -= 1
+
+
+def rate_limited(mode, coalesce_key=None, rejected=None):
+    """
+    Applies the rate limits to a socket handler. An event over the limit is
+    dropped (answered with `rejected`), queued, or coalesced with the others
+    of the same coalesce_key(data); a key of None queues it instead. Events
+    beyond the connection's SOCKET_BACKLOG are dropped whatever the mode.
+    """
+
+    def decorator(handler):
+        # Handlers ignore what they don't declare (e.g. connect's auth)
+        arity = len(inspect.signature(handler).parameters)
+
+        @wraps(handler)
+        def wrapper(*args):
+            args = args[:arity]
+            limit = socket_limit()
+            if not take_socket_token(limit):
+                socket_limit_stats["allowed"] += 1
+                return handler(*args)
+            if mode == "drop" or limit.backlog >= app.config["SOCKET_BACKLOG"]:
+                socket_limit_stats["dropped"] += 1
+                return rejected
+
+            key = coalesce_key(*args) if mode == "coalesce" else None
+            if key is None:
+                socket_limit_stats["queued"] += 1
+                wait_for_socket_token(limit)
+                return handler(*args)
+
+            key = (handler.__name__, key)
+            waiting = limit.pending.get(key)
+            if waiting is not None:
+                # Superseded: the waiting event runs with these arguments
+                socket_limit_stats["coalesced"] += 1
+                waiting.args = args
+                limit.backlog += 1
+                socket_limit_stats["max_backlog"] = max(
+                    socket_limit_stats["max_backlog"], limit.backlog
+                )
+                try:
+                    return waiting.done.wait()
+                finally:
+                    limit.backlog -= 1
+
+            waiting = limit.pending[key] = Coalesced(args)
+            socket_limit_stats["queued"] += 1
+            try:
+                wait_for_socket_token(limit)
+            finally:
+                del limit.pending[key]
+            result = None
+            try:
+                result = handler(*waiting.args)
+            finally:
+                waiting.done.send(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def watch_outbound_queues():
+    """
+    Background task: disconnects clients that don't read what is sent to
+    them fast enough, before their queues of broadcasts take up the memory.
+    """
+    while True:
+        socketio.sleep(1)
+        try:
+            for eio_socket in list(socketio.server.eio.sockets.values()):
+                queued = eio_socket.queue.qsize()
+                socket_limit_stats["max_outbound"] = max(
+                    socket_limit_stats["max_outbound"], queued
+                )
+                if queued > app.config["SOCKET_MAX_OUTBOUND"]:
+                    socket_limit_stats["slow_consumers"] += 1
+                    print(f"Disconnecting slow client {eio_socket.sid}")
+                    eio_socket.close(wait=False, abort=True)
+        except Exception as e:
+            print(f"Outbound queue check failed: {e}")
+
+
+def _toggle_key(field, id_field):
+    """Coalesce key of a toggle that carries its new state, else None."""
+
+    def key(data):
+        if isinstance(data, dict) and isinstance(data.get(field), bool):
+            return str(data.get(id_field))
+        return None
+
+    return key
+
+
+def _meal_key(data):
+    return (data.get("day"), data.get("week_of")) if isinstance(data, dict) else None
+
+
+# --- PRESENCE ---
+# Who is online in each family, kept up to date by connect/join_family_room/
+# disconnect and the clients' heartbeats. Only changes are broadcast
+# (presence_changed); /api/presence returns the current snapshot.
+
+
+class LocalPresence:
+    """Presence of this worker's connections, for a single-worker setup."""
+
+    def __init__(self):
+        self.families = {}  # family_id -> {user_id: {sid, ...}}
+        # sid -> [family_id, user_id, expires], least recently heard from first
+        self.connections = OrderedDict()
+
+    def family_of(self, sid):
+        connection = self.connections.get(sid)
+        return connection[0] if connection else None
+
+    def join(self, sid, family_id, user_id, expires):
+        """Returns True if the user just came online in the family."""
+        self.connections[sid] = [family_id, user_id, expires]
+        sids = self.families.setdefault(family_id, {}).setdefault(user_id, set())
+        sids.add(sid)
+        return len(sids) == 1
+
+    def heartbeat(self, sid, expires):
+        """Returns False if the connection isn't (or is no longer) registered."""
+        connection = self.connections.get(sid)
+        if connection is None:
+            return False
+        connection[2] = expires
+        self.connections.move_to_end(sid)
+        return True
+
+    def leave(self, sid):
+        """Returns (family_id, user_id) if that was the user's last connection."""
+        connection = self.connections.pop(sid, None)
+        if connection is None:
+            return None
+        family_id, user_id = connection[0], connection[1]
+        users = self.families[family_id]
+        users[user_id].discard(sid)
+        if users[user_id]:
+            return None
+        # Drop empty entries, so memory follows the live connections only
+        del users[user_id]
+        if not users:
+            del self.families[family_id]
+        return family_id, user_id
+
+    def expire(self, now):
+        """Drops connections past their expiry; returns who went offline."""
+        offline = []
+        while self.connections:
+            sid, connection = next(iter(self.connections.items()))
+            if connection[2] > now:
+                break
+            left = self.leave(sid)
+            if left:
+                offline.append(left)
+        return offline
+
+    def online(self, family_id):
+        return list(self.families.get(family_id, ()))
+
+
+class RedisPresence:
+    """
+    Presence shared by all workers through the Redis message queue: a
+    presence:<family_id> hash of user_id -> open connections, and one
+    presence:expiry sorted set of "family_id:user_id:sid" by expiry time.
+    Scripts keep each join/leave atomic when workers race.
+    """
+
+    EXPIRY_KEY = "presence:expiry"
+    JOIN = """
+        if redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1]) == 0 then return 0 end
+        if redis.call('HINCRBY', KEYS[2], ARGV[3], 1) == 1 then return 1 end
+        return 0
+    """
+    LEAVE = """
+        if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then return 0 end
+        if redis.call('HINCRBY', KEYS[2], ARGV[2], -1) > 0 then return 0 end
+        redis.call('HDEL', KEYS[2], ARGV[2])
+        return 1
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.join_script = client.register_script(self.JOIN)
+        self.leave_script = client.register_script(self.LEAVE)
+        self.members = {}  # sid -> member, for this worker's connections
+
+    def family_of(self, sid):
+        member = self.members.get(sid)
+        return int(member.split(":")[0]) if member else None
+
+    def join(self, sid, family_id, user_id, expires):
+        member = f"{family_id}:{user_id}:{sid}"
+        self.members[sid] = member
+        return bool(
+            self.join_script(
+                keys=[self.EXPIRY_KEY, f"presence:{family_id}"],
+                args=[member, expires, user_id],
+            )
+        )
+
+    def heartbeat(self, sid, expires):
+        member = self.members.get(sid)
+        # XX: only refresh, so an expired connection isn't half re-added
+        if member and self.client.zadd(
+            self.EXPIRY_KEY, {member: expires}, xx=True, ch=True
+        ):
+            return True
+        self.members.pop(sid, None)
+        return False
+
+    def _leave(self, member):
+        family_id, user_id, _sid = member.split(":", 2)
+        if self.leave_script(
+            keys=[self.EXPIRY_KEY, f"presence:{family_id}"], args=[member, user_id]
+        ):
+            return int(family_id), int(user_id)
+        return None
+
+    def leave(self, sid):
+        member = self.members.pop(sid, None)
+        return self._leave(member) if member else None
+
+    def expire(self, now):
+        offline = []
+        for member in self.client.zrangebyscore(
+            self.EXPIRY_KEY, "-inf", now, start=0, num=500
+        ):
+            member = member.decode()
+            left = self._leave(member)
+            if left:
+                offline.append(left)
+        return offline
+
+    def online(self, family_id):
+        return [int(user_id) for user_id in self.client.hkeys(f"presence:{family_id}")]
+
+
+def make_presence():
+    queue = app.config["SOCKETIO_MESSAGE_QUEUE"]
+    if queue and queue.startswith(("redis://", "rediss://", "unix://")):
+        import redis  # Already required by the Redis message queue
+
+        return RedisPresence(redis.Redis.from_url(queue))
+    # Other queues (Kombu) keep presence per worker
+    return LocalPresence()
+
+
+presence = make_presence()
+_presence_sweeper = None
+
+
+def broadcast_presence(family_id, user_id, online):
+    socketio.emit(
+        "presence_changed",
+        {"family_id": family_id, "user_id": user_id, "online": online},
+        room=f"family_room_{family_id}",
+    )
+
+
+def track_presence(family_id, user_id):
+    """Counts this connection as present in the family (and only there)."""
+    global _presence_sweeper
+    if _presence_sweeper is None:
+        _presence_sweeper = socketio.start_background_task(sweep_presence)
+    if presence.family_of(request.sid) == family_id:
+        return
+    untrack_presence()
+    expires = time.time() + app.config["PRESENCE_TIMEOUT"]
+    if presence.join(request.sid, family_id, user_id, expires):
+        broadcast_presence(family_id, user_id, True)
+
+
+def untrack_presence():
+    left = presence.leave(request.sid)
+    if left:
+        broadcast_presence(*left, False)
+
+
+def sweep_presence():
+    """Background task: expires connections that stopped sending heartbeats."""
+    while True:
+        socketio.sleep(app.config["PRESENCE_TIMEOUT"] / 3)
+        try:
+            for family_id, user_id in presence.expire(time.time()):
+                broadcast_presence(family_id, user_id, False)
+        except Exception as e:
+            print(f"Presence sweep failed: {e}")
+
+
+@app.route("/api/presence")
+@login_required
+@family_required
+def api_presence(current_family):
+    """Snapshot of who is online in the current family; presence_changed follows."""
+    return jsonify(
+        {
+            "success": True,
+            "family_id": current_family.id,
+            "online": sorted(presence.online(current_family.id)),
+        }
+    )
+
+
 @socketio.on("connect")
+@rate_limited("queue", rejected=False)
 def handle_connect():
     """A client has connected to the server."""
+    global _outbound_watcher
+    if _outbound_watcher is None:
+        _outbound_watcher = socketio.start_background_task(watch_outbound_queues)
     print(f"Client connected: {request.sid}")
+    if current_user.is_authenticated:
+        family_id = session.get("current_family_id")
+        is_member = (
+            family_id
+            and db.session.query(family_members)
+            .filter_by(user_id=current_user.id, family_id=family_id)
+            .first()
+        )
+        socket_connections[request.sid] = {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "family_id": family_id if is_member else None,
+            # The lists the page shows, for ListRouting; see subscribe
+            "list_ids": frozenset(),
+        }
+        # Every page and device of the user, for their unread counts
+        join_room(f"user_{current_user.id}")
+        if is_member:
+            join_room(f"family_room_{family_id}")
+            track_presence(family_id, current_user.id)
+            emit(
+                "unread_counts",
+                {
+                    "family_id": family_id,
+                    "counts": unread_counts(current_user.id, family_id),
+                },
+            )
 
 
 @socketio.on("disconnect")
 def handle_disconnect():
     """A client has disconnected from the server."""
+    socket_connections.pop(request.sid, None)
+    release_socket_limit(request.sid)
+    untrack_presence()
     print(f"Client disconnected: {request.sid}")
 
 
+def subscribe_connection(context, family_id, list_ids):
+    """
+    Points the connection at the page's family and at the lists of it that
+    the page shows, checked with one query. Returns the accepted list ids.
+    """
+    if family_id and family_id != context["family_id"]:
+        # The page is for another family than the session's (switched in
+        # another tab): follow the page, if the user is a member
+        if is_family_member(context["user_id"], family_id):
+            if context["family_id"]:
+                leave_room(f"family_room_{context['family_id']}")
+            context["family_id"] = family_id
+            join_room(f"family_room_{family_id}")
+            track_presence(family_id, context["user_id"])
+    accepted = []
+    if context["family_id"] and list_ids:
+        accepted = db.session.scalars(
+            select(ShoppingList.id).where(
+                ShoppingList.id.in_(list_ids),
+                ShoppingList.family_id == context["family_id"],
+                ShoppingList.deleted_at.is_(None),
+            )
+        ).all()
+    context["list_ids"] = frozenset(accepted)
+    return sorted(accepted)
+
+
+@socketio.on("subscribe")
+@rate_limited("queue")
+def handle_subscribe(data):
+    """
+    Sent on connect by every page: {"family_id", "list_ids"}. The family room
+    of the session is joined at connect already; this follows the page's
+    family if it's another, and replaces the lists whose item events the
+    connection gets. Acknowledged with what was accepted.
+    """
+    context = socket_connections.get(request.sid)
+    if context is None or not isinstance(data, dict):
+        return {"success": False}
+    values = data.get("list_ids")
+    list_ids = set()
+    for value in values[:SUBSCRIBE_MAX_LISTS] if isinstance(values, list) else []:
+        try:
+            list_ids.add(int(value))
+        except (TypeError, ValueError):
+            pass
+    list_ids = subscribe_connection(context, _socket_int(data, "family_id"), list_ids)
+    return {"success": True, "family_id": context["family_id"], "list_ids": list_ids}
+
+
+# join and join_family_room are what pages loaded before subscribe existed
+# still send after a deploy
 @socketio.on("join")
+@rate_limited("queue")
 def on_join(data):
-    """A client wants to join a room to receive updates for a specific list."""
-    list_id = data["list_id"]
-    room = f"list_{list_id}"
-    join_room(room)
-    print(f"Client {request.sid} joined room {room}")
+    context = socket_connections.get(request.sid)
+    list_id = _socket_int(data, "list_id")
+    if context is not None and list_id:
+        subscribe_connection(context, None, context["list_ids"] | {list_id})
 
 
 @socketio.on("join_family_room")
+@rate_limited("queue")
 def on_join_family_room(data):
-    """A client wants to join a room to receive updates for a specific family."""
-    family_id = data.get("family_id")
-    if family_id:
-        room = f"family_room_{family_id}"
-        join_room(room)
-        print(f"Client {request.sid} joined family room {room}")
+    context = socket_connections.get(request.sid)
+    if context is not None:
+        subscribe_connection(
+            context, _socket_int(data, "family_id"), context["list_ids"]
+        )
+
+
+@socketio.on("heartbeat")
+@rate_limited("drop")
+def handle_heartbeat():
+    """Sent every 25 seconds by open pages; keeps the connection online."""
+    context = connection_context()
+    if context is None:
+        return
+    expires = time.time() + app.config["PRESENCE_TIMEOUT"]
+    if not presence.heartbeat(request.sid, expires):
+        # Expired meanwhile (e.g. a long stall): count it again
+        track_presence(context["family_id"], context["user_id"])
+
+
+@socketio.on("mark_seen")
+@rate_limited("drop", rejected={"success": False})
+def handle_mark_seen(data):
+    """
+    The page of a feature got changes while open: they have been seen.
+    Acknowledged with the feature's count, 0.
+    """
+    context = connection_context()
+    feature = data.get("feature") if isinstance(data, dict) else None
+    if context is None or feature not in UNREAD_FEATURES:
+        return {"success": False}
+    mark_features_seen(context["user_id"], context["family_id"], [feature])
+    db.session.commit()
+    emit(
+        "unread_counts",
+        {"family_id": context["family_id"], "counts": {feature: 0}},
+        room=f"user_{context['user_id']}",
+        include_self=False,
+    )
+    return {"success": True, "counts": {feature: 0}}
 
 
 @socketio.on("toggle_done")
+@rate_limited("coalesce", _toggle_key("done", "item_to_toggle"))
 def handle_toggle_done(data):
-    if not current_user.is_authenticated:
+    """
+    Flips an item, or sets it to data["done"] if given (which lets a burst
+    of toggles be coalesced into the last one).
+    """
+    context = connection_context()
+    if context is None:
         return  # Security: Ignore if user is not logged in
 
-    item_id = data.get("item_to_toggle")
-    item_to_toggle = Item.query.get(item_id)
-
-    # Security check: User must be a member of the family that owns the item
-    if item_to_toggle and current_user in item_to_toggle.list.family.members:
+    # Security check: the item must belong to the connection's family
+    item_to_toggle = _connection_item(context, _socket_int(data, "item_to_toggle"))
+    done = data.get("done")
+    if item_to_toggle and done is not item_to_toggle.done:
         # Perform the actual database update
         item_to_toggle.done = not item_to_toggle.done
+        adjust_item_counters(
+            item_to_toggle.list_id, done=1 if item_to_toggle.done else -1
+        )
+        seq = record_change(context["family_id"], "item", item_to_toggle)
+        list_id, item_id, done = (
+            item_to_toggle.list_id,
+            item_to_toggle.id,
+            item_to_toggle.done,
+        )
         db.session.commit()
 
         # Broadcast the confirmed status back to ALL clients in the room
         # This ensures everyone's UI is in sync with the database
         emit(
             "item_toggled",
-            {
-                "list_id": item_to_toggle.list.id,
-                "item_id": item_to_toggle.id,
-                "done_status": item_to_toggle.done,
-            },
-            room=f"list_{item_to_toggle.list.id}",
+            {"list_id": list_id, "item_id": item_id, "done_status": done, "seq": seq},
+            room=list_room(context["family_id"], list_id),
+        )
+
+
+# The socket versions of /add_item, /edit_item and /delete_item. They take the
+# same fields as the forms and acknowledge with the same JSON the routes return.
+# reorder_item has no HTTP version.
+@socketio.on("add_item")
+@rate_limited("queue")
+def handle_add_item(data):
+    context = connection_context()
+    if context is None:
+        return {"success": False, "message": "Not signed in."}
+
+    item_text = (data.get("item") or "").strip()[:200]
+    target_list = ShoppingList.query.filter_by(
+        id=_socket_int(data, "list_id"), family_id=context["family_id"], deleted_at=None
+    ).first()
+    if not target_list or not item_text:
+        return {"success": False, "message": "Permission denied or invalid data."}
+
+    item_data = create_item(target_list, item_text, context["user_id"])
+    return {"success": True, "item": item_data}
+
+
+@socketio.on("edit_item")
+@rate_limited("queue")
+def handle_edit_item(data):
+    context = connection_context()
+    if context is None:
+        return {"success": False, "message": "Not signed in."}
+
+    new_text = (data.get("new_text") or "").strip()[:200]
+    item_to_edit = _connection_item(context, _socket_int(data, "item_id"))
+    if not item_to_edit or not new_text:
+        return {"success": False, "message": "Permission denied or invalid data."}
+
+    rename_item(item_to_edit, context["family_id"], new_text)
+    return {"success": True, "new_text": new_text}
+
+
+@socketio.on("reorder_item")
+@rate_limited("queue")
+def handle_reorder_item(data):
+    """
+    Moves an item between two others: {"item_id", "prev_id", "next_id"},
+    where either neighbour may be missing at the ends of the list.
+    """
+    context = connection_context()
+    if context is None:
+        return {"success": False, "message": "Not signed in."}
+
+    item = _connection_item(context, _socket_int(data, "item_id"))
+    if not item:
+        return {"success": False, "message": "Permission denied."}
+
+    prev_id, next_id = _socket_int(data, "prev_id"), _socket_int(data, "next_id")
+    neighbours = dict(
+        db.session.query(Item.id, Item.position).filter(
+            Item.id.in_([prev_id, next_id]), Item.list_id == item.list_id
         )
+    )
+    position = position_between(neighbours.get(prev_id), neighbours.get(next_id))
+    renumbered = None
+    if position is None:
+        renumbered = renumber_item_positions(item.list_id)
+        position = position_between(renumbered.get(prev_id), renumbered.get(next_id))
+
+    item.position = position
+    seq = record_change(context["family_id"], "item", item)
+    list_id, item_id = item.list_id, item.id
+    db.session.commit()
+
+    emit(
+        "item_moved",
+        {
+            "list_id": list_id,
+            "item_id": item_id,
+            "position": position,
+            "renumbered": renumbered,
+            "seq": seq,
+        },
+        room=list_room(context["family_id"], list_id),
+    )
+    return {"success": True, "position": position}
+
+
+@socketio.on("delete_item")
+@rate_limited("queue")
+def handle_delete_item(data):
+    context = connection_context()
+    if context is None:
+        return {"success": False, "message": "Not signed in."}
+
+    item_to_delete = _connection_item(context, _socket_int(data, "item_to_delete"))
+    if not item_to_delete:
+        return {"success": False, "message": "Permission denied."}
+
+    remove_item(item_to_delete, context["family_id"])
+    return {"success": True}
 
 
 @socketio.on("toggle_chore")
+@rate_limited("coalesce", _toggle_key("is_complete", "assignment_id"))
 def handle_toggle_chore(data):
     # This event handler is automatically login-protected
     # because SocketIO integrates with Flask-Login's session.
@@ -2251,8 +6825,12 @@ def handle_toggle_chore(data):
         )
         return
 
-    # Update the database
+    # Update the database (to the state the client sent, if it did)
+    is_complete = data.get("is_complete")
+    if is_complete is assignment.is_complete:
+        return
     assignment.is_complete = not assignment.is_complete
+    seq = record_change(assignment.family_id, "assignment", assignment)
     db.session.commit()
 
     # Broadcast the change back to everyone, now with the correct SID
@@ -2262,12 +6840,14 @@ def handle_toggle_chore(data):
             "assignment_id": assignment.id,
             "is_complete": assignment.is_complete,
             "sid": request.sid,  # This now works correctly!
+            "seq": seq,
         },
         room=f"family_room_{assignment.family_id}",
     )
 
 
 @socketio.on("save_meal")
+@rate_limited("coalesce", _meal_key)
 def handle_save_meal(data):
     if not current_user.is_authenticated:
         return
@@ -2317,6 +6897,7 @@ def handle_save_meal(data):
         db.session.add(new_meal)
         meal_to_process = new_meal
 
+    seq = record_change(current_family_id, "meal", meal_to_process)
     db.session.commit()
 
     meal_data = {
@@ -2332,7 +6913,7 @@ def handle_save_meal(data):
 
     emit(
         "meal_updated",
-        {"meal": meal_data, "sid": request.sid},
+        {"meal": meal_data, "sid": request.sid, "seq": seq},
         room=f"family_room_{current_family_id}",
     )
     return meal_data
@@ -0,0 +1,112 @@
+"""
+Times /api/agenda against calendar history.
+
+Seeds families whose past grows 100x between runs (single events going back
+--years years, plus daily, weekly, monthly and yearly series that started
+then and never end) with the same handful of upcoming events, and times the
+endpoint at a few limits. Series are jumped straight to today and single
+events come from an indexed range query, so the timings should follow the
+limit and stay flat as the history grows.
+
+Usage: python benchmarks/agenda.py [--past 100000] [--series 50] [--years 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+workdir = tempfile.mkdtemp(prefix="agenda_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+import app as family_app  # noqa: E402
+
+LIMITS = (10, 50, 200)
+RUNS = 20
+FREQUENCIES = ["daily", "weekly", "monthly", "yearly"]
+
+
+def seed(app, family_id, user_id, past, series, years, rng):
+    today = date.today()
+    first = today - timedelta(days=365 * years)
+    rows = []
+    for n in range(past):
+        rows.append(
+            {
+                "title": f"Past {n}",
+                "date": first + timedelta(days=rng.randrange(365 * years)),
+                "recurrence_type": "none",
+            }
+        )
+    for n in range(series):
+        rows.append(
+            {
+                "title": f"Series {n}",
+                "date": first + timedelta(days=rng.randrange(365)),
+                "recurrence_type": FREQUENCIES[n % len(FREQUENCIES)],
+                "recurrence_interval": rng.choice([1, 1, 2, 3]),
+            }
+        )
+    for n in range(200):
+        rows.append(
+            {
+                "title": f"Upcoming {n}",
+                "date": today + timedelta(days=rng.randrange(1, 90)),
+                "recurrence_type": "none",
+            }
+        )
+    for row in rows:
+        row.update(family_id=family_id, author_id=user_id, created_at=datetime.utcnow())
+    with app.app_context():
+        for start in range(0, len(rows), 5000):
+            family_app.db.session.execute(
+                insert(family_app.Event), rows[start : start + 5000]
+            )
+        family_app.db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--past", type=int, default=100_000)
+    parser.add_argument("--series", type=int, default=50)
+    parser.add_argument("--years", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(44)
+
+    app = family_app.app
+    with app.app_context():
+        family_app.db.create_all()
+
+    client = app.test_client()
+    client.post("/register", data={"username": "bench", "password": "pw"})
+    client.post("/login", data={"username": "bench", "password": "pw"})
+    with app.app_context():
+        user_id = family_app.User.query.filter_by(username="bench").one().id
+
+    print(f"{'past':>8}" + "".join(f"{f'limit={limit}':>12}" for limit in LIMITS))
+    for past in (args.past // 100, args.past):
+        client.post("/families/create", data={"family_name": f"Past {past}"})
+        with client.session_transaction() as flask_session:
+            family_id = flask_session["current_family_id"]
+        seed(app, family_id, user_id, past, args.series, args.years, rng)
+
+        timings = []
+        for limit in LIMITS:
+            started = time.perf_counter()
+            for _ in range(RUNS):
+                response = client.get(f"/api/agenda?limit={limit}")
+                assert len(response.get_json()["occurrences"]) == limit
+            timings.append((time.perf_counter() - started) / RUNS * 1000)
+        print(f"{past:>8}" + "".join(f"{ms:>10.1f}ms" for ms in timings))
+
+
+if __name__ == "__main__":
+    main()
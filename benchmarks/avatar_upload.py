@@ -0,0 +1,104 @@
+"""
+Compares the avatar upload paths.
+
+- legacy: the raw photo is pushed to the storage service inside the request
+  (what upload_avatar used to do with Cloudinary).
+- pipeline: the photo is shrunk to a 150x150 thumbnail in the request and only
+  the thumbnail is stored, in a background task.
+
+The storage service is the local filesystem backend; the network link to a
+remote service is simulated with --uplink-mbps so the run works offline.
+
+Usage: python benchmarks/avatar_upload.py [--runs 5] [--uplink-mbps 10]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+workdir = tempfile.mkdtemp(prefix="avatar_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+os.environ["AVATAR_STORAGE"] = "local"
+os.environ["AVATAR_LOCAL_DIR"] = os.path.join(workdir, "avatars")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import eventlet  # noqa: E402
+from PIL import Image  # noqa: E402
+
+import app as family_app  # noqa: E402
+
+
+def make_phone_photo(width=4032, height=3024):
+    """A noisy 12MP JPEG, roughly the size of a modern phone photo."""
+    noise = [Image.effect_noise((width, height), 48) for _ in range(3)]
+    photo = Image.merge("RGB", noise)
+    output = io.BytesIO()
+    photo.save(output, format="JPEG", quality=92)
+    return output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--uplink-mbps", type=float, default=10.0)
+    args = parser.parse_args()
+    bytes_per_second = args.uplink_mbps * 1_000_000 / 8
+
+    app = family_app.app
+    with app.app_context():
+        family_app.db.create_all()
+
+    stored_bytes = []
+
+    def counting_backend(data, user_id):
+        stored_bytes.append(len(data))
+        time.sleep(len(data) / bytes_per_second)
+        return family_app.store_avatar_local(data, user_id)
+
+    family_app.AVATAR_STORAGE_BACKENDS["bench"] = counting_backend
+    app.config["AVATAR_STORAGE"] = "bench"
+
+    client = app.test_client()
+    client.post("/register", data={"username": "bench", "password": "pw"})
+    client.post("/login", data={"username": "bench", "password": "pw"})
+
+    photo = make_phone_photo()
+    print(f"input photo: {len(photo) / 1024:.0f} KiB, {args.runs} runs")
+
+    legacy_times = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        counting_backend(photo, 1)
+        legacy_times.append(time.perf_counter() - started)
+    legacy_bytes = sum(stored_bytes) / len(stored_bytes)
+
+    stored_bytes.clear()
+    pipeline_times = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        client.post(
+            "/profile/upload_avatar",
+            data={"avatar": (io.BytesIO(photo), "photo.jpg")},
+            content_type="multipart/form-data",
+        )
+        pipeline_times.append(time.perf_counter() - started)
+        # Let the background upload run before the next iteration
+        while len(stored_bytes) < len(pipeline_times):
+            eventlet.sleep(0.01)
+    pipeline_bytes = sum(stored_bytes) / len(stored_bytes)
+
+    print(f"{'path':<10}{'request ms':>14}{'bytes stored':>16}")
+    for name, times, size in (
+        ("legacy", legacy_times, legacy_bytes),
+        ("pipeline", pipeline_times, pipeline_bytes),
+    ):
+        print(f"{name:<10}{sum(times) / len(times) * 1000:>14.1f}{size:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Times family export and import, and checks their memory stays flat.
+
+Seeds two families, one with --rows rows and one with a tenth of that (list
+items mostly, plus events, notes and chore assignments), then for each:
+
+- exports it with family_export_chunks() to a zip file;
+- imports that zip as a new family with import_family().
+
+Both run under tracemalloc to report the peak Python memory, which makes
+them several times slower. Rows are streamed with yield_per on the way out
+and inserted in batches on the way in, so the peak should be about the same
+for both families.
+
+Usage: python benchmarks/family_export.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+workdir = tempfile.mkdtemp(prefix="export_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+import app as family_app  # noqa: E402
+
+WORDS = ["milk", "bread", "eggs", "apples", "rice", "soap", "coffee", "pasta"]
+BATCH = 10_000
+
+
+def seed(family_id, user_id, rows, rng):
+    models = family_app
+    list_ids = [
+        models.db.session.execute(
+            insert(models.ShoppingList).returning(models.ShoppingList.id),
+            {"name": f"List {n}", "family_id": family_id},
+        ).scalar_one()
+        for n in range(20)
+    ]
+    chore_id = models.db.session.execute(
+        insert(models.Chore).returning(models.Chore.id),
+        {"name": "Dishes", "family_id": family_id},
+    ).scalar_one()
+    now = datetime.utcnow()
+    today = date.today()
+    shares = {
+        models.Item: (
+            0.9,
+            lambda n: {
+                "text": f"{rng.choice(WORDS)} {n}",
+                "list_id": rng.choice(list_ids),
+                "author_id": user_id,
+                "position": n,
+                "created_at": now,
+            },
+        ),
+        models.Event: (
+            0.04,
+            lambda n: {
+                "title": f"Event {n}",
+                "date": today + timedelta(days=rng.randrange(-1000, 365)),
+                "family_id": family_id,
+                "author_id": user_id,
+                "created_at": now,
+            },
+        ),
+        models.Note: (
+            0.04,
+            lambda n: {
+                "content": f"Note {n} " + rng.choice(WORDS) * 10,
+                "family_id": family_id,
+                "author_id": user_id,
+                "timestamp": now,
+            },
+        ),
+        models.ChoreAssignment: (
+            0.02,
+            lambda n: {
+                "week_of": today - timedelta(weeks=n % 500),
+                "chore_id": chore_id,
+                "user_id": user_id,
+                "family_id": family_id,
+            },
+        ),
+    }
+    for model, (share, make_row) in shares.items():
+        count = int(rows * share)
+        for start in range(0, count, BATCH):
+            models.db.session.execute(
+                insert(model),
+                [make_row(n) for n in range(start, min(start + BATCH, count))],
+            )
+    models.db.session.commit()
+
+
+def traced(function, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def export_to_file(family_id, path):
+    with open(path, "wb") as archive:
+        for chunk in family_app.family_export_chunks(family_id):
+            archive.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    rng = random.Random(47)
+
+    app = family_app.app
+    with app.app_context():
+        family_app.db.create_all()
+        user = family_app.User(username="bench", password_hash="x")
+        family_app.db.session.add(user)
+        family_app.db.session.commit()
+
+        print(
+            f"{'rows':>9}{'export':>10}{'peak MB':>9}{'zip MB':>8}"
+            f"{'import':>10}{'peak MB':>9}"
+        )
+        for rows in (args.rows // 10, args.rows):
+            family = family_app.Family(name=f"Bench {rows}", owner_id=user.id)
+            family_app.db.session.add(family)
+            family_app.db.session.commit()
+            seed(family.id, user.id, rows, rng)
+
+            path = os.path.join(workdir, f"family_{rows}.zip")
+            _, export_time, export_peak = traced(export_to_file, family.id, path)
+            size = os.path.getsize(path) / 1024 / 1024
+            (_, counts), import_time, import_peak = traced(
+                family_app.import_family, path, user.id
+            )
+            assert sum(counts.values()) >= rows * 0.99, counts
+            print(
+                f"{rows:>9}{export_time:>9.1f}s{export_peak:>9.1f}{size:>8.1f}"
+                f"{import_time:>9.1f}s{import_peak:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
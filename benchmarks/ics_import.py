@@ -0,0 +1,150 @@
+"""
+Times the .ics import (/calendar/import) on generated calendars.
+
+Writes an iCalendar file of --events events in the shapes real school and
+sports calendars use (timed and all-day events, alarms, weekday and weekly
+rules with COUNT/UNTIL, folded long lines, UTC times), then:
+
+- uploads it through the endpoint, and again to time the UID dedupe;
+- imports it, and a file 4x as large, into fresh families with
+  import_ics() directly, reporting the peak Python memory of each (traced
+  with tracemalloc, so not timed). Parsing is streamed and inserts are
+  batched, so the peak shouldn't grow with the file.
+
+Usage: python benchmarks/ics_import.py [--events 10000]
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+workdir = tempfile.mkdtemp(prefix="ics_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as family_app  # noqa: E402
+
+WORDS = ["match", "training", "assembly", "trip", "concert", "exam", "club", "party"]
+
+
+def write_calendar(path, events, rng):
+    start = date(2026, 9, 1)
+    with open(path, "w", encoding="utf-8", newline="") as output:
+        output.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//EN\r\n")
+        for n in range(events):
+            day = start + timedelta(days=rng.randrange(300))
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+            lines = [
+                "BEGIN:VEVENT",
+                f"UID:bench-{n}@example.com",
+                f"SUMMARY:{title.capitalize()} {n}",
+                "DTSTAMP:20260901T000000Z",
+            ]
+            shape = n % 10
+            if shape < 4:
+                lines.append(f"DTSTART:{day:%Y%m%d}T{rng.randrange(8, 20):02d}0000")
+                lines.append("DURATION:PT1H30M")
+            elif shape < 6:
+                lines.append(f"DTSTART;VALUE=DATE:{day:%Y%m%d}")
+                lines.append(f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}")
+            elif shape < 8:
+                lines.append(f"DTSTART:{day:%Y%m%d}T170000Z")
+                lines.append("RRULE:FREQ=WEEKLY;BYDAY=TU,TH;COUNT=20")
+            else:
+                lines.append(f"DTSTART:{day:%Y%m%d}T080000")
+                lines.append("RRULE:FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR;UNTIL=20270630")
+            # Long enough to be folded
+            lines.append("DESCRIPTION:" + "Bring water and a snack. " * 6)
+            if n % 3 == 0:
+                lines += [
+                    "BEGIN:VALARM",
+                    "ACTION:DISPLAY",
+                    "TRIGGER:-PT30M",
+                    "END:VALARM",
+                ]
+            lines.append("END:VEVENT")
+            for line in lines:
+                data = line.encode("utf-8")
+                output.write(
+                    "\r\n ".join(
+                        data[i : i + 74].decode("utf-8")
+                        for i in range(0, len(data), 74)
+                    )
+                    + "\r\n"
+                )
+        output.write("END:VCALENDAR\r\n")
+
+
+def upload(client, path):
+    with open(path, "rb") as ics_file:
+        data = {"ics_file": (io.BytesIO(ics_file.read()), "bench.ics")}
+    started = time.perf_counter()
+    response = client.post(
+        "/calendar/import",
+        data=data,
+        headers={"X-Requested-With": "XMLHttpRequest"},
+        content_type="multipart/form-data",
+    )
+    return response.get_json(), time.perf_counter() - started
+
+
+def import_directly(app, family_id, user_id, path):
+    with app.app_context(), open(path, "rb") as ics_file:
+        tracemalloc.start()
+        counts, _seq = family_app.import_ics(family_id, user_id, ics_file)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return counts, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=10_000)
+    args = parser.parse_args()
+    rng = random.Random(43)
+
+    app = family_app.app
+    with app.app_context():
+        family_app.db.create_all()
+
+    client = app.test_client()
+    client.post("/register", data={"username": "bench", "password": "pw"})
+    client.post("/login", data={"username": "bench", "password": "pw"})
+    client.post("/families/create", data={"family_name": "Bench"})
+
+    paths = {}
+    for events in (args.events, args.events * 4):
+        paths[events] = os.path.join(workdir, f"calendar_{events}.ics")
+        write_calendar(paths[events], events, rng)
+        size = os.path.getsize(paths[events]) / 1024 / 1024
+        print(f"wrote {events} events ({size:.1f} MB)")
+
+    counts, elapsed = upload(client, paths[args.events])
+    print(
+        f"upload:    {elapsed:6.2f}s  imported {counts['imported']} rows,"
+        f" skipped {counts['skipped']}"
+    )
+    counts, elapsed = upload(client, paths[args.events])
+    print(f"re-upload: {elapsed:6.2f}s  {counts['duplicates']} duplicates")
+
+    print(f"{'events':>8}{'rows':>9}{'peak MB':>10}")
+    for events, path in paths.items():
+        client.post("/families/create", data={"family_name": f"Fresh {events}"})
+        with client.session_transaction() as flask_session:
+            family_id = flask_session["current_family_id"]
+        with app.app_context():
+            user_id = family_app.User.query.filter_by(username="bench").one().id
+        counts, peak = import_directly(app, family_id, user_id, path)
+        print(f"{events:>8}{counts['imported']:>9}{peak / 1024 / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Times /delete_list against the size of the list.
+
+Seeds lists of growing size (with their search documents) and deletes each
+one through the endpoint. Lists up to LIST_PURGE_BATCH_SIZE items are
+deleted in the request, their items by the database's ON DELETE CASCADE;
+larger ones are only tombstoned, so the request time should stay flat. The
+background purge is then run directly and timed on its own.
+
+Usage: python benchmarks/list_delete.py [--items 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+workdir = tempfile.mkdtemp(prefix="list_delete_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+import app as family_app  # noqa: E402
+
+AJAX = {"X-Requested-With": "XMLHttpRequest"}
+
+
+def seed(app, family_id, user_id, items):
+    with app.app_context():
+        shopping_list = family_app.ShoppingList(
+            name=f"{items} items", family_id=family_id, item_count=items
+        )
+        family_app.db.session.add(shopping_list)
+        family_app.db.session.flush()
+        now = datetime.utcnow()
+        for start in range(0, items, 5000):
+            rows = [
+                {
+                    "text": f"thing {n}",
+                    "position": n,
+                    "created_at": now,
+                    "list_id": shopping_list.id,
+                    "author_id": user_id,
+                }
+                for n in range(start, min(start + 5000, items))
+            ]
+            item_ids = family_app.db.session.scalars(
+                insert(family_app.Item).returning(family_app.Item.id), rows
+            ).all()
+            family_app.index_for_search(
+                family_id,
+                "item",
+                [
+                    {"id": item_id, "list_id": shopping_list.id, "text": row["text"]}
+                    for item_id, row in zip(item_ids, rows)
+                ],
+            )
+        family_app.db.session.commit()
+        return shopping_list.id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+
+    app = family_app.app
+    with app.app_context():
+        family_app.db.create_all()
+    # Purges are timed below rather than left to a background task
+    family_app.schedule_list_purge = lambda: None
+
+    client = app.test_client()
+    client.post("/register", data={"username": "bench", "password": "pw"})
+    client.post("/login", data={"username": "bench", "password": "pw"})
+    client.post("/families/create", data={"family_name": "Bench"})
+    with client.session_transaction() as flask_session:
+        family_id = flask_session["current_family_id"]
+    with app.app_context():
+        user_id = family_app.User.query.filter_by(username="bench").one().id
+
+    print(f"{'items':>8}{'request':>12}{'purge':>12}")
+    for items in (args.items // 1000, args.items // 100, args.items):
+        list_id = seed(app, family_id, user_id, items)
+        started = time.perf_counter()
+        response = client.post(
+            "/delete_list", data={"list_to_delete": list_id}, headers=AJAX
+        )
+        assert response.get_json()["success"]
+        request_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with app.app_context():
+            family_app.purge_deleted_lists()
+            assert not family_app.Item.query.filter_by(list_id=list_id).count()
+        purge_ms = (time.perf_counter() - started) * 1000
+        print(f"{items:>8}{request_ms:>10.1f}ms{purge_ms:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
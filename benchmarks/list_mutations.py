@@ -0,0 +1,109 @@
+"""
+Compares the server CPU time per list mutation over both paths.
+
+- http: the POST routes (/add_item, /edit_item, /delete_item), as sent by
+  executeSubmit, each one a full Flask request with cookies and login checks.
+- socket: the add_item/edit_item/delete_item socket events on a connection
+  that is already open, acknowledged with the same JSON.
+
+Both run in-process through the Flask and Flask-SocketIO test clients, so the
+numbers are process CPU time (time.process_time) and leave the network out.
+
+Usage: python benchmarks/list_mutations.py [--ops 300]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+workdir = tempfile.mkdtemp(prefix="list_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+# Measure the handlers, not the socket rate limits
+for limit in ("SOCKET_RATE", "SOCKET_BURST", "SOCKET_USER_RATE", "SOCKET_USER_BURST"):
+    os.environ.setdefault(limit, "1000000")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as family_app  # noqa: E402
+
+AJAX = {"X-Requested-With": "XMLHttpRequest"}
+
+
+def run_http(client, list_id, ops):
+    item_ids = []
+    for n in range(ops):
+        response = client.post(
+            "/add_item", data={"list_id": list_id, "item": f"http {n}"}, headers=AJAX
+        )
+        item_ids.append(response.get_json()["item"]["id"])
+    for item_id in item_ids:
+        client.post(
+            "/edit_item",
+            data={"item_id": item_id, "new_text": f"edited {item_id}"},
+            headers=AJAX,
+        )
+    for item_id in item_ids:
+        client.post("/delete_item", data={"item_to_delete": item_id}, headers=AJAX)
+
+
+def run_socket(socket_client, list_id, ops):
+    item_ids = []
+    for n in range(ops):
+        ack = socket_client.emit(
+            "add_item", {"list_id": list_id, "item": f"socket {n}"}, callback=True
+        )
+        item_ids.append(ack["item"]["id"])
+    for item_id in item_ids:
+        socket_client.emit(
+            "edit_item",
+            {"item_id": item_id, "new_text": f"edited {item_id}"},
+            callback=True,
+        )
+    for item_id in item_ids:
+        socket_client.emit("delete_item", {"item_to_delete": item_id}, callback=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=300)
+    args = parser.parse_args()
+
+    app = family_app.app
+    with app.app_context():
+        family_app.db.create_all()
+
+    client = app.test_client()
+    client.post("/register", data={"username": "bench", "password": "pw"})
+    client.post("/login", data={"username": "bench", "password": "pw"})
+    client.post("/families/create", data={"family_name": "Bench"})
+    client.post("/create_list", data={"new_list_name": "Groceries"}, headers=AJAX)
+    with app.app_context():
+        list_id = family_app.ShoppingList.query.first().id
+
+    socket_client = family_app.socketio.test_client(app, flask_test_client=client)
+    with client.session_transaction() as flask_session:
+        family_id = flask_session["current_family_id"]
+    socket_client.emit("subscribe", {"family_id": family_id, "list_ids": [list_id]})
+
+    print(f"{args.ops} adds + {args.ops} edits + {args.ops} deletes per path")
+    print(f"{'path':<8}{'CPU ms/op':>12}{'wall ms/op':>12}")
+    for name, run, target in (
+        ("http", run_http, client),
+        ("socket", run_socket, socket_client),
+    ):
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        run(target, list_id, args.ops)
+        cpu = time.process_time() - cpu_started
+        wall = time.perf_counter() - wall_started
+        socket_client.get_received()  # Drop the broadcasts we received
+        total_ops = args.ops * 3
+        print(
+            f"{name:<8}{cpu / total_ops * 1000:>12.2f}{wall / total_ops * 1000:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Times /api/search against a seeded family.
+
+Seeds --rows searchable records (list items, notes, events, meals and vault
+entries, in that mix) into one family plus the same again into a second
+family, builds the index with rebuild_search_index(), then reports the
+latency of a few query shapes through the real endpoint. The target is
+under 50 ms per query at 100k rows per family.
+
+Runs against DATABASE_URL (SQLite FTS5 by default; point it at Postgres to
+measure the tsvector/GIN index).
+
+Usage: python benchmarks/search.py [--rows 100000] [--runs 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+workdir = tempfile.mkdtemp(prefix="search_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+import app as family_app  # noqa: E402
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "te", "su", "no", "vi", "de", "po", "an", "el"]
+QUERIES = {
+    "common word": "{common}",
+    "rare word": "{rare}",
+    "two words": "{common} {middle}",
+    "prefix": "{prefix}",
+    "no match": "zzzzqx",
+}
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def sentence(vocabulary, rng, length):
+    # Zipf-ish: a few words are very common, most are rare
+    return " ".join(
+        vocabulary[min(int(rng.paretovariate(1.2)) - 1, len(vocabulary) - 1)]
+        for _ in range(length)
+    )
+
+
+def seed_family(db, family_id, user_id, rows, vocabulary, rng):
+    shares = {"item": 0.5, "note": 0.2, "event": 0.1, "meal": 0.1, "vault": 0.1}
+    counts = {entity: int(rows * share) for entity, share in shares.items()}
+
+    shopping_list = family_app.ShoppingList(name="Bench", family_id=family_id)
+    db.session.add(shopping_list)
+    db.session.flush()
+    tables = {
+        "item": lambda n: dict(
+            text=sentence(vocabulary, rng, 3)[:200],
+            list_id=shopping_list.id,
+            author_id=user_id,
+            position=(n + 1) * 1024,
+        ),
+        "note": lambda n: dict(
+            content=sentence(vocabulary, rng, 25),
+            family_id=family_id,
+            author_id=user_id,
+        ),
+        "event": lambda n: dict(
+            title=sentence(vocabulary, rng, 4)[:100],
+            date=date(2026, 1 + n % 12, 1 + n % 28),
+            family_id=family_id,
+            author_id=user_id,
+        ),
+        "meal": lambda n: dict(
+            day="Monday",
+            meal_type="Dinner",
+            week_of=date(2026, 1, 5),
+            description=sentence(vocabulary, rng, 4)[:200],
+            notes=sentence(vocabulary, rng, 10),
+            family_id=family_id,
+            author_id=user_id,
+        ),
+        "vault": lambda n: dict(
+            category="General",
+            title=sentence(vocabulary, rng, 3)[:150],
+            content=sentence(vocabulary, rng, 40),
+            family_id=family_id,
+            author_id=user_id,
+        ),
+    }
+    models = {
+        "item": family_app.Item,
+        "note": family_app.Note,
+        "event": family_app.Event,
+        "meal": family_app.Meal,
+        "vault": family_app.VaultEntry,
+    }
+    for entity, count in counts.items():
+        for start in range(0, count, 5000):
+            db.session.execute(
+                insert(models[entity]),
+                [tables[entity](n) for n in range(start, min(start + 5000, count))],
+            )
+    db.session.commit()
+    return family_app.rebuild_search_index(family_id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(36)
+
+    app = family_app.app
+    db = family_app.db
+    with app.app_context():
+        db.create_all()
+
+    client = app.test_client()
+    client.post("/register", data={"username": "bench", "password": "pw"})
+    client.post("/login", data={"username": "bench", "password": "pw"})
+    client.post("/families/create", data={"family_name": "Bench"})
+    client.post("/families/create", data={"family_name": "Neighbours"})
+    vocabulary = make_vocabulary(5000, rng)
+    started = time.perf_counter()
+    with app.app_context():
+        user_id = family_app.User.query.filter_by(username="bench").one().id
+        indexed = 0
+        for family in family_app.Family.query.all():
+            indexed += seed_family(db, family.id, user_id, args.rows, vocabulary, rng)
+    print(
+        f"seeded and indexed {indexed} records in 2 families "
+        f"({time.perf_counter() - started:.1f}s)"
+    )
+
+    words = {
+        "common": vocabulary[0],
+        "middle": vocabulary[3],
+        "rare": vocabulary[-1],
+        "prefix": vocabulary[1][:3],
+    }
+    print(f"{'query':<14}{'results':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for name, template in QUERIES.items():
+        query = template.format(**words)
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            response = client.get("/api/search", query_string={"q": query})
+            timings.append((time.perf_counter() - started) * 1000)
+        results = len(response.get_json()["results"])
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<14}{results:>9}{statistics.median(timings):>9.1f}{p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -90,13 +90,30 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # search_document is created by hand (tsvector on Postgres, FTS5 on
+    # SQLite; see create_search_table in app.py), so autogenerate must not
+    # try to drop it
+    def include_object(object, name, type_, reflected, compare_to):
+        return not (type_ == "table" and name.startswith("search_document"))
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        # app.py turns foreign keys on for SQLite, but batch migrations rebuild
+        # a table by copying it and dropping the original, which would cascade
+        # into (or be refused by) the rows referencing it. The pragma has no
+        # effect inside a transaction, so it goes straight to the driver's
+        # connection: through SQLAlchemy it would begin one (app.py emits BEGIN)
+        # that nothing commits.
+        if connection.dialect.name == "sqlite":
+            connection.connection.driver_connection.execute("PRAGMA foreign_keys=OFF")
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
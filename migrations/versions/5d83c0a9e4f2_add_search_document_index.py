@@ -0,0 +1,80 @@
+"""Add search_document full-text index
+
+Revision ID: 5d83c0a9e4f2
+Revises: e91a4f07b3c8
+Create Date: 2026-10-19 18:25:03.771902
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d83c0a9e4f2'
+down_revision = 'e91a4f07b3c8'
+branch_labels = None
+depends_on = None
+
+
+# Keep in sync with SEARCH_SQL / SEARCH_ENTITY_CODES in app.py
+CREATE = {
+    'postgresql': [
+        "CREATE TABLE search_document ("
+        " doc_id BIGINT PRIMARY KEY,"
+        " family_id INTEGER NOT NULL,"
+        " entity VARCHAR(20) NOT NULL,"
+        " entity_id INTEGER NOT NULL,"
+        " parent_id INTEGER,"
+        " title TEXT NOT NULL DEFAULT '',"
+        " body TEXT NOT NULL DEFAULT '',"
+        " search_vector TSVECTOR GENERATED ALWAYS AS ("
+        "  setweight(to_tsvector('simple', title), 'A') ||"
+        "  setweight(to_tsvector('simple', body), 'B')) STORED)",
+        "CREATE INDEX ix_search_document_search_vector"
+        " ON search_document USING GIN (search_vector)",
+        "CREATE INDEX ix_search_document_family_id ON search_document (family_id)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE search_document USING fts5("
+        " title, body, family, entity UNINDEXED, entity_id UNINDEXED,"
+        " parent_id UNINDEXED, prefix='2 3 4 5 6', detail=column)"
+    ],
+}
+
+# entity, code, and a SELECT of family_id, entity_id, parent_id, title, body
+BACKFILL = [
+    ('item', 1, "SELECT shopping_list.family_id AS family_id, item.id AS entity_id,"
+     " item.list_id AS parent_id, item.text AS title, '' AS body"
+     " FROM item JOIN shopping_list ON shopping_list.id = item.list_id"),
+    ('note', 2, "SELECT family_id, id AS entity_id, NULL AS parent_id,"
+     " '' AS title, content AS body FROM note"),
+    ('event', 3, "SELECT family_id, id AS entity_id, NULL AS parent_id,"
+     " title, '' AS body FROM event"),
+    ('meal', 4, "SELECT family_id, id AS entity_id, NULL AS parent_id,"
+     " description AS title, COALESCE(notes, '') AS body FROM meal"),
+    ('vault', 5, "SELECT family_id, id AS entity_id, NULL AS parent_id,"
+     " title, content AS body FROM vault_entry"),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in CREATE[dialect]:
+        op.execute(statement)
+
+    # On SQLite the document key is the FTS5 rowid and the family is stored
+    # as an indexed 'f<id>' token
+    if dialect == 'postgresql':
+        key_column, family_column, family_value = 'doc_id', 'family_id', 'family_id'
+    else:
+        key_column, family_column, family_value = 'rowid', 'family', "'f' || family_id"
+    for entity, code, select in BACKFILL:
+        op.execute(
+            f"INSERT INTO search_document"
+            f" ({key_column}, {family_column}, entity, entity_id, parent_id, title, body)"
+            f" SELECT entity_id * 8 + {code}, {family_value}, '{entity}', entity_id,"
+            f" parent_id, title, body FROM ({select}) AS source"
+        )
+
+
+def downgrade():
+    op.execute('DROP TABLE search_document')
@@ -0,0 +1,34 @@
+"""Add lower(username) index to User
+
+Revision ID: 8b4f1d2a6c93
+Revises: 5d83c0a9e4f2
+Create Date: 2026-10-19 20:11:37.402915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4f1d2a6c93'
+down_revision = '5d83c0a9e4f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # text_pattern_ops lets Postgres serve LIKE 'prefix%' from the index
+    # under any collation; SQLite has no operator classes
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            'CREATE INDEX ix_user_username_lower'
+            ' ON "user" (lower(username) text_pattern_ops)'
+        )
+    else:
+        op.create_index(
+            'ix_user_username_lower', 'user', [sa.text('lower(username)')], unique=False
+        )
+
+
+def downgrade():
+    op.drop_index('ix_user_username_lower', table_name='user')
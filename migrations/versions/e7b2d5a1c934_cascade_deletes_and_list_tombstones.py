@@ -0,0 +1,63 @@
+"""Cascade deletes in the database and tombstone deleted lists
+
+Revision ID: e7b2d5a1c934
+Revises: c6e1f4a8b250
+Create Date: 2026-10-20 14:06:31.527104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b2d5a1c934'
+down_revision = 'c6e1f4a8b250'
+branch_labels = None
+depends_on = None
+
+# The foreign keys were created unnamed, so they carry Postgres' default
+# names; SQLite batch mode reflects them unnamed and names them the same way
+naming_convention = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+# (table, column, referenced table) of every foreign key that now cascades
+cascading_foreign_keys = [
+    ('item', 'list_id', 'shopping_list'),
+    ('chore_assignment', 'chore_id', 'chore'),
+    ('chore_assignment', 'family_id', 'family'),
+    ('shopping_list', 'family_id', 'family'),
+    ('event', 'family_id', 'family'),
+    ('meal', 'family_id', 'family'),
+    ('note', 'family_id', 'family'),
+    ('vault_entry', 'family_id', 'family'),
+    ('chore', 'family_id', 'family'),
+    ('family_members', 'family_id', 'family'),
+    ('change_log', 'family_id', 'family'),
+    ('family_revision', 'family_id', 'family'),
+    ('feature_watermark', 'family_id', 'family'),
+]
+
+
+def _recreate_foreign_keys(ondelete):
+    for table, column, referent in cascading_foreign_keys:
+        with op.batch_alter_table(
+            table, schema=None, naming_convention=naming_convention
+        ) as batch_op:
+            name = f'{table}_{column}_fkey'
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(
+                name, referent, [column], ['id'], ondelete=ondelete
+            )
+
+
+def upgrade():
+    with op.batch_alter_table('shopping_list', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(None)
+
+    with op.batch_alter_table('shopping_list', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')
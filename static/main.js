@@ -140,75 +140,127 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
 
-  const notificationManager = {
-    _getStorageKey: (feature, familyId) =>
-      `lastSeen_${feature}_family_${familyId}`,
-    showNotification: (feature) => {
-      const selector =
-        feature === "dashboard"
-          ? '.nav-link[href="/dashboard"]'
-          : `.nav-link[href*="/${feature}"]`;
-      const navLink = document.querySelector(selector);
-      if (navLink && !navLink.querySelector(".notification-dot")) {
-        navLink.innerHTML +=
-          ' <span class="notification-dot text-primary">•</span>';
-      }
+  // Unread changes per feature, counted by the server for this member
+  // (unread_counts on connect, unread_changed deltas, mark_seen).
+  const pageFeature = (() => {
+    const path = window.location.pathname;
+    if (path === "/dashboard" || path.startsWith("/list/")) return "lists";
+    if (path.startsWith("/calendar")) return "calendar";
+    if (path.startsWith("/bulletin_board")) return "bulletin";
+    if (path.startsWith("/meal_planner")) return "meals";
+    if (path.startsWith("/chores") || path.startsWith("/chore_history"))
+      return "chores";
+    return null;
+  })();
+  const unreadBadges = {
+    counts: {},
+    render: (feature) => {
+      const count = unreadBadges.counts[feature] || 0;
+      document
+        .querySelectorAll(`[data-unread-feature="${feature}"]`)
+        .forEach((link) => {
+          let badge = link.querySelector(".unread-badge");
+          if (!count) {
+            badge?.remove();
+            return;
+          }
+          if (!badge) {
+            badge = document.createElement("span");
+            badge.className = "badge rounded-pill bg-danger ms-2 unread-badge";
+            (link.querySelector(".card-title") || link).appendChild(badge);
+          }
+          badge.textContent = count > 99 ? "99+" : count;
+        });
     },
-    clearCurrentPageNotification: () => {
-      const familyId = document.body.dataset.familyId;
-      if (!familyId) return;
-      let feature = null;
-      if (window.location.pathname === "/dashboard") feature = "dashboard";
-      if (window.location.pathname.includes("/calendar")) feature = "calendar";
-      if (window.location.pathname.includes("/bulletin_board"))
-        feature = "bulletin_board";
-      if (feature) {
-        localStorage.setItem(
-          notificationManager._getStorageKey(feature, familyId),
-          new Date().toISOString()
-        );
-        const selector =
-          feature === "home"
-            ? '.nav-link[href="/"]'
-            : `.nav-link[href*="/${feature}"]`;
-        const navLink = document.querySelector(selector);
-        const dot = navLink ? navLink.querySelector(".notification-dot") : null;
-        if (dot) dot.remove();
-      }
+    set: (counts) => {
+      Object.assign(unreadBadges.counts, counts);
+      Object.keys(counts).forEach(unreadBadges.render);
     },
-    checkAllOnLoad: () => {
-      const familyId = document.body.dataset.familyId;
-      if (!familyId || typeof window.latestActivity === "undefined") return;
-      for (const feature in window.latestActivity) {
-        const latestTimestamp = window.latestActivity[feature];
-        if (latestTimestamp) {
-          const lastSeen = localStorage.getItem(
-            notificationManager._getStorageKey(feature, familyId)
-          );
-          if (!lastSeen || latestTimestamp > lastSeen) {
-            notificationManager.showNotification(feature);
-          }
-        }
-      }
+    add: (feature, delta) => {
+      unreadBadges.counts[feature] = (unreadBadges.counts[feature] || 0) + delta;
+      unreadBadges.render(feature);
     },
-    handleRealtimeEvent: (feature, newTimestamp) => {
-      const familyId = document.body.dataset.familyId;
-      if (!familyId) return;
-      const isOnPage = window.location.pathname.includes(`/${feature}`);
-      if (isOnPage) {
-        localStorage.setItem(
-          notificationManager._getStorageKey(feature, familyId),
-          new Date().toISOString()
+  };
+
+  // --- PRESENCE ---
+  // Dots on members who have the app open. The snapshot is fetched on every
+  // (re)connect; presence_changed keeps it current after that.
+  const presenceDots = document.querySelectorAll("[data-presence-user-id]");
+  const setPresence = (userId, online) =>
+    document
+      .querySelectorAll(`[data-presence-user-id="${userId}"]`)
+      .forEach((dot) => (dot.hidden = !online));
+  const loadPresence = () => {
+    if (!presenceDots.length) return;
+    fetch("/api/presence")
+      .then((response) => response.json())
+      .then((data) =>
+        presenceDots.forEach(
+          (dot) =>
+            (dot.hidden = !data.online.includes(
+              Number(dot.dataset.presenceUserId)
+            ))
+        )
+      )
+      .catch((error) => console.error("Presence error:", error));
+  };
+  // Must stay well below the server's PRESENCE_TIMEOUT (75 s by default)
+  setInterval(() => socket.connected && socket.emit("heartbeat"), 25000);
+  socket.on("presence_changed", (data) => {
+    if (String(data.family_id) === document.body.dataset.familyId)
+      setPresence(data.user_id, data.online);
+  });
+
+  // --- TODAY DIGEST ---
+  // The home screen's summary of today. Fetched on every (re)connect and
+  // again, debounced, when unread_changed reports a change to its features.
+  const todayDigestEl = document.getElementById("today-digest");
+  const todayFeatures = ["calendar", "meals", "chores", "bulletin"];
+  let todayTimer = null;
+  const renderTodaySection = (name, lines) => {
+    const list = todayDigestEl.querySelector(`[data-today-section="${name}"]`);
+    list.replaceChildren();
+    if (!lines.length) lines = [list.dataset.empty];
+    lines.forEach((line) => {
+      const item = document.createElement("li");
+      item.textContent = line;
+      list.appendChild(item);
+    });
+  };
+  const loadToday = () => {
+    if (!todayDigestEl) return;
+    fetch("/api/today")
+      .then((response) => response.json())
+      .then((data) => {
+        renderTodaySection(
+          "events",
+          data.events.map((event) =>
+            event.time ? `${event.time.slice(0, 5)} ${event.title}` : event.title
+          )
         );
-        return;
-      }
-      const lastSeen = localStorage.getItem(
-        notificationManager._getStorageKey(feature, familyId)
-      );
-      if (!lastSeen || newTimestamp > lastSeen) {
-        notificationManager.showNotification(feature);
-      }
-    },
+        renderTodaySection(
+          "meals",
+          data.meals.map((meal) => meal.description)
+        );
+        renderTodaySection(
+          "chores",
+          data.chores.map((chore) => `${chore.name} (${chore.points})`)
+        );
+        renderTodaySection(
+          "notes",
+          data.notes.map((note) =>
+            note.content.length > 120
+              ? `${note.content.slice(0, 120)}...`
+              : note.content
+          )
+        );
+      })
+      .catch((error) => console.error("Today digest error:", error));
+  };
+  const refreshToday = (feature) => {
+    if (!todayDigestEl || !todayFeatures.includes(feature)) return;
+    clearTimeout(todayTimer);
+    todayTimer = setTimeout(loadToday, 300);
   };
 
   // =======================================================
@@ -237,13 +289,215 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
 
+  // --- CALENDAR SUBSCRIPTION ---
+  // The feed URL is created on first request, so it's only fetched when the
+  // modal opens. webcal:// hands it to the device's calendar app.
+  const subscribeModalEl = document.getElementById("subscribeCalendarModal");
+  if (subscribeModalEl) {
+    const urlInput = document.getElementById("calendar-feed-url");
+    const openLink = document.getElementById("open-calendar-feed");
+    const loadFeedUrl = (reset) => {
+      const formData = new FormData();
+      if (reset) formData.append("reset", "1");
+      return fetch("/calendar/subscribe", {
+        method: "POST",
+        body: formData,
+        headers: { "X-Requested-With": "XMLHttpRequest" },
+      })
+        .then((response) => response.json())
+        .then((data) => {
+          if (!data.success) {
+            alert(data.message);
+            return;
+          }
+          urlInput.value = data.url;
+          openLink.href = data.url.replace(/^https?:/, "webcal:");
+        })
+        .catch((error) => console.error("Calendar feed error:", error));
+    };
+    subscribeModalEl.addEventListener("show.bs.modal", () => {
+      if (!urlInput.value) loadFeedUrl(false);
+    });
+    document
+      .getElementById("copy-calendar-feed-url")
+      .addEventListener("click", () => {
+        if (urlInput.value) navigator.clipboard.writeText(urlInput.value);
+      });
+    document
+      .getElementById("reset-calendar-feed")
+      ?.addEventListener("click", function () {
+        if (confirm(this.dataset.confirm)) loadFeedUrl(true);
+      });
+  }
+
+  // --- SCHEDULING CONFLICTS ---
+  // The server reports what an added or edited event overlaps; it is saved
+  // anyway. The conflicts modal lists every double booking ahead.
+  const formatConflict = (conflict) =>
+    conflict.events
+      .map(
+        (occurrence) =>
+          `${occurrence.start.slice(11)}-${occurrence.end.slice(11)} ${
+            occurrence.title
+          }`
+      )
+      .join(" / ");
+
+  const warnConflicts = (conflicts) => {
+    if (!conflicts || !conflicts.length) return;
+    const text = document.createElement("div");
+    text.textContent = `Overlaps with ${[
+      ...new Set(conflicts.map((conflict) => conflict.events[1].title)),
+    ].join(", ")}`;
+    showToast(text.innerHTML, "warning");
+  };
+
+  const conflictsModalEl = document.getElementById("conflictsModal");
+  if (conflictsModalEl) {
+    const conflictList = document.getElementById("conflict-list");
+    conflictsModalEl.addEventListener("show.bs.modal", () => {
+      fetch("/api/conflicts")
+        .then((response) => response.json())
+        .then((data) => {
+          conflictList.replaceChildren();
+          if (!data.conflicts.length) {
+            const empty = document.createElement("li");
+            empty.className = "list-group-item text-muted";
+            empty.textContent = conflictList.dataset.empty;
+            conflictList.appendChild(empty);
+          }
+          data.conflicts.forEach((conflict) => {
+            const item = document.createElement("li");
+            item.className = "list-group-item";
+            const day = document.createElement("div");
+            day.className = "small text-muted";
+            day.textContent = conflict.date;
+            item.append(day, formatConflict(conflict));
+            conflictList.appendChild(item);
+          });
+        })
+        .catch((error) => console.error("Conflicts error:", error));
+    });
+  }
+
+  // --- DELTA SYNC ON RECONNECT ---
+  // Every live event carries the sequence number of its change. After a
+  // reconnect we ask the server for whatever we missed since the last one.
+  let syncSeq = parseInt(document.body.dataset.syncSeq || "0", 10);
+  let hasConnectedBefore = false;
+
+  socket.onAny((eventName, data) => {
+    if (data && data.seq > syncSeq) syncSeq = data.seq;
+  });
+
+  // Which pages display each kind of synced entity
+  const SYNC_PAGES = {
+    list: ["dashboard", "view_list"],
+    item: ["dashboard", "view_list"],
+    note: ["bulletin_board"],
+    event: ["calendar_view"],
+    meal: ["meal_planner"],
+    chore: ["chores"],
+    assignment: ["chores"],
+  };
+
+  // Replays a missed change through the regular live event handlers.
+  // Returns false if the change can't be applied in place.
+  const applySyncedChange = (change) => {
+    const dispatch = (eventName, payload) =>
+      socket.listeners(eventName).forEach((handler) => handler(payload));
+    const data = change.data;
+
+    if (change.entity === "item" && change.op === "delete") {
+      dispatch("item_deleted", { item_id: change.id });
+    } else if (change.entity === "item") {
+      const itemEl = document.getElementById(`item-${change.id}`);
+      if (itemEl) {
+        // Moving items between the open/completed sections is left to a reload
+        const checkbox = itemEl.querySelector(".item-toggle-checkbox");
+        const isDone = checkbox
+          ? checkbox.checked
+          : itemEl.classList.contains("done");
+        if (isDone !== data.done) return false;
+        dispatch("item_edited", {
+          list_id: data.list_id,
+          item_id: change.id,
+          new_text: data.text,
+        });
+        dispatch("item_moved", {
+          list_id: data.list_id,
+          item_id: change.id,
+          position: data.position,
+        });
+      } else {
+        dispatch("item_added", { list_id: data.list_id, item: data });
+      }
+      // The list cards on the dashboard show counts, so they need a refresh
+      return document.body.dataset.endpoint !== "dashboard";
+    } else if (change.entity === "list" && change.op === "delete") {
+      dispatch("list_deleted", { list_id: change.id });
+    } else if (change.entity === "note" && change.op === "delete") {
+      dispatch("note_deleted", { note_id: change.id });
+    } else if (change.entity === "assignment" && change.op === "upsert") {
+      dispatch("chore_toggled", {
+        assignment_id: change.id,
+        is_complete: data.is_complete,
+      });
+    } else {
+      return false;
+    }
+    return true;
+  };
+
+  const catchUpAfterReconnect = async () => {
+    if (!document.body.dataset.familyId) return;
+    try {
+      const response = await fetch(`/api/sync?since=${syncSeq}`);
+      if (!response.ok) return;
+      const delta = await response.json();
+      const endpoint = document.body.dataset.endpoint;
+      const shownHere = (change) =>
+        (SYNC_PAGES[change.entity] || []).includes(endpoint);
+
+      let needsReload = false;
+      delta.changes.filter(shownHere).forEach((change) => {
+        if (delta.snapshot || !applySyncedChange(change)) needsReload = true;
+      });
+      syncSeq = delta.seq;
+      if (needsReload) window.location.reload();
+    } catch (error) {
+      console.error("Error syncing missed changes:", error);
+    }
+  };
+
+  // Batched writes (/api/batch) arrive as one broadcast of sync-style changes
+  socket.on("changes_applied", (data) => {
+    const endpoint = document.body.dataset.endpoint;
+    const needsReload = data.changes.some(
+      (change) =>
+        (SYNC_PAGES[change.entity] || []).includes(endpoint) &&
+        !applySyncedChange(change)
+    );
+    if (needsReload) window.location.reload();
+  });
+
   socket.on("connect", () => {
     console.log("Connected to server!");
-    document
-      .querySelectorAll(".list-group[data-list-id]")
-      .forEach((list) => socket.emit("join", { list_id: list.dataset.listId }));
+    // The server has joined the session's family; this follows the page's
+    // family if another tab switched it, and asks for the lists' item events
     const familyId = document.body.dataset.familyId;
-    if (familyId) socket.emit("join_family_room", { family_id: familyId });
+    if (familyId) {
+      const lists = document.querySelectorAll(".list-group[data-list-id]");
+      socket.emit("subscribe", {
+        family_id: Number(familyId),
+        list_ids: [...lists].map((list) => Number(list.dataset.listId)),
+      });
+    }
+    loadPresence();
+    loadToday();
+
+    if (hasConnectedBefore) catchUpAfterReconnect();
+    hasConnectedBefore = true;
   });
   socket.on("list_deleted", (data) =>
     document.getElementById(`list-card-${data.list_id}`)?.remove()
@@ -571,9 +825,46 @@ document.addEventListener("DOMContentLoaded", () => {
       );
     }
   };
-  socket.on("new_activity", (data) =>
-    notificationManager.handleRealtimeEvent(data.feature, data.timestamp)
+  socket.on("avatar_updated", (data) => {
+    document
+      .querySelectorAll(`img[data-avatar-user-id="${data.user_id}"]`)
+      .forEach((img) => (img.src = data.avatar_url));
+  });
+  socket.on("avatar_failed", () =>
+    showToast("Your new avatar could not be saved. Please try again.", "danger")
   );
+  socket.on("unread_counts", (data) => {
+    if (String(data.family_id) !== document.body.dataset.familyId) return;
+    unreadBadges.set(data.counts);
+  });
+  // Changes to the page being looked at are read already. Saying so costs
+  // the server a write, so it is said at most every MARK_SEEN_INTERVAL ms,
+  // and when the page is hidden or left, rather than once per change.
+  const MARK_SEEN_INTERVAL = 5000;
+  let markSeenTimer = null;
+  const markPageSeen = () => {
+    clearTimeout(markSeenTimer);
+    markSeenTimer = null;
+    socket.emit("mark_seen", { feature: pageFeature });
+  };
+  const flushPageSeen = () => {
+    if (markSeenTimer) markPageSeen();
+  };
+  document.addEventListener("visibilitychange", () => {
+    if (document.visibilityState === "hidden") flushPageSeen();
+  });
+  window.addEventListener("pagehide", flushPageSeen);
+  socket.on("unread_changed", (data) => {
+    refreshToday(data.feature);
+    if (String(data.actor_id) === document.body.dataset.userId) return;
+    if (data.feature === pageFeature) {
+      if (!markSeenTimer) {
+        markSeenTimer = setTimeout(markPageSeen, MARK_SEEN_INTERVAL);
+      }
+    } else {
+      unreadBadges.add(data.feature, data.delta);
+    }
+  });
   function createListItemElement(item) {
     const li = document.createElement("li");
     li.className = `list-group-item d-flex justify-content-between align-items-center ${
@@ -610,35 +901,40 @@ document.addEventListener("DOMContentLoaded", () => {
   }
   const inviteModal = document.getElementById("inviteUserModal");
   if (inviteModal) {
-    const userSelect = document.getElementById("invite-user-select");
-    inviteModal.addEventListener("show.bs.modal", async () => {
-      userSelect.innerHTML =
-        '<option value="" disabled selected>Loading users...</option>';
-      userSelect.disabled = true;
-      try {
-        const response = await fetch("/api/inviteable_users");
-        if (!response.ok) throw new Error("Failed to load users");
-        const users = await response.json();
-        userSelect.innerHTML = "";
-        userSelect.disabled = false;
-        if (users.length > 0) {
-          userSelect.innerHTML =
-            '<option value="" disabled selected>Choose a user...</option>';
+    // Typeahead: ask for the users matching what has been typed so far
+    const userInput = document.getElementById("invite-user-input");
+    const suggestions = document.getElementById("invite-user-suggestions");
+    let suggestTimer = null;
+    let suggestRequest = 0;
+    userInput.addEventListener("input", () => {
+      clearTimeout(suggestTimer);
+      const prefix = userInput.value.trim();
+      if (!prefix) {
+        suggestions.innerHTML = "";
+        return;
+      }
+      suggestTimer = setTimeout(async () => {
+        const request = ++suggestRequest;
+        try {
+          const response = await fetch(
+            `/api/inviteable_users?prefix=${encodeURIComponent(prefix)}`
+          );
+          if (!response.ok) throw new Error("Failed to load users");
+          const users = await response.json();
+          if (request !== suggestRequest) return; // A newer one is on its way
+          suggestions.innerHTML = "";
           users.forEach((user) => {
             const option = document.createElement("option");
             option.value = user.username;
-            option.textContent = user.username;
-            userSelect.appendChild(option);
+            suggestions.appendChild(option);
           });
-        } else {
-          userSelect.innerHTML =
-            '<option value="" disabled>No new users to invite.</option>';
+        } catch (error) {
+          console.error("Error fetching inviteable users:", error);
         }
-      } catch (error) {
-        console.error("Error fetching inviteable users:", error);
-        userSelect.innerHTML =
-          '<option value="" disabled selected>Error loading users.</option>';
-      }
+      }, 200);
+    });
+    inviteModal.addEventListener("hidden.bs.modal", () => {
+      suggestions.innerHTML = "";
     });
   }
 
@@ -712,13 +1008,37 @@ document.addEventListener("DOMContentLoaded", () => {
   // =======================================================
   // END: NEW CALENDAR FORM LOGIC
   // =======================================================
+  // Forms with data-socket-event go over the open socket, which acknowledges
+  // with the same JSON the HTTP route returns. The route is the fallback.
+  const emitSubmit = (form, callback) => {
+    const payload = Object.fromEntries(new FormData(form));
+    socket
+      .timeout(10000)
+      .emit(form.dataset.socketEvent, payload, (error, data) => {
+        if (error) {
+          showToast("The server did not respond. Please try again.", "danger");
+        } else if (callback) {
+          callback(form, data);
+        } else if (!data.success) {
+          showToast(data.message || "An error occurred.", "danger");
+        }
+      });
+  };
+
   const executeSubmit = async (form, callback) => {
+    if (form.dataset.socketEvent && socket.connected) {
+      emitSubmit(form, callback);
+      return;
+    }
     try {
       const formData = new FormData(form);
+      const headers = { "X-Requested-With": "XMLHttpRequest" };
+      // Lets the server leave this page out of its broadcast
+      if (socket.id) headers["X-Socket-ID"] = socket.id;
       const response = await fetch(form.action, {
         method: "POST",
         body: formData,
-        headers: { "X-Requested-With": "XMLHttpRequest" },
+        headers,
       });
       const data = await response.json();
       if (!response.ok) {
@@ -785,6 +1105,14 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
   const handleAddItem = (form, data) => form.reset();
+  const handleAddItems = (form, data) => {
+    if (data.success) {
+      form.reset();
+      bootstrap.Modal.getInstance(form.closest(".modal"))?.hide();
+    } else {
+      showToast(data.message || "Failed to add items.", "danger");
+    }
+  };
   const handleEditItem = (form, data) => {
     if (data.success) {
       const itemCard = form.closest(".list-group-item");
@@ -868,6 +1196,14 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   };
 
+  // The entry count shown next to a vault category's name
+  const updateVaultCategoryCount = (listGroup) => {
+    const badge = listGroup
+      ?.closest(".accordion-item")
+      ?.querySelector(".accordion-button .badge");
+    if (badge) badge.textContent = listGroup.children.length;
+  };
+
   // Place this with the other handler functions
   // Replace the existing handleAddVaultEntry function
   const handleAddVaultEntry = (form, data) => {
@@ -903,6 +1239,7 @@ document.addEventListener("DOMContentLoaded", () => {
                 <h2 class="accordion-header" id="${headingId}">
                     <button class="accordion-button collapsed" type="button" data-bs-toggle="collapse" data-bs-target="#${collapseId}" aria-expanded="false" aria-controls="${collapseId}">
                         ${newCategoryName}
+                        <span class="badge bg-secondary rounded-pill ms-2">0</span>
                     </button>
                 </h2>
                 <div id="${collapseId}" class="accordion-collapse collapse" aria-labelledby="${headingId}" data-bs-parent="#vaultAccordion">
@@ -918,9 +1255,7 @@ document.addEventListener("DOMContentLoaded", () => {
       }
 
       listGroup.insertAdjacentHTML("beforeend", data.entry_html);
-
-      const modalContainer = document.getElementById("modal-container");
-      modalContainer.insertAdjacentHTML("beforeend", data.edit_modal_html);
+      updateVaultCategoryCount(listGroup);
 
       // Ensure the accordion section is open
       if (collapseElement) {
@@ -974,6 +1309,7 @@ document.addEventListener("DOMContentLoaded", () => {
                         <h2 class="accordion-header" id="${headingId}">
                             <button class="accordion-button collapsed" type="button" data-bs-toggle="collapse" data-bs-target="#${collapseId}" aria-expanded="false" aria-controls="${collapseId}">
                                 ${newCategoryName}
+                                <span class="badge bg-secondary rounded-pill ms-2">0</span>
                             </button>
                         </h2>
                         <div id="${collapseId}" class="accordion-collapse collapse" data-bs-parent="#vaultAccordion">
@@ -989,12 +1325,15 @@ document.addEventListener("DOMContentLoaded", () => {
             collapseElement = listGroup.closest(".accordion-collapse");
           }
           listGroup.insertAdjacentHTML("beforeend", data.entry_html);
+          updateVaultCategoryCount(listGroup);
 
           if (originalListGroup && originalListGroup.children.length === 0) {
             const accordionItem = originalListGroup.closest(".accordion-item");
             if (accordionItem) {
               accordionItem.remove();
             }
+          } else {
+            updateVaultCategoryCount(originalListGroup);
           }
 
           // Ensure the new accordion section is open
@@ -1032,6 +1371,8 @@ document.addEventListener("DOMContentLoaded", () => {
           if (accordionItem) {
             accordionItem.remove();
           }
+        } else {
+          updateVaultCategoryCount(listGroup);
         }
       }
     } else {
@@ -1108,7 +1449,14 @@ document.addEventListener("DOMContentLoaded", () => {
           document.getElementById("addEventModal")
         );
         modal.hide();
-        // Real-time event 'event_added' will handle updating the UI for everyone
+        // The family reloads on 'refresh_calendar'; this page was left out of
+        // it, so any conflicts can be read before it reloads
+        if (data.conflicts && data.conflicts.length) {
+          warnConflicts(data.conflicts);
+          setTimeout(() => window.location.reload(), 3000);
+        } else {
+          window.location.reload();
+        }
       } else {
         showToast(data.message || "Failed to add event.", "danger");
       }
@@ -1122,6 +1470,7 @@ document.addEventListener("DOMContentLoaded", () => {
         );
         modal.hide();
         // The 'event_updated' socket event will handle the UI update
+        warnConflicts(data.conflicts);
       } else {
         showToast(data.message || "Failed to update event.", "danger");
       }
@@ -1135,6 +1484,10 @@ document.addEventListener("DOMContentLoaded", () => {
       },
       'form[action="/delete_list"]': handleDeleteList,
       ".item-add-form": handleAddItem,
+      ".items-bulk-add-form": handleAddItems,
+      // The 'items_bulk_changed' socket event updates the list for everyone
+      ".items-toggle-all-form": (form, data) => {},
+      ".items-clear-completed-form": (form, data) => {},
       ".item-edit-form": handleEditItem,
       'form[action="/delete_item"]': handleDeleteItem,
       'form[action="/toggle_done"]': handleToggleItem,
@@ -1469,8 +1822,6 @@ document.addEventListener("DOMContentLoaded", () => {
   // END: NEW UNIFIED AND DELEGATED EVENT LISTENER
   // =======================================================================
 
-  notificationManager.checkAllOnLoad();
-  notificationManager.clearCurrentPageNotification();
   // This listener for the "Generate Chores" button is a special case.
   // It has its own AJAX logic and doesn't need the confirmation modal,
   // so it remains separate from the delegated listener.
@@ -1541,6 +1892,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
         socket.emit("toggle_chore", {
           assignment_id: choreCard.dataset.assignmentId,
+          is_complete: choreCard.classList.contains("is-complete"),
         });
       }
     });
@@ -1611,6 +1963,95 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
   // --- END: ADD THIS NEW CODE ---
+
+  // --- Family switcher: summaries are fetched when the menu first opens ---
+  const familySwitcher = document.getElementById("family-switcher");
+  if (familySwitcher) {
+    const dropdown = familySwitcher.closest(".dropdown");
+    dropdown?.addEventListener("show.bs.dropdown", async () => {
+      if (familySwitcher.dataset.loaded) return;
+      familySwitcher.dataset.loaded = "true";
+      try {
+        const response = await fetch(familySwitcher.dataset.url);
+        const data = await response.json();
+        if (!response.ok || !data.success) throw new Error(data.message);
+        const others = data.families.filter((family) => !family.is_current);
+        const itemsEl = familySwitcher.querySelector(".family-switcher-items");
+        const next = encodeURIComponent(window.location.pathname);
+        others.forEach((family) => {
+          const link = document.createElement("a");
+          link.className =
+            "dropdown-item d-flex justify-content-between align-items-center";
+          link.href = `/families/select/${family.id}?next=${next}`;
+          link.textContent = family.name;
+          const counts = document.createElement("small");
+          counts.className = "ms-3 text-muted";
+          counts.innerHTML = `<i class="bi bi-cart"></i> ${family.open_items} <i class="bi bi-calendar-event ms-1"></i> ${family.events_today}`;
+          if (family.unread) {
+            counts.innerHTML += ` <span class="badge rounded-pill bg-danger">${
+              family.unread > 99 ? "99+" : family.unread
+            }</span>`;
+          }
+          link.appendChild(counts);
+          itemsEl.appendChild(link);
+        });
+        familySwitcher.hidden = others.length === 0;
+      } catch (error) {
+        delete familySwitcher.dataset.loaded;
+        console.error("Error loading families:", error);
+      }
+    });
+  }
+
+  // --- Vault: entry contents are only fetched when they are needed ---
+  const vaultAccordion = document.getElementById("vaultAccordion");
+  if (vaultAccordion) {
+    const fetchVaultEntry = async (url) => {
+      const response = await fetch(url);
+      const data = await response.json();
+      if (!response.ok || !data.success) throw new Error(data.message);
+      return data.entry;
+    };
+
+    // Expanding an entry loads its content, once
+    vaultAccordion.addEventListener("show.bs.collapse", async (event) => {
+      const contentEl = event.target;
+      if (!contentEl.matches(".vault-entry-content")) return;
+      if (contentEl.dataset.loaded) return;
+      contentEl.dataset.loaded = "true";
+      try {
+        const entry = await fetchVaultEntry(contentEl.dataset.url);
+        contentEl.querySelector("p").textContent = entry.content;
+      } catch (error) {
+        delete contentEl.dataset.loaded;
+        console.error("Error loading vault entry:", error);
+        showToast("Could not load this entry.", "danger");
+      }
+    });
+
+    // The edit modal is shared: fill it with the entry being edited
+    const editEntryModalElement = document.getElementById("editEntryModal");
+    vaultAccordion.addEventListener("click", async (event) => {
+      const button = event.target.closest(".vault-edit-button");
+      if (!button || !editEntryModalElement) return;
+      button.disabled = true;
+      try {
+        const entry = await fetchVaultEntry(button.dataset.url);
+        const form = editEntryModalElement.querySelector("form");
+        form.action = `/vault/edit/${entry.id}`;
+        form.elements.category.value = entry.category;
+        form.elements.title.value = entry.title;
+        form.elements.content.value = entry.content;
+        bootstrap.Modal.getOrCreateInstance(editEntryModalElement).show();
+      } catch (error) {
+        console.error("Error loading vault entry:", error);
+        showToast("Could not load this entry.", "danger");
+      } finally {
+        button.disabled = false;
+      }
+    });
+  }
+
   // --- Trigger Progress Bar Animation on Page Load ---
   document.querySelectorAll(".chore-card[data-member-id]").forEach((card) => {
     // We only need to run this once per member, so we use a check.
@@ -1659,6 +2100,8 @@ document.addEventListener("DOMContentLoaded", () => {
       div.className = "list-group-item";
       div.id = `item-${item.id}`;
       div.dataset.itemId = item.id;
+      div.dataset.position = item.position;
+      div.draggable = true;
 
       div.innerHTML = `
             <input class="form-check-input item-toggle-checkbox" type="checkbox" value="" 
@@ -1673,7 +2116,7 @@ document.addEventListener("DOMContentLoaded", () => {
                 <button class="btn btn-sm border-0 p-1 item-edit-button" title="Edit">
                     <i class="bi bi-pencil"></i>
                 </button>
-                <form action="/delete_item" method="POST" class="d-inline confirm-delete mb-0" data-item-id="${
+                <form action="/delete_item" method="POST" class="d-inline confirm-delete mb-0" data-socket-event="delete_item" data-item-id="${
                   item.id
                 }">
                     <input type="hidden" name="item_to_delete" value="${
@@ -1685,7 +2128,7 @@ document.addEventListener("DOMContentLoaded", () => {
                 </form>
             </div>
             
-            <form action="/edit_item" method="POST" class="item-edit-form d-none w-100">
+            <form action="/edit_item" method="POST" class="item-edit-form d-none w-100" data-socket-event="edit_item">
                 <input type="hidden" name="item_id" value="${item.id}">
                 <div class="input-group">
                     <input type="text" name="new_text" class="form-control form-control-sm" value="${
@@ -1698,21 +2141,44 @@ document.addEventListener("DOMContentLoaded", () => {
       return div;
     };
 
+    // Puts an item at its rank (data-position, then id) in the open or
+    // completed list, the same order the server sorts by
+    const placeItem = (itemEl, done) => {
+      const listEl = done ? completedListEl : uncompletedListEl;
+      const rank = (el) => [
+        Number(el.dataset.position),
+        Number(el.dataset.itemId),
+      ];
+      const [position, id] = rank(itemEl);
+      const nextEl = [...listEl.children].find((el) => {
+        if (el === itemEl) return false;
+        const [otherPosition, otherId] = rank(el);
+        return (
+          otherPosition > position ||
+          (otherPosition === position && otherId > id)
+        );
+      });
+      listEl.insertBefore(itemEl, nextEl || null);
+    };
+
+    const updateCompletedVisibility = () => {
+      completedContainer.style.display =
+        completedListEl.children.length > 0 ? "block" : "none";
+    };
+
     const renderItems = (items) => {
       uncompletedListEl.innerHTML = "";
       completedListEl.innerHTML = "";
-      let completedCount = 0;
       items.forEach((item) => {
         const itemEl = createItemElement(item);
         if (item.done) {
           completedListEl.appendChild(itemEl);
-          completedCount++;
         } else {
           uncompletedListEl.appendChild(itemEl);
         }
       });
       // Hide completed section if there are no completed items
-      completedContainer.style.display = completedCount > 0 ? "block" : "none";
+      updateCompletedVisibility();
     };
 
     // Handle item toggling (moving between lists)
@@ -1722,17 +2188,15 @@ document.addEventListener("DOMContentLoaded", () => {
         const itemId = checkbox.dataset.itemId;
         const card = checkbox.closest(".list-group-item");
 
-        if (checkbox.checked) {
-          completedListEl.prepend(card);
-        } else {
-          uncompletedListEl.prepend(card);
-        }
+        placeItem(card, checkbox.checked);
 
         // Update visibility of completed section
-        completedContainer.style.display =
-          completedListEl.children.length > 0 ? "block" : "none";
+        updateCompletedVisibility();
 
-        socket.emit("toggle_done", { item_to_toggle: itemId });
+        socket.emit("toggle_done", {
+          item_to_toggle: itemId,
+          done: checkbox.checked,
+        });
       }
     });
 
@@ -1740,8 +2204,7 @@ document.addEventListener("DOMContentLoaded", () => {
     socket.on("item_added", (data) => {
       if (uncompletedListEl.dataset.listId == data.list_id) {
         if (!document.getElementById(`item-${data.item.id}`)) {
-          const newItemEl = createItemElement(data.item);
-          uncompletedListEl.prepend(newItemEl);
+          placeItem(createItemElement(data.item), data.item.done);
         }
       }
     });
@@ -1758,6 +2221,113 @@ document.addEventListener("DOMContentLoaded", () => {
       }
     });
 
+    // Bulk add / check all / clear completed arrive as one event
+    socket.on("items_bulk_changed", (data) => {
+      if (uncompletedListEl.dataset.listId != data.list_id) return;
+
+      data.added.forEach((item) => {
+        if (!document.getElementById(`item-${item.id}`)) {
+          placeItem(createItemElement(item), item.done);
+        }
+      });
+      data.updated.forEach((item) => {
+        const itemEl = document.getElementById(`item-${item.id}`);
+        if (!itemEl) return;
+        // Moved directly: a "change" event would send toggle_done again
+        itemEl.querySelector(".item-toggle-checkbox").checked = item.done;
+        placeItem(itemEl, item.done);
+      });
+      data.deleted.forEach((itemId) =>
+        document.getElementById(`item-${itemId}`)?.remove()
+      );
+
+      updateCompletedVisibility();
+    });
+
+    socket.on("item_moved", (data) => {
+      if (uncompletedListEl.dataset.listId != data.list_id) return;
+      // The whole list was renumbered to make room
+      Object.entries(data.renumbered || {}).forEach(([itemId, position]) => {
+        const el = document.getElementById(`item-${itemId}`);
+        if (el) el.dataset.position = position;
+      });
+      const itemEl = document.getElementById(`item-${data.item_id}`);
+      if (itemEl) {
+        itemEl.dataset.position = data.position;
+        const checkbox = itemEl.querySelector(".item-toggle-checkbox");
+        placeItem(itemEl, checkbox.checked);
+      }
+    });
+
+    // Drag an item within its section to reorder it
+    let draggedEl = null;
+    let draggedFrom = null;
+    [uncompletedListEl, completedListEl].forEach((listEl) => {
+      listEl.addEventListener("dragstart", (e) => {
+        draggedEl = e.target.closest(".list-group-item");
+        draggedFrom = draggedEl?.nextElementSibling;
+        if (e.dataTransfer) e.dataTransfer.effectAllowed = "move";
+      });
+      listEl.addEventListener("dragover", (e) => {
+        const overEl = e.target.closest(".list-group-item");
+        if (!draggedEl || !overEl || overEl === draggedEl) return;
+        if (overEl.parentElement !== draggedEl.parentElement) return;
+        e.preventDefault();
+        const rect = overEl.getBoundingClientRect();
+        const below = e.clientY > rect.top + rect.height / 2;
+        listEl.insertBefore(draggedEl, below ? overEl.nextSibling : overEl);
+      });
+      listEl.addEventListener("drop", (e) => e.preventDefault());
+      listEl.addEventListener("dragend", () => {
+        const itemEl = draggedEl;
+        draggedEl = null;
+        if (!itemEl || itemEl.nextElementSibling === draggedFrom) return;
+        socket.emit(
+          "reorder_item",
+          {
+            item_id: itemEl.dataset.itemId,
+            prev_id: itemEl.previousElementSibling?.dataset.itemId,
+            next_id: itemEl.nextElementSibling?.dataset.itemId,
+          },
+          (data) => {
+            if (data && data.success) itemEl.dataset.position = data.position;
+            else showToast("Could not move the item.", "danger");
+          }
+        );
+      });
+    });
+
+    // Long lists: fetch the next page of items (keyset cursor from the server)
+    const loadMoreButton = document.getElementById("load-more-items");
+    let nextItemsCursor = window.nextItemsCursor;
+    loadMoreButton?.addEventListener("click", async () => {
+      if (!nextItemsCursor) return;
+      loadMoreButton.disabled = true;
+      try {
+        const url = `${loadMoreButton.dataset.url}?after=${encodeURIComponent(
+          nextItemsCursor
+        )}`;
+        const response = await fetch(url);
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.message);
+        data.items.forEach((item) => {
+          if (!document.getElementById(`item-${item.id}`)) {
+            const itemEl = createItemElement(item);
+            const listEl = item.done ? completedListEl : uncompletedListEl;
+            listEl.appendChild(itemEl);
+          }
+        });
+        updateCompletedVisibility();
+        nextItemsCursor = data.next;
+        loadMoreButton.hidden = !nextItemsCursor;
+      } catch (error) {
+        console.error("Error loading items:", error);
+        showToast("Could not load more items.", "danger");
+      } finally {
+        loadMoreButton.disabled = false;
+      }
+    });
+
     // Initial render
     if (window.initialItems) {
       renderItems(window.initialItems);
@@ -1,18 +1,120 @@
-// This is a basic "network-first" service worker.
-// It satisfies the fetch handler requirement for PWA installability.
+// Caching service worker for the Family Dashboard PWA.
+//
+// This file is served by Flask at /service-worker.js (so its scope covers the
+// whole site), with PRECACHE_VERSION and PRECACHE_MANIFEST prepended. Both are
+// generated from the contents of static/, so every deploy that changes a
+// static file also changes this script, which makes the browser install the
+// new worker and drop the old caches.
+//
+// - Static files (/static/, /assets/ and the pinned CDN libraries): cache-first.
+// - HTML pages: network-first. The last copy of a page (or the offline page)
+//   is only shown when the network can't be reached.
+// - Everything else (API calls, form posts, socket.io): straight to network.
+
+const CACHE_PREFIX = "family-dashboard-";
+const STATIC_CACHE = `${CACHE_PREFIX}static-${PRECACHE_VERSION}`;
+const PAGE_CACHE = `${CACHE_PREFIX}pages-${PRECACHE_VERSION}`;
+const OFFLINE_URL = "/offline";
+
+// Third-party libraries are loaded from version-pinned URLs, so they never change.
+const CDN_HOSTS = ["cdn.jsdelivr.net", "cdn.socket.io"];
 
 self.addEventListener("install", (event) => {
-  console.log("Service worker installing...");
-  // Add a call to skipWaiting to activate the new service worker immediately.
-  self.skipWaiting();
+  const urls = PRECACHE_MANIFEST.map((entry) => entry.url).concat(OFFLINE_URL);
+  event.waitUntil(
+    caches
+      .open(STATIC_CACHE)
+      // "reload" skips the HTTP cache so we never precache a stale copy
+      .then((cache) =>
+        cache.addAll(urls.map((url) => new Request(url, { cache: "reload" })))
+      )
+      .then(() => self.skipWaiting())
+  );
 });
 
 self.addEventListener("activate", (event) => {
-  console.log("Service worker activating...");
+  event.waitUntil(
+    caches
+      .keys()
+      .then((keys) =>
+        Promise.all(
+          keys
+            .filter(
+              (key) =>
+                key.startsWith(CACHE_PREFIX) &&
+                key !== STATIC_CACHE &&
+                key !== PAGE_CACHE
+            )
+            .map((key) => caches.delete(key))
+        )
+      )
+      .then(() => self.clients.claim())
+  );
 });
 
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(STATIC_CACHE);
+    cache.put(request, response.clone());
+  }
+  return response;
+}
+
+async function networkFirst(event) {
+  let response;
+  try {
+    response = await fetch(event.request);
+  } catch (error) {
+    const cached = await caches.match(event.request, { cacheName: PAGE_CACHE });
+    return cached || caches.match(OFFLINE_URL);
+  }
+
+  const responseUrl = response.url ? new URL(response.url) : null;
+  if (responseUrl && responseUrl.pathname === "/login") {
+    // Signed out (here or on another device): nothing private stays offline
+    event.waitUntil(caches.delete(PAGE_CACHE));
+  } else if (response.ok && !response.redirected) {
+    const copy = response.clone();
+    event.waitUntil(
+      caches.open(PAGE_CACHE).then((cache) => cache.put(event.request, copy))
+    );
+  }
+  return response;
+}
+
+// Requests after which the cached pages belong to another user or family
+function changesAccount(url) {
+  return (
+    ["/logout", "/login", "/families/create"].includes(url.pathname) ||
+    url.pathname.startsWith("/families/select/")
+  );
+}
+
 self.addEventListener("fetch", (event) => {
-  // This fetch handler is the key part.
-  // We are just letting the network handle the request, which is fine for now.
-  event.respondWith(fetch(event.request));
+  const request = event.request;
+  const url = new URL(request.url);
+
+  if (url.origin === self.location.origin && changesAccount(url)) {
+    // Pages cached for this user or family must not be shown for the next one
+    event.waitUntil(caches.delete(PAGE_CACHE));
+    return;
+  }
+  if (request.method !== "GET") return;
+
+  if (url.origin !== self.location.origin) {
+    if (CDN_HOSTS.includes(url.hostname)) {
+      event.respondWith(cacheFirst(request));
+    }
+    return;
+  }
+
+  if (url.pathname.startsWith("/static/") || url.pathname.startsWith("/assets/")) {
+    event.respondWith(cacheFirst(request));
+  } else if (request.mode === "navigate") {
+    event.respondWith(networkFirst(event));
+  }
 });